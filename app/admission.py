@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Admission Control - Bounded concurrency and a fair wait queue for /agent
+
+At most max_concurrent requests run at once. Further requests wait in a
+bounded queue with one FIFO per client key; free slots are handed out
+round-robin across keys, so a client that floods the queue (e.g. a CI job)
+only delays its own requests. A request is rejected with 429 and
+Retry-After when the queue (or its key's share) is full, when its
+estimated wait exceeds its deadline, or when it waited longer than that.
+
+The controller lives on the event loop and is not thread-safe; the wait
+estimate uses a moving average of recent service times.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from . import metrics
+
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_MAX_QUEUE_PER_KEY = 8
+DEFAULT_MAX_WAIT_SECONDS = 30.0
+# Prior for the service time estimate until real requests have been measured
+INITIAL_SERVICE_SECONDS = 2.0
+SERVICE_EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Request not admitted; maps to 429 with Retry-After"""
+
+    def __init__(self, reason: str, message: str, retry_after: float):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def client_key(api_key: Optional[str], authorization: Optional[str], host: Optional[str]) -> str:
+    """Fairness key: the caller's API key or bearer token (hashed), else its address"""
+    secret = api_key or (authorization[7:] if authorization and authorization.lower().startswith("bearer ") else None)
+    if secret:
+        return "key:" + hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
+    return f"ip:{host or 'unknown'}"
+
+
+class AdmissionController:
+    """Concurrency limit with per-key round-robin queueing"""
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_queue: int = DEFAULT_MAX_QUEUE,
+                 max_queue_per_key: int = DEFAULT_MAX_QUEUE_PER_KEY,
+                 max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_key = max_queue_per_key
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self.service_seconds = INITIAL_SERVICE_SECONDS
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Limits from VERIGPT_AGENT_MAX_CONCURRENT, _MAX_QUEUE, _MAX_QUEUE_PER_KEY and _MAX_WAIT_SECONDS"""
+        return cls(
+            max_concurrent=int(os.getenv("VERIGPT_AGENT_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT)),
+            max_queue=int(os.getenv("VERIGPT_AGENT_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+            max_queue_per_key=int(os.getenv("VERIGPT_AGENT_MAX_QUEUE_PER_KEY", DEFAULT_MAX_QUEUE_PER_KEY)),
+            max_wait_seconds=float(os.getenv("VERIGPT_AGENT_MAX_WAIT_SECONDS", DEFAULT_MAX_WAIT_SECONDS))
+        )
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def estimated_wait(self, key: str) -> float:
+        """Expected seconds until a new request from this key would start
+
+        Under round-robin, every other key can get at most one slot per
+        request this key already has queued, plus one.
+        """
+        if self.active < self.max_concurrent and not self._queued:
+            return 0.0
+        own = len(self._queues.get(key, ()))
+        ahead = own + sum(min(len(waiters), own + 1) for other, waiters in self._queues.items() if other != key)
+        # Slots free up at a rate of max_concurrent per service time
+        return (ahead + 1) / self.max_concurrent * self.service_seconds
+
+    def _reject(self, reason: str, message: str, retry_after: float) -> AdmissionRejected:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        metrics.ADMISSION_REJECTED.labels(reason=reason).inc()
+        return AdmissionRejected(reason, message, retry_after)
+
+    async def acquire(self, key: str, max_wait: Optional[float] = None) -> None:
+        """Wait for a slot; raises AdmissionRejected instead of waiting past max_wait"""
+        max_wait = self.max_wait_seconds if max_wait is None else min(max_wait, self.max_wait_seconds)
+        if self.active < self.max_concurrent and not self._queued:
+            self.active += 1
+            self._admit(0.0)
+            return
+
+        estimate = self.estimated_wait(key)
+        if self._queued >= self.max_queue:
+            raise self._reject("queue_full", f"Server busy: {self._queued} requests already queued", estimate)
+        if len(self._queues.get(key, ())) >= self.max_queue_per_key:
+            raise self._reject(
+                "key_queue_full", f"Too many queued requests for this client (limit {self.max_queue_per_key})",
+                estimate
+            )
+        if estimate > max_wait:
+            raise self._reject(
+                "deadline", f"Estimated wait {estimate:.1f}s exceeds the request deadline of {max_wait:.1f}s",
+                estimate
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        self._queued += 1
+        metrics.ADMISSION_QUEUE_DEPTH.set(self._queued)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the wait ended: hand the slot on
+                self.release()
+            else:
+                waiter.cancel()
+                self._remove(key, waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject("wait_timeout", f"Waited {max_wait:.1f}s without getting a slot",
+                               self.estimated_wait(key))
+        self._admit(time.perf_counter() - started)
+
+    def _admit(self, waited: float) -> None:
+        self.admitted += 1
+        metrics.ADMISSION_ACTIVE.set(self.active)
+        metrics.ADMISSION_WAIT_SECONDS.observe(waited)
+
+    def _remove(self, key: str, waiter: asyncio.Future) -> None:
+        waiters = self._queues.get(key)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self._queued -= 1
+            if not waiters:
+                del self._queues[key]
+            metrics.ADMISSION_QUEUE_DEPTH.set(self._queued)
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """Free a slot, handing it directly to the next key in round-robin order"""
+        if service_seconds is not None:
+            self.service_seconds += SERVICE_EWMA_ALPHA * (service_seconds - self.service_seconds)
+        while self._queues:
+            key, waiters = next(iter(self._queues.items()))
+            waiter = waiters.popleft()
+            self._queued -= 1
+            if waiters:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if not waiter.done():
+                # The slot passes to the waiter without active ever dropping
+                waiter.set_result(None)
+                metrics.ADMISSION_QUEUE_DEPTH.set(self._queued)
+                return
+        self.active -= 1
+        metrics.ADMISSION_QUEUE_DEPTH.set(self._queued)
+        metrics.ADMISSION_ACTIVE.set(self.active)
+
+    @asynccontextmanager
+    async def slot(self, key: str, max_wait: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block"""
+        await self.acquire(key, max_wait)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def status(self) -> Dict[str, Any]:
+        """Limits, current load and counters for status endpoints"""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_queue_per_key": self.max_queue_per_key,
+            "max_wait_seconds": self.max_wait_seconds,
+            "active": self.active,
+            "queued": self._queued,
+            "queued_by_key": {key: len(waiters) for key, waiters in self._queues.items()},
+            "estimated_service_seconds": round(self.service_seconds, 3),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected)
+        }
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Code Analysis - Runs the analyze_sv prompt over submitted SystemVerilog code
+
+Results are cached by (normalized code hash, model, temperature, prompt
+version). Inputs larger than one prompt are split at design-unit boundaries
+and the parts are analyzed in parallel. Multi-file requests fan out over the
+files with bounded concurrency and are reduced into a cross-file summary.
+However the work fans out, every completion of one CodeAnalyzer waits for
+one of its max_llm_calls slots, so that limit holds across files and parts.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import ResultCache, make_key
+from .metrics import record_usage
+from .prompt import get_prompt
+from .prompt_bank import PromptBank
+
+# Bump when the pipeline changes in a way that invalidates cached results
+PIPELINE_VERSION = "2"
+
+DEFAULT_MAX_PART_CHARS = 12000
+DEFAULT_SIMILAR_MODULES = 3
+DEFAULT_PARALLELISM = 4
+DEFAULT_FILE_CONCURRENCY = 8
+DEFAULT_MAX_LLM_CALLS = 8
+MAX_REDUCE_CHARS = 24000
+
+DESIGN_UNIT_RE = re.compile(
+    r"^[ \t]*(?:virtual[ \t]+)?(module|macromodule|interface|package|class|program)\b.*?\bend(?:\1|module)\b[^\n]*",
+    re.MULTILINE | re.DOTALL
+)
+UNIT_NAME_RE = re.compile(r"(?:module|macromodule|interface|package|class|program)\s+(?:automatic\s+|static\s+)?(\w+)")
+
+
+def normalize_code(code: str) -> str:
+    """Normalize line endings and trailing whitespace so cosmetic edits keep the same hash"""
+    lines = [line.rstrip() for line in code.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return "\n".join(lines).strip("\n") + "\n"
+
+
+def code_hash(code: str) -> str:
+    """SHA-256 of the normalized code"""
+    return hashlib.sha256(normalize_code(code).encode("utf-8")).hexdigest()
+
+
+def unit_name(unit: str) -> str:
+    """Name of the first design unit declared in a block of code"""
+    match = UNIT_NAME_RE.search(unit)
+    return match.group(1) if match else "code"
+
+
+def _split_oversized(unit: str, max_chars: int) -> List[str]:
+    """Split one large design unit at blank lines, repeating its header in every part"""
+    header_end = unit.find(");")
+    header = unit[:header_end + 2] if 0 <= header_end < max_chars // 2 else unit.splitlines()[0]
+    body = unit[len(header):]
+
+    parts: List[str] = []
+    current = ""
+    for block in re.split(r"\n\s*\n", body):
+        # Blocks without blank lines inside can still be too long; fall back to lines
+        pieces = [block] if len(block) <= max_chars - len(header) else block.split("\n")
+        for piece in pieces:
+            if current and len(header) + len(current) + len(piece) + 2 > max_chars:
+                parts.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        parts.append(current)
+
+    if not parts:
+        return [header]
+    return [header + "\n" + parts[0]] + [f"{header}\n// ... (continued)\n{part}" for part in parts[1:]]
+
+
+def split_code(code: str, max_chars: int = DEFAULT_MAX_PART_CHARS) -> List[Tuple[str, str]]:
+    """Split code into (label, text) parts of at most about max_chars each
+
+    Design units (module, interface, package, class, program) are never cut
+    unless a single unit is larger than max_chars on its own. The code is cut
+    only after the end of a unit: text between units (macros, typedefs,
+    top-level functions) stays with the unit that follows it, and text after
+    the last unit with that unit, so joining the parts gives back the code.
+    """
+    if len(code) <= max_chars:
+        return [(unit_name(code), code)]
+
+    matches = list(DESIGN_UNIT_RE.finditer(code))
+    if not matches:
+        units = [(unit_name(code), code)]
+    else:
+        cuts = [0] + [match.end() for match in matches[:-1]] + [len(code)]
+        units = [(unit_name(match.group(0)), code[start:end])
+                 for match, start, end in zip(matches, cuts, cuts[1:])]
+
+    parts: List[Tuple[str, str]] = []
+    group: List[Tuple[str, str]] = []
+    group_size = 0
+    for name, unit in units:
+        if len(unit) > max_chars:
+            if group:
+                parts.append((", ".join(n for n, _ in group), "".join(u for _, u in group)))
+                group, group_size = [], 0
+            pieces = _split_oversized(unit.lstrip("\n"), max_chars)
+            parts.extend((f"{name} [{i + 1}/{len(pieces)}]", piece) for i, piece in enumerate(pieces))
+            continue
+        if group and group_size + len(unit) > max_chars:
+            parts.append((", ".join(n for n, _ in group), "".join(u for _, u in group)))
+            group, group_size = [], 0
+        group.append((name, unit))
+        group_size += len(unit)
+    if group:
+        parts.append((", ".join(n for n, _ in group), "".join(u for _, u in group)))
+    return parts
+
+
+def resolve_corpus_path(file_path: str, data_dir: str) -> Path:
+    """Resolve a path relative to the corpus, refusing anything outside of it"""
+    root = Path(data_dir).resolve()
+    candidate = Path(file_path)
+    if candidate.parts[:len(Path(data_dir).parts)] == Path(data_dir).parts:
+        candidate = Path(*candidate.parts[len(Path(data_dir).parts):])
+    resolved = (root / candidate).resolve()
+    if resolved != root and root not in resolved.parents:
+        raise ValueError(f"Path '{file_path}' is outside of {data_dir}")
+    return resolved
+
+
+class FileAnalysisRun:
+    """Progress and results of one multi-file analysis"""
+
+    def __init__(self, file_paths: List[str], model: str, temperature: float,
+                 route: Optional[Dict[str, Any]] = None):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.model = model
+        self.route = route
+        self.temperature = temperature
+        self.status = "pending"
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at: Optional[str] = None
+        self.summary: Optional[str] = None
+        self.error: Optional[str] = None
+        self.files: Dict[str, Dict[str, Any]] = {
+            path: {"status": "pending", "cached": None, "seconds": None, "error": None} for path in file_paths
+        }
+        self.results: Dict[str, str] = {}
+        self.done = threading.Event()
+
+    def progress(self) -> Dict[str, int]:
+        """Count files per status"""
+        counts = {"total": len(self.files)}
+        for info in self.files.values():
+            counts[info["status"]] = counts.get(info["status"], 0) + 1
+        return counts
+
+    def to_dict(self, include_results: bool = True) -> Dict[str, Any]:
+        """Serialize for API responses"""
+        data = {
+            "run_id": self.run_id,
+            "status": self.status,
+            "model": self.model,
+            "route": self.route,
+            "temperature": self.temperature,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress(),
+            "file_status": self.files,
+            "error": self.error
+        }
+        if include_results:
+            data["summary"] = self.summary
+            data["results"] = self.results
+        return data
+
+
+class CodeAnalyzer:
+    """Analyzes SystemVerilog code with the analyze_sv prompt plus retrieved reference modules"""
+
+    def __init__(self, get_client: Callable[[], Any], index_store=None, prompts_dir: str = "prompts",
+                 cache: Optional[ResultCache] = None, max_part_chars: int = DEFAULT_MAX_PART_CHARS,
+                 similar_modules: int = DEFAULT_SIMILAR_MODULES, parallelism: int = DEFAULT_PARALLELISM,
+                 max_llm_calls: int = DEFAULT_MAX_LLM_CALLS):
+        """Initialize with an OpenAI client factory and an optional IndexStore for retrieval
+
+        max_llm_calls bounds the completions in flight across all analyses of this analyzer.
+        """
+        self.get_client = get_client
+        self.index_store = index_store
+        self.prompts_dir = prompts_dir
+        self.prompt_bank = PromptBank(prompts_dir)
+        self.cache = cache if cache is not None else ResultCache()
+        self.max_part_chars = max_part_chars
+        self.similar_modules = similar_modules
+        self.parallelism = parallelism
+        self.max_llm_calls = max(1, max_llm_calls)
+        self._llm_slots = threading.BoundedSemaphore(self.max_llm_calls)
+        self._prompt_version: Optional[str] = None
+
+    @property
+    def prompt_version(self) -> str:
+        """Hash of the prompt templates and pipeline version used for cache keys"""
+        if self._prompt_version is None:
+            digest = hashlib.sha256(PIPELINE_VERSION.encode("utf-8"))
+            for name in ["analyze_sv.txt", "summarize_analyses.txt", "agent_main_system.md"]:
+                digest.update(Path(self.prompts_dir, name).read_bytes())
+            self._prompt_version = digest.hexdigest()[:12]
+        return self._prompt_version
+
+    def cache_key(self, code: str, model: str, temperature: float, scope: str = "analysis") -> str:
+        """Cache key for a whole analysis or (scope="part") for one split part"""
+        return make_key(scope, code_hash(code), model, temperature, self.prompt_version)
+
+    def _complete_prompt(self, prompt: str, model: str, temperature: float) -> str:
+        """Run a single-message completion with the shared system prompt"""
+        messages = [
+            {"role": "system", "content": get_prompt("agent_main_system", {}, base_dir=self.prompts_dir)},
+            {"role": "user", "content": prompt}
+        ]
+        with self._llm_slots:
+            response = self.get_client().chat.completions.create(model=model, messages=messages,
+                                                                 temperature=temperature)
+        record_usage(model, response.usage)
+        return response.choices[0].message.content
+
+    def retrieve_similar(self, code: str) -> List[Any]:
+        """Find indexed chunks similar to the code (deleted ones excluded); empty when no index is available"""
+        if self.index_store is None or self.similar_modules <= 0:
+            return []
+        with self.index_store.acquire_version() as version:
+            if version is None:
+                return []
+            embedding = self.index_store.embed_query(code[:4000])
+            return [doc for doc, _ in version.search(embedding, self.similar_modules)]
+
+    def _complete(self, code: str, references: List[Any], model: str, temperature: float) -> str:
+        """Run the analyze_sv prompt for one part"""
+        messages = [{"role": "system", "content": get_prompt("agent_main_system", {}, base_dir=self.prompts_dir)}]
+        if references:
+            reference_text = "\n\n".join(
+                f"--- From {doc.metadata.get('path') or doc.metadata.get('source', 'unknown')} ---\n{doc.page_content}"
+                for doc in references
+            )
+            messages.append({
+                "role": "user",
+                "content": f"Reference code from the indexed codebase (for context only):\n\n{reference_text}"
+            })
+        messages.append({"role": "user", "content": self.prompt_bank.format_prompt("analyze_sv", code_block=code)})
+
+        with self._llm_slots:
+            response = self.get_client().chat.completions.create(model=model, messages=messages,
+                                                                 temperature=temperature)
+        record_usage(model, response.usage)
+        return response.choices[0].message.content
+
+    def analyze_part(self, code: str, model: str, temperature: float) -> Dict[str, Any]:
+        """Analyze one part, served from the cache when unchanged"""
+        key = self.cache_key(code, model, temperature, scope="part")
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        references = self.retrieve_similar(code)
+        result = {
+            "analysis": self._complete(code, references, model, temperature),
+            "similar_modules": [doc.metadata for doc in references]
+        }
+        self.cache.set(key, result)
+        return {**result, "cached": False}
+
+    def analyze(self, code: str, model: str = "gpt-4", temperature: float = 0.1) -> Dict[str, Any]:
+        """Analyze code, splitting large inputs and analyzing the parts in parallel"""
+        normalized = normalize_code(code)
+        key = self.cache_key(normalized, model, temperature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        parts = split_code(normalized, self.max_part_chars)
+        if len(parts) == 1:
+            results = [self.analyze_part(normalized, model, temperature)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.parallelism, len(parts))) as pool:
+                results = list(pool.map(lambda part: self.analyze_part(part[1], model, temperature), parts))
+
+        if len(parts) == 1:
+            analysis = results[0]["analysis"]
+        else:
+            analysis = "\n\n".join(
+                f"## Part {i + 1}/{len(parts)}: {label}\n\n{result['analysis']}"
+                for i, ((label, _), result) in enumerate(zip(parts, results))
+            )
+
+        similar: List[Dict[str, Any]] = []
+        for result in results:
+            for metadata in result["similar_modules"]:
+                if metadata not in similar:
+                    similar.append(metadata)
+
+        result = {
+            "analysis": analysis,
+            "code_hash": code_hash(normalized),
+            "prompt_version": self.prompt_version,
+            "parts": [label for label, _ in parts],
+            "similar_modules": similar
+        }
+        self.cache.set(key, result)
+        return {**result, "cached": False}
+
+    def summarize(self, analyses: Dict[str, str], model: str, temperature: float) -> str:
+        """Reduce per-file analyses into one cross-file summary
+
+        Inputs that do not fit in one prompt are summarized in groups first
+        (in parallel), then the group summaries are summarized again.
+        """
+        key = make_key("summary", sorted(analyses.items()), model, temperature, self.prompt_version)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached["summary"]
+
+        sections = [f"### {path}\n{text}" for path, text in sorted(analyses.items())]
+        if len(sections) == 1 or sum(len(section) for section in sections) <= MAX_REDUCE_CHARS:
+            summary = self._complete_prompt(
+                self.prompt_bank.format_prompt("summarize_analyses", analyses="\n\n".join(sections)[:MAX_REDUCE_CHARS]),
+                model,
+                temperature
+            )
+        else:
+            groups: List[Dict[str, str]] = [{}]
+            size = 0
+            for (path, text), section in zip(sorted(analyses.items()), sections):
+                if groups[-1] and size + len(section) > MAX_REDUCE_CHARS:
+                    groups.append({})
+                    size = 0
+                groups[-1][path] = text
+                size += len(section) + 2
+            with ThreadPoolExecutor(max_workers=min(self.parallelism, len(groups))) as pool:
+                partials = list(pool.map(lambda group: self.summarize(group, model, temperature), groups))
+            summary = self.summarize(
+                {f"group {i + 1} ({len(group)} files)": partial for i, (group, partial) in enumerate(zip(groups, partials))},
+                model,
+                temperature
+            )
+
+        self.cache.set(key, {"summary": summary})
+        return summary
+
+    def analyze_files(self, run: FileAnalysisRun, data_dir: str = "data/raw_full",
+                      concurrency: int = DEFAULT_FILE_CONCURRENCY) -> FileAnalysisRun:
+        """Map the analysis over run.files with bounded concurrency, then reduce
+
+        concurrency bounds the files in flight; their completions share the
+        analyzer's max_llm_calls slots.
+        """
+        run.status = "running"
+
+        def analyze_one(path: str) -> None:
+            info = run.files[path]
+            info["status"] = "running"
+            started = time.perf_counter()
+            try:
+                with open(resolve_corpus_path(path, data_dir), "r", encoding="utf-8") as f:
+                    result = self.analyze(f.read(), run.model, run.temperature)
+                run.results[path] = result["analysis"]
+                info["cached"] = result["cached"]
+                info["status"] = "done"
+            except Exception as e:
+                info["status"] = "failed"
+                info["error"] = str(e)
+            info["seconds"] = round(time.perf_counter() - started, 3)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(run.files)))) as pool:
+                list(pool.map(analyze_one, list(run.files)))
+            if run.results:
+                run.status = "reducing"
+                run.summary = self.summarize(run.results, run.model, run.temperature)
+            run.status = "completed" if run.results else "failed"
+            if not run.results:
+                run.error = "No file could be analyzed"
+        except Exception as e:
+            run.status = "failed"
+            run.error = str(e)
+        finally:
+            run.finished_at = datetime.now(timezone.utc).isoformat()
+            run.done.set()
+        return run
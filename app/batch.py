@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Batch Analysis - Assertions and edge cases for every module of the corpus
+
+Runs the analyze_sv prompt over every corpus file with bounded parallelism
+and appends one JSON line per analyzed file to output/batch/results.jsonl as
+soon as it finishes. A checkpoint (output/batch/checkpoint.json) records, per
+file, the code hash, prompt version and model it was analyzed with, so an
+interrupted run resumes where it stopped and a release run only re-analyzes
+files whose content, prompts or model changed.
+
+    python -m app.batch
+    python -m app.batch --concurrency 4 --model gpt-4o
+    python -m app.batch --force                  re-analyze everything
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .analysis import CodeAnalyzer, code_hash
+from .summaries import structural_summary
+
+DEFAULT_OUTPUT_DIR = "output/batch"
+RESULTS_FILE = "results.jsonl"
+CHECKPOINT_FILE = "checkpoint.json"
+DEFAULT_CONCURRENCY = 8
+
+CODE_BLOCK_RE = re.compile(r"```[a-zA-Z]*\n(.*?)```", re.DOTALL)
+
+
+def extract_assertions(analysis: str) -> List[str]:
+    """Fenced code blocks of an analysis that contain assertions or properties"""
+    return [block.strip() for block in CODE_BLOCK_RE.findall(analysis or "")
+            if re.search(r"\bassert\b|\bproperty\b", block)]
+
+
+def read_results(output_dir: str = DEFAULT_OUTPUT_DIR) -> Dict[str, Dict[str, Any]]:
+    """Latest result line per source (later lines supersede earlier ones; torn lines are skipped)"""
+    path = Path(output_dir) / RESULTS_FILE
+    results: Dict[str, Dict[str, Any]] = {}
+    if not path.exists():
+        return results
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            results[record["source"]] = record
+    return results
+
+
+class BatchCheckpoint:
+    """Per-file completion state, rewritten atomically after every file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("files", {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def is_current(self, source: str, digest: str, prompt_version: str, model: str) -> bool:
+        """True when the file was analyzed successfully with this content, prompt and model"""
+        entry = self.entries.get(source)
+        return bool(entry) and entry.get("status") == "done" and entry.get("code_hash") == digest \
+            and entry.get("prompt_version") == prompt_version and entry.get("model") == model
+
+    def mark(self, source: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[source] = entry
+            self._save()
+
+    def prune(self, sources: List[str]) -> int:
+        """Forget files that are no longer part of the corpus"""
+        with self._lock:
+            stale = [source for source in self.entries if source not in set(sources)]
+            for source in stale:
+                del self.entries[source]
+            if stale:
+                self._save()
+            return len(stale)
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": datetime.now(timezone.utc).isoformat(), "files": self.entries}, f, indent=2)
+        tmp_path.replace(self.path)
+
+
+class BatchRunner:
+    """Analyzes every corpus file once per content hash, prompt version and model"""
+
+    def __init__(self, analyzer: CodeAnalyzer, data_dir: str = "data/raw_full",
+                 output_dir: str = DEFAULT_OUTPUT_DIR, concurrency: int = DEFAULT_CONCURRENCY,
+                 route_model: Optional[Callable[[str], str]] = None, temperature: float = 0.1):
+        """route_model maps a file's code to the model that analyzes it"""
+        self.analyzer = analyzer
+        self.data_dir = data_dir
+        self.output_dir = Path(output_dir)
+        self.concurrency = max(1, concurrency)
+        self.route_model = route_model or (lambda code: "gpt-4")
+        self.temperature = temperature
+        self.checkpoint = BatchCheckpoint(self.output_dir / CHECKPOINT_FILE)
+        self.results_path = self.output_dir / RESULTS_FILE
+        self._write_lock = threading.Lock()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Append one result line and flush it, so finished work survives an interruption"""
+        with self._write_lock:
+            self.results_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+
+    def _analyze(self, source: str, path: Path, code: str, digest: str, model: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = self.analyzer.analyze(code, model, self.temperature)
+        except Exception as e:
+            entry = {"status": "failed", "code_hash": digest, "prompt_version": self.analyzer.prompt_version,
+                     "model": model, "error": str(e), "finished_at": datetime.now(timezone.utc).isoformat()}
+            self.checkpoint.mark(source, entry)
+            return entry
+        finished_at = datetime.now(timezone.utc).isoformat()
+        self._append({
+            "source": source,
+            "modules": structural_summary(code)["units"],
+            "code_hash": digest,
+            "prompt_version": self.analyzer.prompt_version,
+            "model": model,
+            "temperature": self.temperature,
+            "analysis": result["analysis"],
+            "assertions": extract_assertions(result["analysis"]),
+            "parts": result.get("parts"),
+            "cached": result["cached"],
+            "seconds": round(time.perf_counter() - started, 3),
+            "finished_at": finished_at
+        })
+        entry = {"status": "done", "code_hash": digest, "prompt_version": self.analyzer.prompt_version,
+                 "model": model, "cached": result["cached"], "finished_at": finished_at}
+        self.checkpoint.mark(source, entry)
+        return entry
+
+    def run(self, force: bool = False, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Analyze all files that are new or changed since their last successful analysis"""
+        from .manifest import corpus_files
+
+        started = time.perf_counter()
+        root = Path(self.data_dir)
+        paths = corpus_files(self.data_dir)
+        sources = [path.relative_to(root).as_posix() for path in paths]
+        pruned = self.checkpoint.prune(sources)
+
+        pending = []
+        skipped = 0
+        for source, path in zip(sources, paths):
+            code = path.read_text(encoding="utf-8", errors="replace")
+            digest = code_hash(code)
+            model = self.route_model(code)
+            if not force and self.checkpoint.is_current(source, digest, self.analyzer.prompt_version, model):
+                skipped += 1
+                continue
+            pending.append((source, path, code, digest, model))
+        if limit is not None:
+            pending = pending[:limit]
+        print(f"🧪 Batch analysis of {len(paths)} files: {len(pending)} to analyze, {skipped} unchanged "
+              f"(prompt version {self.analyzer.prompt_version}, concurrency {self.concurrency})")
+
+        counts = {"done": 0, "failed": 0}
+        pool = ThreadPoolExecutor(max_workers=min(self.concurrency, max(1, len(pending))))
+        try:
+            futures = {pool.submit(self._analyze, *item): item[0] for item in pending}
+            for finished, future in enumerate(as_completed(futures), start=1):
+                entry = future.result()
+                counts[entry["status"]] += 1
+                icon = "✅" if entry["status"] == "done" else "❌"
+                detail = "cached" if entry.get("cached") else entry.get("error") or entry["model"]
+                print(f"{icon} [{finished}/{len(pending)}] {futures[future]} ({detail})")
+        except KeyboardInterrupt:
+            pool.shutdown(wait=True, cancel_futures=True)
+            print(f"⏸️  Interrupted after {counts['done'] + counts['failed']} files; run again to resume")
+            raise
+        finally:
+            pool.shutdown(wait=True)
+
+        summary = {
+            "files": len(paths),
+            "analyzed": counts["done"],
+            "failed": counts["failed"],
+            "skipped": skipped,
+            "remaining": len(paths) - skipped - counts["done"],
+            "pruned": pruned,
+            "prompt_version": self.analyzer.prompt_version,
+            "results_path": str(self.results_path),
+            "checkpoint_path": str(self.checkpoint.path),
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        print(f"📊 Batch done: {summary['analyzed']} analyzed, {summary['skipped']} unchanged, "
+              f"{summary['failed']} failed in {summary['seconds']}s -> {self.results_path}")
+        return summary
+
+
+def create_runner(data_dir: str = "data/raw_full", output_dir: str = DEFAULT_OUTPUT_DIR,
+                  concurrency: int = DEFAULT_CONCURRENCY, model: Optional[str] = None,
+                  index_dir: Optional[str] = "data/faiss_index") -> BatchRunner:
+    """Runner wired like /analyze/code: shared OpenAI client, analysis cache, routing and retrieval
+
+    concurrency is also the analyzer's limit on completions in flight, so
+    the parts of large files do not multiply it.
+    """
+    from .cache import ResultCache
+    from .index_store import IndexStore
+    from .llm_client import get_openai_client
+    from .routing import ModelRouter
+
+    index_store = IndexStore(index_dir) if index_dir and Path(index_dir).exists() else None
+    analyzer = CodeAnalyzer(get_openai_client, index_store,
+                            cache=ResultCache(max_entries=2048, directory="output/cache/analysis"),
+                            max_llm_calls=concurrency)
+    router = ModelRouter.from_env()
+    return BatchRunner(
+        analyzer, data_dir, output_dir, concurrency,
+        route_model=lambda code: router.route(code, task="analyze", context_chars=len(code), override=model).model
+    )
+
+
+def main() -> int:
+    """Run the batch analysis from the command line"""
+    import os
+
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Assertions and edge cases for every corpus module")
+    parser.add_argument("--data-dir", default="data/raw_full")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--index-dir", default="data/faiss_index", help="For reference modules (skipped if missing)")
+    parser.add_argument("--model", default=None, help="Model for every file (default: routed)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Files analyzed and LLM calls in flight at once")
+    parser.add_argument("--limit", type=int, default=None, help="Analyze at most this many files in this run")
+    parser.add_argument("--force", action="store_true", help="Re-analyze files that are unchanged")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if not os.getenv("OPENAI_API_KEY"):
+        print("❌ OPENAI_API_KEY is not set. Export it or put it in .env")
+        return 1
+    runner = create_runner(args.data_dir, args.output_dir, args.concurrency, args.model, args.index_dir)
+    try:
+        summary = runner.run(force=args.force, limit=args.limit)
+    except KeyboardInterrupt:
+        return 130
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    exit(main())
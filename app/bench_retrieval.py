@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Retrieval benchmark - Recall@k, MRR and search latency over a golden query set
+
+The golden set (data/golden/retrieval_queries.json) lists, for each query,
+the corpus files a good retriever should return. The corpus is chunked with
+the given parameters, embedded, and indexed with the chosen FAISS index type;
+each query's top chunks are collapsed to distinct files before scoring.
+With --hierarchical N, a per-file summary index (app.summaries) first picks
+N candidate files and only their chunks are searched.
+
+Embedders:
+    hashed  deterministic hashed bag-of-words vectors, fully offline (default)
+    local   the local embedding backend used by the index builders (app.embeddings)
+    openai  OpenAI embeddings, cached per text under output/cache/embeddings so
+            that repeated runs (and runs without network) reuse them
+
+    python -m app.bench_retrieval
+    python -m app.bench_retrieval --embedder local
+    python -m app.bench_retrieval --chunk-size 500 --chunk-overlap 100 --index hnsw
+    python -m app.bench_retrieval --embedder openai --min-recall 0.8
+    python -m app.bench_retrieval --embedder local --hierarchical 10
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .fake_openai import fake_embedding
+from .query_log import percentile
+
+DEFAULT_GOLDEN = "data/golden/retrieval_queries.json"
+DEFAULT_CACHE_DIR = "output/cache/embeddings"
+INDEX_TYPES = ["flat-l2", "flat-ip", "hnsw", "ivf"]
+K_VALUES = (1, 3, 5, 10)
+
+
+class HashedEmbedder:
+    """Offline embedder (same vectors as the fake OpenAI server)"""
+
+    def __init__(self, dim: int = 1536):
+        self.dim = dim
+        self.name = f"hashed-{dim}"
+        self.calls = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        self.calls += 1
+        return np.array([fake_embedding(text, self.dim) for text in texts], dtype="float32")
+
+
+class LocalEmbedder:
+    """Adapter for the local embedding backend"""
+
+    def __init__(self, dim: int = 1024):
+        from .embeddings import LocalHashedEmbeddingBackend
+
+        self.backend = LocalHashedEmbeddingBackend(dim)
+        self.name = self.backend.name
+        self.calls = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        self.calls += 1
+        return self.backend.embed_array(texts)
+
+
+class CachedOpenAIEmbedder:
+    """OpenAI embeddings with a per-model on-disk cache keyed by text hash"""
+
+    def __init__(self, model: str = "text-embedding-3-small", cache_dir: str = DEFAULT_CACHE_DIR,
+                 batch_size: int = 256):
+        self.model = model
+        self.name = model
+        self.batch_size = batch_size
+        self.calls = 0
+        self.path = Path(cache_dir) / f"{model}.npz"
+        self.vectors: Dict[str, np.ndarray] = {}
+        if self.path.exists():
+            data = np.load(self.path)
+            self.vectors = dict(zip(data["keys"].tolist(), data["vectors"]))
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        keys = [self._key(text) for text in texts]
+        missing = sorted({key: text for key, text in zip(keys, texts) if key not in self.vectors}.items())
+        if missing:
+            from .llm_client import get_openai_client
+
+            client = get_openai_client()
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                response = client.embeddings.create(model=self.model, input=[text for _, text in batch])
+                self.calls += 1
+                for (key, _), item in zip(batch, response.data):
+                    self.vectors[key] = np.asarray(item.embedding, dtype="float32")
+            self._save()
+        return np.stack([self.vectors[key] for key in keys])
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        keys = list(self.vectors)
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, keys=np.array(keys), vectors=np.stack([self.vectors[key] for key in keys]))
+        tmp_path.replace(self.path)
+
+
+def load_chunks(data_dir: str, chunk_size: int, chunk_overlap: int) -> List[Dict[str, str]]:
+    """Chunk the corpus the same way the index builders do"""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    from .manifest import corpus_files
+
+    root = Path(data_dir)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = []
+    for path in corpus_files(data_dir):
+        source = path.relative_to(root).as_posix()
+        for text in splitter.split_text(path.read_text(encoding="utf-8", errors="replace")):
+            chunks.append({"source": source, "text": text})
+    return chunks
+
+
+def build_index(vectors: np.ndarray, index_type: str):
+    """FAISS index of the requested type over the chunk vectors"""
+    import faiss
+
+    dim = vectors.shape[1]
+    if index_type == "flat-l2":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "flat-ip":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, 32)
+    elif index_type == "ivf":
+        nlist = max(1, int(np.sqrt(len(vectors))))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        index.train(vectors)
+        index.nprobe = max(1, nlist // 8)
+    else:
+        raise ValueError(f"Unknown index type '{index_type}'. Available: {', '.join(INDEX_TYPES)}")
+    index.add(vectors)
+    return index
+
+
+class HierarchicalIndex:
+    """Summary index over files in front of the chunk index, searched like a FAISS index"""
+
+    def __init__(self, data_dir: str, chunks: List[Dict[str, str]], chunk_index, embedder, files: int):
+        import faiss
+
+        from .manifest import corpus_files
+        from .summaries import structural_summary, summary_text
+
+        root = Path(data_dir)
+        self.sources = []
+        texts = []
+        for path in corpus_files(data_dir):
+            source = path.relative_to(root).as_posix()
+            self.sources.append(source)
+            texts.append(summary_text(source, structural_summary(path.read_text(encoding="utf-8", errors="replace"))))
+        vectors = embedder.embed(texts)
+        self.summary_index = faiss.IndexFlatL2(vectors.shape[1])
+        self.summary_index.add(vectors)
+        if hasattr(chunk_index, "make_direct_map"):
+            chunk_index.make_direct_map()
+        self.chunk_index = chunk_index
+        self.inner_product = chunk_index.metric_type == faiss.METRIC_INNER_PRODUCT
+        self.files = files
+        self.ids_by_source: Dict[str, List[int]] = {}
+        for position, chunk in enumerate(chunks):
+            self.ids_by_source.setdefault(chunk["source"], []).append(position)
+
+    def search(self, query_vector: np.ndarray, k: int):
+        from .summaries import subset_search
+
+        _, rows = self.summary_index.search(query_vector, self.files)
+        ids = np.array([i for row in rows[0] if row >= 0 for i in self.ids_by_source.get(self.sources[row], [])],
+                       dtype="int64")
+        hits = subset_search(self.chunk_index, ids, query_vector[0], k, self.inner_product)
+        return None, np.array([[chunk_id for chunk_id, _ in hits]])
+
+
+def is_relevant(source: str, expected: List[str]) -> bool:
+    """Expected paths may omit leading directories of the corpus path"""
+    return any(source == path or source.endswith("/" + path) for path in expected)
+
+
+def evaluate(golden: List[Dict[str, Any]], chunks: List[Dict[str, str]], index, embedder,
+             top_k: int, fetch_k: int) -> Dict[str, Any]:
+    """Score every golden query; returns aggregates and per-query details"""
+    per_query = []
+    for item in golden:
+        started = time.perf_counter()
+        query_vector = embedder.embed([item["query"]])
+        embedded = time.perf_counter()
+        _, ids = index.search(query_vector, fetch_k)
+        searched = time.perf_counter()
+
+        files: List[str] = []
+        for chunk_id in ids[0]:
+            if chunk_id >= 0 and chunks[chunk_id]["source"] not in files:
+                files.append(chunks[chunk_id]["source"])
+        files = files[:top_k]
+        ranks = [rank for rank, source in enumerate(files, start=1) if is_relevant(source, item["expected"])]
+        per_query.append({
+            "id": item["id"],
+            "query": item["query"],
+            "first_relevant_rank": ranks[0] if ranks else None,
+            "recall": {
+                k: len({files[r - 1] for r in ranks if r <= k}) / len(item["expected"]) for k in K_VALUES if k <= top_k
+            },
+            "embed_ms": round((embedded - started) * 1000, 3),
+            "search_ms": round((searched - embedded) * 1000, 3),
+            "top_files": files[:5]
+        })
+
+    search_ms = [q["search_ms"] for q in per_query]
+    embed_ms = [q["embed_ms"] for q in per_query]
+    return {
+        "queries": len(per_query),
+        "recall_at": {
+            k: round(sum(q["recall"][k] for q in per_query) / len(per_query), 4) for k in K_VALUES if k <= top_k
+        },
+        "hit_rate_at": {
+            k: round(sum(1 for q in per_query if q["first_relevant_rank"] and q["first_relevant_rank"] <= k)
+                     / len(per_query), 4)
+            for k in K_VALUES if k <= top_k
+        },
+        "mrr": round(sum(1.0 / q["first_relevant_rank"] for q in per_query if q["first_relevant_rank"])
+                     / len(per_query), 4),
+        "search_ms": {"p50": percentile(search_ms, 50), "p95": percentile(search_ms, 95), "max": max(search_ms)},
+        "embed_ms": {"p50": percentile(embed_ms, 50), "p95": percentile(embed_ms, 95)},
+        "per_query": per_query
+    }
+
+
+def main() -> int:
+    """Run the retrieval benchmark"""
+    parser = argparse.ArgumentParser(description="Retrieval quality and latency over the golden query set")
+    parser.add_argument("--golden", default=DEFAULT_GOLDEN)
+    parser.add_argument("--data-dir", default="data/raw_full")
+    parser.add_argument("--embedder", choices=["hashed", "local", "openai"], default="hashed")
+    parser.add_argument("--model", default="text-embedding-3-small", help="OpenAI embedding model")
+    parser.add_argument("--dim", type=int, default=None, help="Dimension of the hashed (1536) or local (1024) embedder")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--index", dest="index_type", choices=INDEX_TYPES, default="flat-l2")
+    parser.add_argument("--top-k", type=int, default=10, help="Distinct files considered per query")
+    parser.add_argument("--hierarchical", type=int, default=None, metavar="FILES",
+                        help="Search only the chunks of the FILES best matching file summaries")
+    parser.add_argument("--verbose", action="store_true", help="Print every query")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the report to this file")
+    parser.add_argument("--min-recall", type=float, default=None, help="Fail if recall@5 is lower")
+    parser.add_argument("--min-mrr", type=float, default=None, help="Fail if MRR is lower")
+    args = parser.parse_args()
+
+    with open(args.golden, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    if args.embedder == "hashed":
+        embedder = HashedEmbedder(args.dim or 1536)
+    elif args.embedder == "local":
+        embedder = LocalEmbedder(args.dim or 1024)
+    else:
+        embedder = CachedOpenAIEmbedder(args.model)
+
+    started = time.perf_counter()
+    chunks = load_chunks(args.data_dir, args.chunk_size, args.chunk_overlap)
+    chunked = time.perf_counter()
+    vectors = embedder.embed([chunk["text"] for chunk in chunks])
+    embedded = time.perf_counter()
+    index = build_index(vectors, args.index_type)
+    if args.hierarchical:
+        index = HierarchicalIndex(args.data_dir, chunks, index, embedder, args.hierarchical)
+    indexed = time.perf_counter()
+
+    # Chunks per file vary, so fetch extra chunks to fill top_k distinct files
+    report = evaluate(golden, chunks, index, embedder, args.top_k, fetch_k=min(len(chunks), args.top_k * 8))
+    report = {
+        "config": {
+            "embedder": embedder.name, "chunk_size": args.chunk_size, "chunk_overlap": args.chunk_overlap,
+            "index": args.index_type, "top_k": args.top_k, "chunks": len(chunks),
+            "hierarchical_files": args.hierarchical
+        },
+        "build_seconds": {
+            "chunk": round(chunked - started, 3),
+            "embed": round(embedded - chunked, 3),
+            "index": round(indexed - embedded, 3)
+        },
+        **report
+    }
+
+    print(f"🔍 Retrieval benchmark: {report['queries']} queries, {len(chunks)} chunks, "
+          f"{embedder.name}, {args.index_type}, chunk {args.chunk_size}/{args.chunk_overlap}"
+          + (f", hierarchical over {args.hierarchical} files" if args.hierarchical else ""))
+    if args.verbose:
+        for q in report["per_query"]:
+            rank = q["first_relevant_rank"] or "-"
+            print(f"   {q['id']} rank {rank:>2}  {q['search_ms']:7.3f} ms  {q['query']}")
+    print("   Recall@k: " + ", ".join(f"@{k} {v:.3f}" for k, v in report["recall_at"].items()))
+    print("   Hit rate: " + ", ".join(f"@{k} {v:.3f}" for k, v in report["hit_rate_at"].items()))
+    print(f"   MRR: {report['mrr']:.3f}")
+    print(f"   Search latency ms: p50 {report['search_ms']['p50']}, p95 {report['search_ms']['p95']}")
+    if args.json_path:
+        Path(args.json_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    recall_at_5 = report["recall_at"].get(5)
+    if args.min_recall is not None and (recall_at_5 is None or recall_at_5 < args.min_recall):
+        failures.append(f"recall@5 {recall_at_5} < {args.min_recall}")
+    if args.min_mrr is not None and report["mrr"] < args.min_mrr:
+        failures.append(f"MRR {report['mrr']} < {args.min_mrr}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    exit(main())
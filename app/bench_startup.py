@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark - Measures import and startup time of the FastAPI service
+
+Each measurement runs in a fresh interpreter so that module caches do not
+hide regressions. Exits with status 1 when a budget is exceeded or when a
+heavy dependency is imported eagerly by app.main.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+# Modules that must not be imported by `import app.main`
+HEAVY_MODULES = ["langchain", "langchain_community", "langchain_openai", "openai", "faiss"]
+
+MEASURE_SCRIPT = """
+import json, sys, time, asyncio
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+started_up = time.perf_counter()
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (started_up - imported) * 1000,
+    "heavy_modules": heavy
+}}))
+"""
+
+
+def measure_once(warmup: bool) -> Dict[str, Any]:
+    """Import app.main and run its startup handlers in a fresh interpreter"""
+    env = {**os.environ, "VERIGPT_WARMUP": "1" if warmup else "0"}
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT.format(heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Measurement failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(runs: int = 5, warmup: bool = False) -> Dict[str, Any]:
+    """Run the measurement several times and summarize with the median"""
+    samples: List[Dict[str, Any]] = [measure_once(warmup) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "startup_ms": round(statistics.median(s["startup_ms"] for s in samples), 1),
+        "heavy_modules": samples[-1]["heavy_modules"]
+    }
+
+
+def main() -> int:
+    """Run the benchmark and enforce the budgets"""
+    parser = argparse.ArgumentParser(description="Benchmark VeriGPT service import and startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh-interpreter runs")
+    parser.add_argument("--max-import-ms", type=float, default=1500.0, help="Budget for `import app.main`")
+    parser.add_argument("--max-startup-ms", type=float, default=100.0, help="Budget for the startup handlers")
+    parser.add_argument("--with-warmup", action="store_true", help="Start the background warmup during the run")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON only")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.runs, args.with_warmup)
+
+    failures = []
+    if result["import_ms"] > args.max_import_ms:
+        failures.append(f"import took {result['import_ms']} ms (budget {args.max_import_ms} ms)")
+    if result["startup_ms"] > args.max_startup_ms:
+        failures.append(f"startup took {result['startup_ms']} ms (budget {args.max_startup_ms} ms)")
+    if result["heavy_modules"]:
+        failures.append(f"heavy modules imported eagerly: {', '.join(result['heavy_modules'])}")
+    result["passed"] = not failures
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print("⏱️  VeriGPT startup benchmark")
+        print(f"   Runs: {result['runs']}")
+        print(f"   Import app.main: {result['import_ms']} ms (budget {args.max_import_ms} ms)")
+        print(f"   Startup handlers: {result['startup_ms']} ms (budget {args.max_startup_ms} ms)")
+        for failure in failures:
+            print(f"❌ {failure}")
+        if not failures:
+            print("✅ Startup within budget")
+
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,12 @@
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 import glob, os
 from pathlib import Path
+from app.embeddings import get_backend
+from app.manifest import write_manifest
 
-def build_index(data_dir="data/raw_full", out_dir="data/faiss_index"):
+def build_index(data_dir="data/raw_full", out_dir="data/faiss_index", embedding_backend=None):
     print("🚀 Building FAISS index...")
 
     # אסוף קבצי SystemVerilog
@@ -26,12 +27,13 @@ def build_index(data_dir="data/raw_full", out_dir="data/faiss_index"):
     print(f"✂️ Split into {len(chunks)} chunks")
 
     # צור embeddings + FAISS
-    embeddings = OpenAIEmbeddings()
+    embeddings = get_backend(embedding_backend)
     vectorstore = FAISS.from_documents(chunks, embeddings)
 
     # שמירה
     Path(out_dir).mkdir(parents=True, exist_ok=True)
     vectorstore.save_local(out_dir)
+    write_manifest(out_dir, data_dir, embeddings.name, chunk_count=len(chunks), embedding=embeddings.identity())
     print(f"✅ Saved FAISS index to {out_dir}")
 
 if __name__ == "__main__":
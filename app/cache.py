@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Result Cache - Content-addressed LRU cache for analysis results
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable cache key from JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe in-memory LRU cache, optionally backed by JSON files on disk
+
+    The disk layer lets results survive restarts; entries found on disk are
+    promoted into memory on first access. It can be bounded by total size
+    (least recently used files are removed first) and by age.
+    """
+
+    def __init__(self, max_entries: int = 1024, directory: Optional[str] = None,
+                 max_disk_bytes: int = 0, max_age_seconds: float = 0):
+        """Initialize an empty cache; directory enables on-disk persistence
+
+        max_disk_bytes and max_age_seconds bound the disk layer (0 = unbounded).
+        """
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None  # measured on the first bounded write
+        self.hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+
+    def _path(self, key: str) -> Path:
+        """Location of an entry on disk"""
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _expired(self, mtime: float) -> bool:
+        return bool(self.max_age_seconds) and time.time() - mtime > self.max_age_seconds
+
+    def get(self, key: str, count: bool = True) -> Optional[Dict[str, Any]]:
+        """Return a cached value or None; count=False leaves the hit/miss counters alone"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += count
+                return self._entries[key]
+
+        value = None
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                if self._expired(path.stat().st_mtime):
+                    path.unlink()
+                else:
+                    with open(path, "r", encoding="utf-8") as f:
+                        value = json.load(f)
+                    # Touch the file so size-bound eviction removes the least recently used entries
+                    os.utime(path)
+            except (OSError, ValueError):
+                value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += count
+                return None
+            self.hits += count
+            self._store(key, value)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value in memory and, if enabled, on disk"""
+        with self._lock:
+            self._store(key, value)
+        if self.directory is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            if self.max_disk_bytes:
+                old_size = path.stat().st_size if path.exists() else 0
+                tmp_path.replace(path)
+                self._account(path.stat().st_size - old_size)
+            else:
+                tmp_path.replace(path)
+
+    def _account(self, delta: int) -> None:
+        """Track the disk layer's size and prune it once it grows beyond max_disk_bytes"""
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += delta
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+
+    def _disk_files(self) -> List[Tuple[Path, int, float]]:
+        files = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _prune_disk(self) -> None:
+        """Remove expired files, then the least recently used until 90% of the limit (caller holds _disk_lock)"""
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_disk_bytes * 0.9)
+        for path, size, mtime in files:
+            if total <= target and not self._expired(mtime):
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+        self._disk_bytes = total
+
+    def _store(self, key: str, value: Dict[str, Any]) -> None:
+        """Insert into the LRU (caller holds the lock)"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for status endpoints"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions,
+            "hit_ratio": round(self.hits / total, 3) if total else None
+        }
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+File Catalog - In-memory listing of the SystemVerilog corpus
+
+The corpus is scanned once; afterwards directories whose mtime changed are
+rescanned (additions, removals and renames touch the directory mtime) and
+the files of the other directories are re-stat'ed, so in-place edits show
+up without listing every directory again. Queries read an immutable snapshot, so listing a page or returning statistics costs the
+same regardless of corpus size.
+"""
+
+import bisect
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+DEFAULT_EXTENSIONS = ["sv", "svh"]
+
+
+class FileEntry(NamedTuple):
+    """One cataloged file"""
+    path: str
+    size: int
+    mtime: float
+    extension: str
+
+
+class CatalogSnapshot:
+    """Sorted file list plus precomputed aggregates, never mutated after creation"""
+
+    def __init__(self, entries: List[FileEntry], extensions: List[str]):
+        self.entries = sorted(entries, key=lambda entry: entry.path)
+        self.paths = [entry.path for entry in self.entries]
+        self.file_types = {ext: 0 for ext in extensions}
+        self.total_size = 0
+        for entry in self.entries:
+            self.file_types[entry.extension] = self.file_types.get(entry.extension, 0) + 1
+            self.total_size += entry.size
+        self.created_at = datetime.now(timezone.utc).isoformat()
+
+    def prefix_range(self, prefix: str) -> range:
+        """Index range of the paths that start with prefix (binary search)"""
+        if not prefix:
+            return range(0, len(self.paths))
+        start = bisect.bisect_left(self.paths, prefix)
+        end = bisect.bisect_left(self.paths, prefix + "\U0010ffff", lo=start)
+        return range(start, end)
+
+
+class FileCatalog:
+    """Cached catalog of corpus files, refreshed incrementally by directory mtime"""
+
+    def __init__(self, root: str = "data/raw_full", extensions: Optional[List[str]] = None):
+        """Initialize without scanning; call build() or ensure_built() to scan"""
+        self.root = Path(root)
+        self.extensions = list(extensions or DEFAULT_EXTENSIONS)
+        self._suffixes = tuple(f".{ext}" for ext in self.extensions)
+        self._dir_mtimes: Dict[str, int] = {}
+        self._dir_files: Dict[str, List[FileEntry]] = {}
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self.last_scan_seconds: Optional[float] = None
+        self.last_refresh_at: Optional[str] = None
+
+    @property
+    def exists(self) -> bool:
+        """True when the corpus directory exists"""
+        return self.root.exists()
+
+    def _scan_dir(self, dir_path: str) -> List[str]:
+        """Record the matching files of one directory; returns its subdirectories"""
+        files: List[FileEntry] = []
+        subdirs: List[str] = []
+        try:
+            self._dir_mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.endswith(self._suffixes):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        relative = Path(entry.path).relative_to(self.root).as_posix()
+                        files.append(FileEntry(relative, stat.st_size, stat.st_mtime, entry.name.rsplit(".", 1)[-1]))
+        except OSError:
+            self._dir_mtimes.pop(dir_path, None)
+            self._dir_files.pop(dir_path, None)
+            return []
+        self._dir_files[dir_path] = files
+        return subdirs
+
+    def _restat_dir(self, dir_path: str) -> bool:
+        """Re-stat the recorded files of an unchanged directory; returns True if any was edited"""
+        files = self._dir_files.get(dir_path, [])
+        updated: List[FileEntry] = []
+        for entry in files:
+            try:
+                stat = os.stat(self.root / entry.path)
+            except OSError:
+                continue
+            updated.append(entry._replace(size=stat.st_size, mtime=stat.st_mtime))
+        if updated == files:
+            return False
+        self._dir_files[dir_path] = updated
+        return True
+
+    def _scan_tree(self, dir_path: str) -> None:
+        """Scan a directory and everything below it"""
+        pending = [dir_path]
+        while pending:
+            pending.extend(self._scan_dir(pending.pop()))
+
+    def _publish(self) -> None:
+        """Swap in a new snapshot built from the per-directory records"""
+        entries = [entry for files in self._dir_files.values() for entry in files]
+        self._snapshot = CatalogSnapshot(entries, self.extensions)
+        self.last_refresh_at = self._snapshot.created_at
+
+    def build(self) -> None:
+        """Full scan of the corpus"""
+        with self._lock:
+            started = time.perf_counter()
+            self._dir_mtimes.clear()
+            self._dir_files.clear()
+            if self.root.exists():
+                self._scan_tree(str(self.root))
+            self._publish()
+            self.last_scan_seconds = round(time.perf_counter() - started, 3)
+
+    def ensure_built(self) -> CatalogSnapshot:
+        """Return the current snapshot, scanning the corpus on first use"""
+        if self._snapshot is None:
+            self.build()
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        """Rescan directories whose mtime changed, re-stat the files of the others; True if anything changed"""
+        if self._snapshot is None:
+            self.build()
+            return True
+        with self._lock:
+            started = time.perf_counter()
+            changed = False
+            for dir_path in list(self._dir_mtimes):
+                try:
+                    mtime = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    # Directory removed: drop it and everything recorded below it
+                    for known in [d for d in self._dir_mtimes if d == dir_path or d.startswith(dir_path + os.sep)]:
+                        self._dir_mtimes.pop(known, None)
+                        self._dir_files.pop(known, None)
+                    changed = True
+                    continue
+                if mtime != self._dir_mtimes[dir_path]:
+                    for subdir in self._scan_dir(dir_path):
+                        if subdir not in self._dir_mtimes:
+                            self._scan_tree(subdir)
+                    changed = True
+                elif self._restat_dir(dir_path):
+                    changed = True
+            if not self._dir_mtimes and self.root.exists():
+                self._scan_tree(str(self.root))
+                changed = True
+            if changed:
+                self._publish()
+            self.last_scan_seconds = round(time.perf_counter() - started, 3)
+            return changed
+
+    def start_refresher(self, interval: float = 30.0) -> None:
+        """Refresh the catalog in a background thread every interval seconds"""
+        if self._refresher is not None or interval <= 0:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"⚠️  File catalog refresh failed: {e}")
+
+        self._refresher = threading.Thread(target=loop, name="verigpt-catalog-refresh", daemon=True)
+        self._refresher.start()
+
+    def list_files(self, prefix: str = "", offset: int = 0, limit: int = 1000) -> Dict[str, Any]:
+        """Return one page of relative file paths, optionally filtered by path prefix"""
+        snapshot = self.ensure_built()
+        matches = snapshot.prefix_range(prefix)
+        start = matches.start + min(offset, len(matches))
+        end = min(start + limit, matches.stop)
+        next_offset = offset + (end - start)
+        return {
+            "total_files": len(matches),
+            "offset": offset,
+            "limit": limit,
+            "prefix": prefix,
+            "next_offset": next_offset if next_offset < len(matches) else None,
+            "files": snapshot.paths[start:end]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return precomputed corpus statistics"""
+        snapshot = self.ensure_built()
+        return {
+            "total_files": len(snapshot.entries),
+            "file_types": dict(snapshot.file_types),
+            "total_size_bytes": snapshot.total_size,
+            "total_size_mb": round(snapshot.total_size / (1024 * 1024), 2),
+            "refreshed_at": snapshot.created_at
+        }
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+VeriGPT CLI - Terminal access to the persisted index without the HTTP server
+
+    verigpt status                      index, manifest and embedder check (no FAISS load)
+    verigpt query logic_fifo            identifier lookup straight from the corpus files
+    verigpt query "how is the fifo reset?" -k 5
+    verigpt query "..." --answer        also ask the LLM, like POST /agent
+    verigpt build --embedding-backend local
+    verigpt bench retrieval --embedder local
+    verigpt bench index|load|startup [ARGS...]
+    verigpt analytics --top 20          top queries, latencies and cache hits from the query log
+
+Every heavy dependency (LangChain, FAISS, OpenAI) is imported inside the
+subcommand that needs it, so status and identifier lookups start fast.
+`verigpt` at the repository root is a thin wrapper; `python -m app.cli`
+works the same way.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_INDEX_DIR = "data/faiss_index"
+DEFAULT_DATA_DIR = "data/raw_full"
+IDENTIFIER_RE = re.compile(r"^[`$]?[A-Za-z_][A-Za-z0-9_$]*$")
+DECLARATION_RE = re.compile(
+    r"^\s*(?:virtual\s+|static\s+|automatic\s+)*"
+    r"(module|interface|package|program|class|function|task|typedef|parameter|localparam|`define)\b"
+)
+BENCHMARKS = {
+    "retrieval": "app.bench_retrieval",
+    "index": "build_index",
+    "load": "app.load_test",
+    "startup": "app.bench_startup"
+}
+
+
+def _emit(data: Any, as_json: bool, lines: List[str]) -> None:
+    if as_json:
+        print(json.dumps(data, indent=2, default=str))
+    else:
+        print("\n".join(lines))
+
+
+def index_status(index_dir: str, data_dir: Optional[str] = None) -> Dict[str, Any]:
+    """What is on disk, what it was built from, and whether it is still usable
+
+    The embedder check is the one the server runs at load time (embeddings.check_compatible),
+    with the dimension recorded in the manifest standing in for the FAISS index's.
+    """
+    from .embeddings import check_compatible, get_backend, manifest_identity
+    from .manifest import corpus_fingerprint, read_manifest, resolve_index_dir
+
+    root = resolve_index_dir(index_dir)
+    files = {name: (root / name).stat().st_size for name in ("index.faiss", "index.pkl") if (root / name).exists()}
+    manifest = read_manifest(str(root))
+    status: Dict[str, Any] = {
+        "index_dir": index_dir,
+        "files_dir": root.as_posix(),
+        "state": "ready" if len(files) == 2 else ("missing" if not files else "incomplete"),
+        "files": files,
+        "manifest": manifest
+    }
+
+    recorded = manifest_identity(manifest)
+    configured = os.getenv("VERIGPT_EMBEDDING_BACKEND", "openai")
+    embedding: Dict[str, Any] = {"recorded": recorded, "configured_backend": configured,
+                                 "configured": None, "compatible": True, "reason": None}
+    try:
+        backend = get_backend(configured)
+        embedding["configured"] = backend.identity()
+        check_compatible(backend, manifest, recorded.get("dim"))
+    except ValueError as e:
+        embedding["compatible"] = False
+        embedding["reason"] = str(e)
+    status["embedding"] = embedding
+
+    data_dir = data_dir or (manifest or {}).get("data_dir") or DEFAULT_DATA_DIR
+    if manifest and Path(data_dir).exists():
+        current = corpus_fingerprint(data_dir, manifest.get("extensions"))
+        status["corpus"] = {"data_dir": data_dir, "up_to_date": current["corpus_hash"] == manifest.get("corpus_hash"),
+                            "files": current["file_count"]}
+    else:
+        status["corpus"] = {"data_dir": data_dir, "up_to_date": None}
+    return status
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    status = index_status(args.index_dir, args.data_dir)
+    manifest = status["manifest"] or {}
+    embedding = status["embedding"]
+    corpus = status["corpus"]
+    icon = "✅" if status["state"] == "ready" and embedding["compatible"] else "⚠️ "
+    lines = [f"{icon} Index {status['index_dir']}: {status['state']}"]
+    if status["files"]:
+        lines.append("   Files: " + ", ".join(f"{name} {size / 1e6:.2f} MB" for name, size in status["files"].items()))
+    if manifest:
+        lines.append(f"   Built {manifest.get('built_at')} from {manifest.get('file_count')} files, "
+                     f"{manifest.get('chunk_count')} chunks ({manifest.get('chunk_size')}/{manifest.get('chunk_overlap')})")
+    else:
+        lines.append("   No manifest (built before manifests were written)")
+    lines.append(f"   Embeddings: {embedding['recorded'].get('backend')} ({embedding['recorded'].get('name')}), "
+                 f"configured backend {embedding['configured_backend']}"
+                 + ("" if embedding["compatible"] else " - MISMATCH, rebuild or change VERIGPT_EMBEDDING_BACKEND"))
+    if embedding["reason"]:
+        lines.append(f"   {embedding['reason']}")
+    if corpus["up_to_date"] is not None:
+        lines.append(f"   Corpus {corpus['data_dir']}: " + ("up to date" if corpus["up_to_date"] else "changed since build"))
+    _emit(status, args.json, lines)
+    return 0 if status["state"] == "ready" and embedding["compatible"] else 1
+
+
+def lookup_identifier(identifier: str, data_dir: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Lines mentioning an identifier, declarations first (plain text scan, no index needed)"""
+    from .manifest import corpus_files
+
+    pattern = re.compile(r"(?<![\w$`])" + re.escape(identifier) + r"(?![\w$])")
+    root = Path(data_dir)
+    hits = []
+    for path in corpus_files(data_dir):
+        text = path.read_text(encoding="utf-8", errors="replace")
+        if identifier not in text:
+            continue
+        for lineno, line in enumerate(text.splitlines(), start=1):
+            if pattern.search(line):
+                hits.append({
+                    "source": path.relative_to(root).as_posix(),
+                    "line": lineno,
+                    "text": line.strip(),
+                    "declaration": bool(DECLARATION_RE.match(line))
+                })
+    hits.sort(key=lambda hit: (not hit["declaration"], hit["source"], hit["line"]))
+    return hits[:limit]
+
+
+def semantic_search(query: str, index_dir: str, top_k: int, embedding_backend: Optional[str]) -> List[Any]:
+    """Top chunks for a query from the persisted index (loaded in-process; deleted chunks are skipped)"""
+    from .index_store import IndexStore
+
+    store = IndexStore(index_dir, embedding_backend=embedding_backend)
+    with redirect_stdout(sys.stderr):
+        vectorstore = store.load()
+    if vectorstore is None:
+        raise RuntimeError(store.error or f"no index at {index_dir}")
+    with store.acquire_version() as version:
+        return version.search(store.embed_query(query), top_k)
+
+
+def answer_query(query: str, docs: List[Any], model: Optional[str]) -> Dict[str, Any]:
+    """Ask the LLM with the retrieved context, using the same prompts and routing as /agent"""
+    from .llm_client import get_openai_client
+    from .prompt import get_prompt
+    from .routing import ModelRouter
+
+    context = "\n\n".join(doc.page_content for doc in docs)
+    route = ModelRouter.from_env().route(query, task="agent", context_chars=len(context), override=model)
+    response = get_openai_client().chat.completions.create(
+        model=route.model,
+        messages=[
+            {"role": "system", "content": get_prompt("agent_main_system", {})},
+            {"role": "user", "content": get_prompt("agent_main_user", {"context": context, "query": query})}
+        ],
+        temperature=0.2
+    )
+    return {"answer": response.choices[0].message.content, "model": route.model}
+
+
+def cmd_query(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    query = " ".join(args.query)
+    mode = args.mode
+    if mode == "auto":
+        mode = "lexical" if IDENTIFIER_RE.match(query) and not args.answer else "semantic"
+
+    if mode == "lexical":
+        data_dir = args.data_dir or DEFAULT_DATA_DIR
+        hits = lookup_identifier(query, data_dir, args.top_k)
+        if hits or args.mode == "lexical":
+            result = {"query": query, "mode": "lexical", "hits": hits,
+                      "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+            lines = [f"🔎 {len(hits)} matches for {query} in {data_dir} ({result['elapsed_ms']} ms)"]
+            lines += [f"   {'◆' if hit['declaration'] else ' '} {hit['source']}:{hit['line']}  {hit['text'][:120]}"
+                      for hit in hits]
+            _emit(result, args.json, lines)
+            return 0 if hits else 1
+
+    try:
+        scored = semantic_search(query, args.index_dir, args.top_k, args.embedding_backend)
+    except Exception as e:
+        print(f"❌ Query failed: {e}", file=sys.stderr)
+        return 1
+    result: Dict[str, Any] = {
+        "query": query,
+        "mode": "semantic",
+        "hits": [{"source": doc.metadata.get("source"), "distance": round(float(score), 4),
+                  "text": doc.page_content} for doc, score in scored]
+    }
+    if args.answer:
+        try:
+            result.update(answer_query(query, [doc for doc, _ in scored], args.model))
+        except Exception as e:
+            print(f"❌ Answer failed: {e}", file=sys.stderr)
+            return 1
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    lines = [f"🔎 Top {len(scored)} chunks for: {query} ({result['elapsed_ms']} ms)"]
+    for rank, hit in enumerate(result["hits"], start=1):
+        lines.append(f"\n{rank}. {hit['source']} (distance {hit['distance']})")
+        lines += ["   " + line for line in hit["text"].splitlines()[:args.lines]]
+    if args.answer:
+        lines += [f"\n🤖 Answer ({result['model']}):", result["answer"] or ""]
+    _emit(result, args.json, lines)
+    return 0
+
+
+def cmd_build(args: argparse.Namespace) -> int:
+    from build_index import build_index
+
+    build_index(data_dir=args.data_dir or DEFAULT_DATA_DIR, out_dir=args.index_dir,
+                embedding_backend=args.embedding_backend)
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    """Run one of the benchmark scripts with the remaining arguments"""
+    import importlib
+
+    module_name = BENCHMARKS[args.benchmark]
+    extra = list(args.args)
+    if args.benchmark == "index":
+        extra = ["--bench"] + extra
+    sys.argv = [module_name] + extra
+    return importlib.import_module(module_name).main() or 0
+
+
+def cmd_analytics(args: argparse.Namespace) -> int:
+    from .query_log import run
+
+    return run(args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="verigpt", description="VeriGPT command line")
+    parser.add_argument("--index-dir", default=os.getenv("VERIGPT_INDEX_DIR", DEFAULT_INDEX_DIR))
+    parser.add_argument("--data-dir", default=None, help="Corpus directory (default: from the index manifest)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    status = subparsers.add_parser("status", help="Show the persisted index and whether it is usable")
+    status.add_argument("--json", action="store_true")
+    status.set_defaults(func=cmd_status)
+
+    query = subparsers.add_parser("query", help="Search the index (identifiers are looked up directly)")
+    query.add_argument("query", nargs="+")
+    query.add_argument("-k", "--top-k", type=int, default=5)
+    query.add_argument("--mode", choices=["auto", "lexical", "semantic"], default="auto")
+    query.add_argument("--embedding-backend", default=None, help="Defaults to VERIGPT_EMBEDDING_BACKEND")
+    query.add_argument("--answer", action="store_true", help="Also ask the LLM (needs OPENAI_API_KEY)")
+    query.add_argument("--model", default=None, help="Model for --answer (default: routed)")
+    query.add_argument("--lines", type=int, default=6, help="Lines of each chunk to print")
+    query.add_argument("--json", action="store_true")
+    query.set_defaults(func=cmd_query)
+
+    build = subparsers.add_parser("build", help="Build the index from the corpus")
+    build.add_argument("--embedding-backend", default=None, help="openai or local (default: VERIGPT_EMBEDDING_BACKEND)")
+    build.set_defaults(func=cmd_build)
+
+    bench = subparsers.add_parser("bench", help="Run a benchmark (arguments after the name are passed through)")
+    bench.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    bench.add_argument("args", nargs=argparse.REMAINDER)
+    bench.set_defaults(func=cmd_bench)
+
+    from .query_log import DEFAULT_PATH
+
+    analytics = subparsers.add_parser("analytics", help="Summarize the /agent query log")
+    analytics.add_argument("--path", default=os.getenv("VERIGPT_QUERY_LOG", DEFAULT_PATH),
+                           help="Query log (rotated backups are read too)")
+    analytics.add_argument("--top", type=int, default=10, help="Number of top queries to list")
+    analytics.add_argument("--json", action="store_true")
+    analytics.set_defaults(func=cmd_analytics)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the verigpt command"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
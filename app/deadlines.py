@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Deadlines - Per-request latency budgets split across /agent stages
+
+A request's timeout_ms starts counting when the request arrives, so queue
+time for admission is part of it. Retrieval stages get a share of what is
+left; the LLM gets the rest minus a margin for building the response. When
+the LLM cannot finish in time the endpoint answers with the retrieved
+sources only (degraded) instead of an error.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Optional
+
+# Share of the remaining budget each retrieval stage may use
+STAGE_SHARES = {"embed": 0.3, "search": 0.2}
+# Kept back for building and sending the response
+RESPONSE_MARGIN_SECONDS = 0.05
+# Below this, calling the LLM is pointless and the answer degrades immediately
+MIN_LLM_SECONDS = 0.25
+
+
+class DeadlineExceeded(Exception):
+    """A stage ran out of its share of the request budget"""
+
+    def __init__(self, stage: str, budget: float):
+        super().__init__(f"{stage} did not finish within its {budget * 1000:.0f} ms budget")
+        self.stage = stage
+        self.budget = budget
+
+
+class Deadline:
+    """Absolute deadline of one request (no limit when timeout is None)"""
+
+    def __init__(self, timeout_seconds: Optional[float] = None):
+        self.started = time.perf_counter()
+        self.timeout = timeout_seconds
+        self.at = self.started + timeout_seconds if timeout_seconds is not None else None
+
+    @classmethod
+    def from_ms(cls, timeout_ms: Optional[float]) -> "Deadline":
+        return cls(timeout_ms / 1000 if timeout_ms and timeout_ms > 0 else None)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a deadline"""
+        return max(0.0, self.at - time.perf_counter()) if self.at is not None else None
+
+    def stage_budget(self, stage: str) -> Optional[float]:
+        """Seconds the named stage may take; the LLM stage gets everything but the margin"""
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+        if stage in STAGE_SHARES:
+            return remaining * STAGE_SHARES[stage]
+        return max(0.0, remaining - RESPONSE_MARGIN_SECONDS)
+
+    async def run(self, stage: str, awaitable: Awaitable[Any]) -> Any:
+        """Await a stage within its budget; raises DeadlineExceeded when it runs out"""
+        budget = self.stage_budget(stage)
+        if budget is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, timeout=budget)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(stage, budget)
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Embedding Backends - Pluggable document/query embedders for the FAISS index
+
+Backends implement LangChain's Embeddings interface, so they plug into FAISS
+directly, and describe themselves with an identity that index builders
+record in manifest.json. Loaders compare that identity with the configured
+backend and refuse indexes built with a different one, since their vectors
+would not be comparable.
+
+    openai  OpenAI embeddings API through the shared client (default)
+    local   CPU-only signed feature hashing of SystemVerilog tokens, identifier
+            parts and character n-grams; no network and no model files
+
+The backend is chosen with VERIGPT_EMBEDDING_BACKEND (openai or local).
+"""
+
+import functools
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+BACKENDS = ["openai", "local"]
+DEFAULT_BACKEND = "openai"
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
+DEFAULT_LOCAL_DIM = 1024
+LOCAL_VERSION = 1
+# Distinct tokens whose feature hashes the local backend keeps (least recently used are dropped)
+DEFAULT_FEATURE_CACHE_SIZE = 65536
+
+# Inputs per embeddings request (1000-character chunks stay far below the per-request token limit)
+OPENAI_BATCH_SIZE = 512
+# Queries are truncated well below the embedding model's 8191-token limit
+MAX_QUERY_CHARS = 24000
+
+# SystemVerilog-aware tokens: identifiers (incl. $system tasks and `macros) and numbers
+SV_TOKEN_RE = re.compile(r"[`$]?[A-Za-z_][A-Za-z0-9_$]*|\d+")
+# Identifier parts: snake_case pieces and camelCase humps
+SUBTOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+# Very common SystemVerilog keywords carry almost no retrieval signal
+STOP_TOKENS = frozenset(
+    "logic input output inout wire reg begin end if else assign always always_ff always_comb "
+    "posedge negedge int bit module endmodule parameter localparam generate endgenerate for "
+    "the a an of to and or in is".split()
+)
+
+
+class EmbeddingMismatchError(ValueError):
+    """Raised when an index was built with a different embedding backend than the configured one"""
+
+
+class EmbeddingBackend(Embeddings):
+    """Common interface: LangChain embeddings plus an identity for index manifests"""
+
+    backend = ""
+
+    @property
+    def name(self) -> str:
+        """Short id stored as the manifest's embedding_model"""
+        raise NotImplementedError
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Vector dimension, when known without calling the backend"""
+        return None
+
+    def identity(self) -> Dict[str, Any]:
+        """Everything that must match between index build and query time"""
+        return {"backend": self.backend, "name": self.name, "dim": self.dim}
+
+    def stats(self) -> Dict[str, int]:
+        """Usage counters (remote calls and tokens)"""
+        return {}
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAI embeddings via the shared pooled client (batched, no client-side tokenization)"""
+
+    backend = "openai"
+
+    def __init__(self, model: str = DEFAULT_OPENAI_MODEL, batch_size: int = OPENAI_BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self.calls = 0
+        self.tokens = 0
+
+    @property
+    def name(self) -> str:
+        # The bare model name keeps manifests written before backends existed valid
+        return self.model
+
+    def _create(self, texts: List[str]) -> List[List[float]]:
+        from .llm_client import get_openai_client
+
+        response = get_openai_client().embeddings.create(model=self.model, input=texts)
+        self.calls += 1
+        self.tokens += response.usage.prompt_tokens if response.usage else 0
+        return [item.embedding for item in response.data]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._create(texts[start:start + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._create([text[:MAX_QUERY_CHARS]])[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "tokens": self.tokens}
+
+
+class LocalHashedEmbeddingBackend(EmbeddingBackend):
+    """Local CPU embedder: signed feature hashing with sublinear term frequencies
+
+    Features per token are the token itself, its identifier parts (so
+    "logic_axi4_lite_queue" also matches "axi4" and "queue") and its
+    character trigrams (so "synchronizer" is close to "synchronizers").
+    Feature hashes of recently seen tokens are memoized in a bounded LRU; the
+    per-text work is a NumPy bincount.
+    """
+
+    backend = "local"
+    # Relative weights of the three feature groups (tuned with python -m app.bench_retrieval --embedder local)
+    WEIGHTS = {"token": 1.0, "part": 0.3, "ngram": 0.8}
+
+    def __init__(self, dim: int = DEFAULT_LOCAL_DIM, ngram: int = 3,
+                 feature_cache_size: int = DEFAULT_FEATURE_CACHE_SIZE):
+        self._dim = dim
+        self.ngram = ngram
+        self._token_features = functools.lru_cache(maxsize=feature_cache_size)(self._compute_token_features)
+
+    @property
+    def name(self) -> str:
+        return f"local-hashed-v{LOCAL_VERSION}-{self._dim}"
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def _hash(self, feature: str) -> Tuple[int, float]:
+        value = zlib.crc32(feature.encode("utf-8"))
+        return value % self._dim, 1.0 if (value >> 31) & 1 else -1.0
+
+    def _compute_token_features(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Bucket indices and signed weights contributed by one token (memoized as _token_features)"""
+        lowered = token.lower()
+        features = [("t:" + lowered, self.WEIGHTS["token"])]
+        parts = [part.lower() for part in SUBTOKEN_RE.findall(token.lstrip("`$"))]
+        if len(parts) > 1:
+            features.extend(("p:" + part, self.WEIGHTS["part"]) for part in parts if part not in STOP_TOKENS)
+        padded = f"<{lowered}>"
+        features.extend(
+            ("g:" + padded[i:i + self.ngram], self.WEIGHTS["ngram"]) for i in range(len(padded) - self.ngram + 1)
+        )
+        buckets = np.empty(len(features), dtype=np.int64)
+        weights = np.empty(len(features), dtype=np.float32)
+        for i, (feature, weight) in enumerate(features):
+            bucket, sign = self._hash(feature)
+            buckets[i] = bucket
+            weights[i] = sign * weight
+        return buckets, weights
+
+    def _embed(self, text: str) -> np.ndarray:
+        counts: Dict[str, int] = {}
+        for token in SV_TOKEN_RE.findall(text):
+            if token.lower() not in STOP_TOKENS:
+                counts[token] = counts.get(token, 0) + 1
+        if not counts:
+            # A unit vector rather than zeros: under L2 distance a zero vector would sit
+            # at distance 1 from every query and outrank most real matches
+            vector = np.zeros(self._dim, dtype=np.float32)
+            bucket, sign = self._hash("empty")
+            vector[bucket] = sign
+            return vector
+        bucket_parts, weight_parts = [], []
+        for token, count in counts.items():
+            buckets, weights = self._token_features(token)
+            bucket_parts.append(buckets)
+            weight_parts.append(weights * (1.0 + np.log(count)))
+        vector = np.bincount(
+            np.concatenate(bucket_parts), weights=np.concatenate(weight_parts), minlength=self._dim
+        ).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embeddings as a (len(texts), dim) float32 array"""
+        return np.stack([self._embed(text) for text in texts]) if texts else np.zeros((0, self._dim), np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+def get_backend(backend: Optional[str] = None, **options: Any) -> EmbeddingBackend:
+    """Embedding backend by name, defaulting to VERIGPT_EMBEDDING_BACKEND"""
+    backend = backend or os.getenv("VERIGPT_EMBEDDING_BACKEND", DEFAULT_BACKEND)
+    if backend == "openai":
+        return OpenAIEmbeddingBackend(
+            model=options.get("model") or os.getenv("VERIGPT_EMBEDDING_MODEL", DEFAULT_OPENAI_MODEL)
+        )
+    if backend == "local":
+        return LocalHashedEmbeddingBackend(
+            dim=int(options.get("dim") or os.getenv("VERIGPT_LOCAL_EMBEDDING_DIM", DEFAULT_LOCAL_DIM))
+        )
+    raise ValueError(f"Unknown embedding backend '{backend}'. Available: {', '.join(BACKENDS)}")
+
+
+def manifest_identity(manifest: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Embedding identity recorded in a manifest; indexes without one were built with OpenAI"""
+    if manifest and manifest.get("embedding"):
+        return manifest["embedding"]
+    model = (manifest or {}).get("embedding_model") or DEFAULT_OPENAI_MODEL
+    return {"backend": "openai", "name": model, "dim": None}
+
+
+def check_compatible(backend: EmbeddingBackend, manifest: Optional[Dict[str, Any]],
+                     index_dim: Optional[int] = None) -> None:
+    """Raise EmbeddingMismatchError unless the backend can query an index with this manifest"""
+    recorded = manifest_identity(manifest)
+    if (recorded.get("backend"), recorded.get("name")) != (backend.backend, backend.name):
+        raise EmbeddingMismatchError(
+            f"index was built with {recorded.get('backend')} embeddings ({recorded.get('name')}), "
+            f"but the configured query embedder is {backend.backend} ({backend.name})"
+        )
+    if index_dim is not None and backend.dim is not None and index_dim != backend.dim:
+        raise EmbeddingMismatchError(f"index dimension {index_dim} does not match embedder dimension {backend.dim}")
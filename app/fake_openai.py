@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI Server - Local stand-in for the chat completions and embeddings APIs
+
+Used to exercise the client layer and the service offline. Latency, token
+rate and error injection are configurable at start-up or at runtime through
+POST /_config. Embeddings are deterministic hashed bag-of-words vectors, so
+similar texts get similar vectors.
+
+Run standalone:
+    python -m app.fake_openai --port 8100 --latency-ms 200 --error-rate 0.05
+then point the service at it with OPENAI_BASE_URL=http://localhost:8100/v1
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*|\d+")
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "latency_ms": 0.0,            # fixed latency added to every request
+    "jitter_ms": 0.0,             # uniform random latency added on top
+    "tokens_per_second": 0.0,     # completion generation speed (0 = instant)
+    "completion_tokens": 64,      # length of every fake completion
+    "embedding_dim": 1536,
+    "error_rate": 0.0,            # probability of answering with error_status
+    "error_status": 500,
+    "fail_next": 0,               # answer the next N requests with error_status
+    "hang_next": 0,               # stall the next N requests for hang_seconds, then drop them
+    "hang_seconds": 60.0,
+}
+
+
+def fake_embedding(text: str, dim: int = 1536) -> List[float]:
+    """Deterministic unit vector from hashed word tokens"""
+    vector = [0.0] * dim
+    for token in TOKEN_RE.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class FakeOpenAIState:
+    """Configuration and request counters shared by all handler threads"""
+
+    def __init__(self, **config: Any):
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.counts: Dict[str, int] = {"chat": 0, "embeddings": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+    def next_failure(self) -> Optional[str]:
+        """Decide whether the current request fails: None, "error" or "hang" """
+        with self.lock:
+            if self.config["hang_next"] > 0:
+                self.config["hang_next"] -= 1
+                return "hang"
+            if self.config["fail_next"] > 0:
+                self.config["fail_next"] -= 1
+                self.counts["errors"] += 1
+                return "error"
+            if random.random() < self.config["error_rate"]:
+                self.counts["errors"] += 1
+                return "error"
+        return None
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler for the fake API"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY every
+    # response would pay the ~40 ms Nagle/delayed-ACK penalty
+    disable_nagle_algorithm = True
+    state: FakeOpenAIState = None
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep test and benchmark output quiet"""
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self) -> None:
+        if self.path == "/_stats":
+            self._send_json(200, {"counts": self.state.counts, "config": self.state.config})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self) -> None:
+        body = self._read_json()
+        config = self.state.config
+
+        if self.path == "/_config":
+            with self.state.lock:
+                config.update(body)
+            self._send_json(200, {"config": config})
+            return
+
+        if self.path.endswith("/chat/completions"):
+            operation = "chat"
+        elif self.path.endswith("/embeddings"):
+            operation = "embeddings"
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        with self.state.lock:
+            self.state.counts[operation] += 1
+
+        time.sleep((config["latency_ms"] + random.uniform(0, config["jitter_ms"])) / 1000.0)
+
+        failure = self.state.next_failure()
+        if failure == "hang":
+            time.sleep(config["hang_seconds"])
+            self.close_connection = True
+            return
+        if failure == "error":
+            status = int(config["error_status"])
+            headers = {"Retry-After": "1"} if status == 429 else None
+            self._send_json(status, {"error": {"message": "injected failure", "type": "server_error"}}, headers)
+            return
+
+        if operation == "chat":
+            self._send_json(200, self._chat(body))
+        else:
+            self._send_json(200, self._embeddings(body))
+
+    def _chat(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Fake chat completion; generation time follows tokens_per_second"""
+        config = self.state.config
+        messages = body.get("messages", [])
+        prompt_tokens = sum(count_tokens(str(message.get("content", ""))) for message in messages)
+        completion_tokens = int(config["completion_tokens"])
+        if config["tokens_per_second"] > 0:
+            time.sleep(completion_tokens / config["tokens_per_second"])
+
+        question = str(messages[-1].get("content", "")) if messages else ""
+        words = ["fake"] * max(0, completion_tokens - 8)
+        content = f"Fake answer for: {question[-80:]!r} " + " ".join(words)
+        return {
+            "id": f"chatcmpl-fake-{random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+                "logprobs": None
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _embeddings(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Fake embeddings for a string, a list of strings or token-id lists"""
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        texts = [" ".join(map(str, item)) if isinstance(item, list) else str(item) for item in inputs]
+        dim = int(body.get("dimensions") or self.state.config["embedding_dim"])
+        tokens = sum(count_tokens(text) for text in texts)
+        vectors = [fake_embedding(text, dim) for text in texts]
+        if body.get("encoding_format") == "base64":
+            # The OpenAI SDK requests base64-encoded float32 arrays by default
+            vectors = [base64.b64encode(struct.pack(f"<{dim}f", *vector)).decode("ascii") for vector in vectors]
+        return {
+            "object": "list",
+            "model": body.get("model", "fake"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": vector}
+                for i, vector in enumerate(vectors)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+
+class FakeOpenAIServer:
+    """Threaded fake server that can be started and stopped in-process"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **config: Any):
+        self.state = FakeOpenAIState(**config)
+        handler = type("BoundFakeOpenAIHandler", (FakeOpenAIHandler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI-compatible base URL, e.g. http://127.0.0.1:8100/v1"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def configure(self, **config: Any) -> None:
+        """Change latency or error injection at runtime"""
+        with self.state.lock:
+            self.state.config.update(config)
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main() -> int:
+    """Run the fake server in the foreground"""
+    parser = argparse.ArgumentParser(description="Local fake OpenAI chat/embeddings server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        args.host, args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second, completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate, error_status=args.error_status
+    )
+    print(f"🧪 Fake OpenAI server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Index Registry - Several named corpora and indexes served by one process
+
+Each entry pairs a corpus directory (served by /files and /stats) with its
+FAISS index (searched by /agent). Entries come from the JSON file named by
+VERIGPT_INDEXES:
+
+    {
+      "default": "logic",
+      "indexes": {
+        "logic": {"data_dir": "data/raw_full", "index_dir": "data/faiss_index"},
+        "uart":  {"data_dir": "data/uart", "index_dir": "data/uart_index", "embedding_backend": "local"}
+      }
+    }
+
+Without it there is a single entry, "default", using VERIGPT_INDEX_DIR and
+VERIGPT_DATA_DIR. Indexes are loaded on first use. When the loaded ones
+exceed VERIGPT_INDEX_MEMORY_BUDGET_MB, the least recently used are unloaded
+and loaded again lazily by the next request that needs them.
+"""
+
+import functools
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+from .catalog import FileCatalog
+from .index_store import IndexStore
+
+DEFAULT_NAME = "default"
+DEFAULT_DATA_DIR = "data/raw_full"
+DEFAULT_INDEX_DIR = "data/faiss_index"
+
+
+class UnknownIndexError(KeyError):
+    """The request named an index that is not configured"""
+
+    def __init__(self, name: str, available: List[str]):
+        super().__init__(name)
+        self.name = name
+        self.available = available
+
+    def __str__(self) -> str:
+        return f"Unknown index '{self.name}'. Available: {', '.join(self.available)}"
+
+
+class IndexEntry:
+    """One named corpus with its file catalog and index store"""
+
+    def __init__(self, name: str, data_dir: str = DEFAULT_DATA_DIR, index_dir: str = DEFAULT_INDEX_DIR,
+                 embedding_backend: Optional[str] = None):
+        self.name = name
+        self.catalog = FileCatalog(data_dir)
+        self.store = IndexStore(index_dir, embedding_backend=embedding_backend)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "data_dir": self.catalog.root.as_posix(),
+            "index_dir": self.store.index_dir.as_posix(),
+            "state": self.store.state,
+            "memory_bytes": self.store.memory_bytes(),
+            "last_used": self.store.last_used,
+            "unloads": self.store.unloads
+        }
+
+
+class IndexRegistry:
+    """Named index entries, loaded lazily and kept within a memory budget (LRU)"""
+
+    def __init__(self, entries: List[IndexEntry], default: Optional[str] = None,
+                 memory_budget_bytes: Optional[int] = None):
+        if not entries:
+            raise ValueError("At least one index must be configured")
+        self.entries: Dict[str, IndexEntry] = {entry.name: entry for entry in entries}
+        self.default_name = default or entries[0].name
+        if self.default_name not in self.entries:
+            raise ValueError(f"Default index '{self.default_name}' is not configured")
+        self.memory_budget_bytes = memory_budget_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        for entry in entries:
+            entry.store.loader = functools.partial(self.load, entry.name)
+        metrics.INDEX_RESIDENT_BYTES.set_function(self.resident_bytes)
+        metrics.INDEXES_LOADED.set_function(lambda: sum(1 for e in self.entries.values() if e.store.loaded))
+
+    @classmethod
+    def from_env(cls) -> "IndexRegistry":
+        """Entries from the VERIGPT_INDEXES file, budget from VERIGPT_INDEX_MEMORY_BUDGET_MB (0 = unlimited)"""
+        budget_mb = float(os.getenv("VERIGPT_INDEX_MEMORY_BUDGET_MB", "0"))
+        budget = int(budget_mb * 1024 * 1024) if budget_mb > 0 else None
+        config_path = os.getenv("VERIGPT_INDEXES")
+        if not config_path:
+            entry = IndexEntry(DEFAULT_NAME, os.getenv("VERIGPT_DATA_DIR", DEFAULT_DATA_DIR),
+                               os.getenv("VERIGPT_INDEX_DIR", DEFAULT_INDEX_DIR))
+            return cls([entry], memory_budget_bytes=budget)
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        entries = [IndexEntry(name, **options) for name, options in config["indexes"].items()]
+        return cls(entries, default=config.get("default"), memory_budget_bytes=budget)
+
+    @property
+    def default(self) -> IndexEntry:
+        return self.entries[self.default_name]
+
+    def names(self) -> List[str]:
+        return list(self.entries)
+
+    def get(self, name: Optional[str] = None) -> IndexEntry:
+        """Entry by name (the default one for None); raises UnknownIndexError"""
+        entry = self.entries.get(name or self.default_name)
+        if entry is None:
+            raise UnknownIndexError(name, self.names())
+        return entry
+
+    def resident_bytes(self) -> int:
+        return sum(entry.store.memory_bytes() for entry in self.entries.values())
+
+    def load(self, name: Optional[str] = None) -> IndexEntry:
+        """Make sure an entry's index is loaded, then evict others if over budget (blocking)"""
+        entry = self.get(name)
+        if entry.store.state == "pending":
+            entry.store.load()
+            self.enforce_budget(keep=entry.name)
+        return entry
+
+    def enforce_budget(self, keep: Optional[str] = None) -> List[str]:
+        """Unload least recently used indexes until the loaded ones fit the budget
+
+        The entry named by keep is never unloaded, even when it alone is over budget.
+        """
+        if self.memory_budget_bytes is None:
+            return []
+        evicted = []
+        with self._lock:
+            while self.resident_bytes() > self.memory_budget_bytes:
+                candidates = [entry for entry in self.entries.values()
+                              if entry.name != keep and entry.store.loaded]
+                if not candidates:
+                    break
+                victim = min(candidates, key=lambda entry: entry.store.last_used or 0.0)
+                released = victim.store.unload()
+                self.evictions += 1
+                metrics.INDEX_EVICTIONS.inc()
+                evicted.append(victim.name)
+                print(f"♻️  Unloaded index '{victim.name}' ({released / 1e6:.1f} MB) to stay within the memory budget")
+        return evicted
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "default": self.default_name,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "resident_bytes": self.resident_bytes(),
+            "evictions": self.evictions,
+            "indexes": [entry.to_dict() for entry in self.entries.values()]
+        }
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Index Store - Lazy, load-once access to the persisted FAISS index
+
+The active index can be replaced at runtime with reload(): the new version is
+loaded and validated in the background and swapped in atomically. Requests
+that acquired the previous version keep using it until they finish; its memory
+is released when the last of them lets go.
+
+Queries are embedded with the configured embedding backend (app.embeddings);
+an index whose manifest records a different embedder is refused.
+
+When the index directory has a per-file summary index (summaries/, see
+app.summaries), each version also carries a HierarchicalSearch over it.
+
+unload() drops the active version (readers keep it until they finish) and
+lets the next request load it again; app.index_registry uses it to keep
+several indexes within a memory budget.
+
+delete() tombstones chunks (by docstore id or source file) so searches skip
+them at once; when the dead share reaches VERIGPT_COMPACTION_THRESHOLD a
+background compaction writes a compacted version under versions/, switches
+the directory's CURRENT pointer to it atomically (app.manifest) and
+hot-reloads the result.
+
+Query embeddings are kept in an LRU (VERIGPT_QUERY_EMBEDDING_CACHE_SIZE), so
+repeated questions skip the embedding call.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .cache import ResultCache, make_key
+from .manifest import (MANIFEST_FILE, VERSIONS_DIR, read_manifest, resolve_index_dir, switch_index_version,
+                       update_manifest)
+
+DEFAULT_INDEX_DIR = "data/faiss_index"
+INDEX_FILES = ["index.faiss", "index.pkl"]
+# Dead share of the vectors that triggers a background compaction
+DEFAULT_COMPACTION_THRESHOLD = 0.2
+
+
+def index_fingerprint(index_dir: Path) -> Optional[str]:
+    """Short version id derived from the size and mtime of the index files"""
+    parts = []
+    for name in INDEX_FILES:
+        path = index_dir / name
+        if path.exists():
+            stat = path.stat()
+            parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    if not parts:
+        return None
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def index_built_at(index_dir: Path) -> Optional[str]:
+    """Build time of an index directory, taken from its newest index file"""
+    mtimes = [(index_dir / name).stat().st_mtime for name in INDEX_FILES if (index_dir / name).exists()]
+    if not mtimes:
+        return None
+    return datetime.fromtimestamp(max(mtimes), tz=timezone.utc).isoformat()
+
+
+def vectorstore_bytes(vectorstore) -> int:
+    """Approximate resident size of a FAISS vectorstore: float32 vectors plus stored chunk text"""
+    if vectorstore is None:
+        return 0
+    index = vectorstore.index
+    text = sum(len(doc.page_content) + 200 for doc in vectorstore.docstore._dict.values())
+    return index.ntotal * index.d * 4 + text
+
+
+class IndexVersion:
+    """One loaded generation of the index, reference-counted by its readers"""
+
+    def __init__(self, vectorstore, path: Path, version: Optional[str], built_at: Optional[str],
+                 manifest: Optional[Dict[str, Any]] = None, files_dir: Optional[Path] = None):
+        """path is the index directory, files_dir where the files were read (a compacted version)"""
+        self.vectorstore = vectorstore
+        self.path = path
+        self.files_dir = files_dir or path
+        self.version = version
+        self.built_at = built_at
+        self.manifest = manifest
+        self.hierarchy = None
+        self.tombstones = None
+        self.memory_bytes = vectorstore_bytes(vectorstore)
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.readers = 0
+        self.retired = False
+
+    def release(self) -> None:
+        """Drop the vectorstore so its memory can be reclaimed"""
+        self.vectorstore = None
+        self.hierarchy = None
+        self.tombstones = None
+
+    def search(self, embedding: List[float], k: int) -> List[Any]:
+        """Top-k (document, distance) pairs from all live chunks"""
+        return self.tombstones.search(embedding, k)
+
+    def search_files(self, embedding: List[float], k: int, files: int) -> Any:
+        """Top-k live chunks of the best matching files (summary index) and those files"""
+        self.tombstones.sync()
+        docs, candidates = self.hierarchy.search(embedding, k, files, exclude=self.tombstones.dead)
+        if docs is None:
+            docs = [doc for doc, _ in self.search(embedding, k)]
+        return docs, candidates
+
+    def info(self) -> Dict[str, Any]:
+        """Describe this version for status endpoints"""
+        vectorstore, tombstones = self.vectorstore, self.tombstones
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "loaded_at": self.loaded_at,
+            "index_path": str(self.path),
+            "files_path": str(self.files_dir),
+            "vectors": vectorstore.index.ntotal if vectorstore is not None else None,
+            "readers": self.readers,
+            "memory_bytes": self.memory_bytes,
+            "embedding_model": (self.manifest or {}).get("embedding_model"),
+            "embedding": (self.manifest or {}).get("embedding"),
+            "corpus_hash": (self.manifest or {}).get("corpus_hash"),
+            "summaries": (self.manifest or {}).get("summaries") if self.hierarchy is not None else None,
+            "tombstones": {"dead": len(tombstones.dead), "ratio": round(tombstones.ratio(), 4)}
+            if tombstones is not None else None
+        }
+
+
+class IndexStore:
+    """Owns the FAISS vectorstore and loads it from disk at most once"""
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR, embedding_backend: Optional[str] = None,
+                 compaction_threshold: Optional[float] = None, query_cache_size: Optional[int] = None):
+        """Initialize without touching the disk; nothing is loaded until load() is called
+
+        embedding_backend defaults to VERIGPT_EMBEDDING_BACKEND (see app.embeddings),
+        compaction_threshold to VERIGPT_COMPACTION_THRESHOLD and query_cache_size
+        to VERIGPT_QUERY_EMBEDDING_CACHE_SIZE (0 disables the cache).
+        """
+        self.index_dir = Path(index_dir)
+        self.embedding_backend = embedding_backend
+        self._embedder = None
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.last_used: Optional[float] = None
+        self.unloads = 0
+        self.compaction_threshold = compaction_threshold if compaction_threshold is not None else \
+            float(os.getenv("VERIGPT_COMPACTION_THRESHOLD", DEFAULT_COMPACTION_THRESHOLD))
+        self.compaction: Dict[str, Any] = {"state": "idle", "last_at": None, "removed": None, "error": None}
+        self._compact_lock = threading.Lock()
+        # Shared by every version loaded from the same directory (see app.tombstones)
+        self._tombstones = None
+        if query_cache_size is None:
+            query_cache_size = int(os.getenv("VERIGPT_QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+        self.query_cache = ResultCache(max_entries=query_cache_size) if query_cache_size > 0 else None
+        self.reload_state = "idle"
+        self.reload_error: Optional[str] = None
+        self._active: Optional[IndexVersion] = None
+        self._retired: list = []
+        # _lock guards the active version and is only held for quick swaps; loads have their own lock
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        # Set by IndexRegistry so on-demand loads also enforce its memory budget
+        self.loader: Optional[Callable[[], Any]] = None
+
+    @property
+    def embedder(self):
+        """The query embedding backend (heavy imports are deferred until first use)"""
+        if self._embedder is None:
+            from .embeddings import get_backend
+
+            self._embedder = get_backend(self.embedding_backend)
+        return self._embedder
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query with the configured backend (one direct API call for OpenAI)"""
+        return self.embed_query_cached(text)[0]
+
+    def embed_query_cached(self, text: str, count: bool = True) -> Tuple[List[float], bool]:
+        """Query embedding and whether it came from the query cache (count=False: not in its hit ratio)"""
+        if self.query_cache is None:
+            return self.embedder.embed_query(text), False
+        key = make_key(text)
+        cached = self.query_cache.get(key, count=count)
+        if cached is not None:
+            return cached["embedding"], True
+        embedding = self.embedder.embed_query(text)
+        self.query_cache.set(key, {"embedding": embedding})
+        return embedding, False
+
+    def _load_version(self, index_dir: Path) -> IndexVersion:
+        """Load an index directory from disk into a new, not yet active version"""
+        from langchain_community.vectorstores import FAISS
+
+        from .embeddings import check_compatible
+
+        files_dir = resolve_index_dir(str(index_dir))
+        manifest = read_manifest(str(files_dir))
+        # Refuse before reading the vectors: queries from another embedder would return noise
+        check_compatible(self.embedder, manifest)
+        vectorstore = FAISS.load_local(
+            str(files_dir),
+            self.embedder,
+            allow_dangerous_deserialization=True
+        )
+        check_compatible(self.embedder, manifest, vectorstore.index.d)
+        built_at = manifest["built_at"] if manifest and manifest.get("built_at") else index_built_at(files_dir)
+        version = IndexVersion(vectorstore, index_dir, index_fingerprint(files_dir), built_at, manifest, files_dir)
+        from .summaries import SUMMARY_DIR, HierarchicalSearch
+        from .tombstones import Tombstones, TombstoneFilter
+
+        with self._lock:
+            if self._tombstones is None or self._tombstones.path.parent != index_dir:
+                self._tombstones = Tombstones(index_dir)
+            tombstones = self._tombstones
+        version.tombstones = TombstoneFilter(vectorstore, tombstones)
+
+        summary_dir = files_dir / SUMMARY_DIR
+        if (summary_dir / "index.faiss").exists():
+
+            summary_store = FAISS.load_local(str(summary_dir), self.embedder, allow_dangerous_deserialization=True)
+            if summary_store.index.d == vectorstore.index.d:
+                version.hierarchy = HierarchicalSearch(vectorstore, summary_store)
+                version.memory_bytes += vectorstore_bytes(summary_store)
+            else:
+                print(f"⚠️  Ignoring summary index with dimension {summary_store.index.d} in {index_dir}")
+        return version
+
+    def _validate(self, candidate: IndexVersion) -> None:
+        """Reject indexes that are empty, inconsistent or incompatible with the active one"""
+        vectorstore = candidate.vectorstore
+        total = vectorstore.index.ntotal
+        if total == 0:
+            raise ValueError("index contains no vectors")
+        if total != len(vectorstore.index_to_docstore_id):
+            raise ValueError(f"index has {total} vectors but {len(vectorstore.index_to_docstore_id)} docstore ids")
+        missing = [doc_id for doc_id in vectorstore.index_to_docstore_id.values()
+                   if doc_id not in vectorstore.docstore._dict]
+        if missing:
+            raise ValueError(f"{len(missing)} docstore entries are missing")
+        active = self._active
+        if active is not None and active.vectorstore is not None and active.vectorstore.index.d != vectorstore.index.d:
+            raise ValueError(f"dimension {vectorstore.index.d} does not match active index dimension {active.vectorstore.index.d}")
+
+    def load(self):
+        """Load the index once; concurrent callers wait for the same load
+
+        Only the final swap takes _lock, so status() and pinned readers never wait for the disk.
+        """
+        with self._load_lock:
+            if self.state != "pending":
+                active = self._active
+                return active.vectorstore if active else None
+
+            if not self.index_dir.exists():
+                self.state = "missing"
+                print(f"⚠️  FAISS index not found at {self.index_dir}")
+                print("   Run the agent first to create the index")
+                return None
+
+            self.state = "loading"
+            started = time.perf_counter()
+            try:
+                version = self._load_version(self.index_dir)
+                with self._lock:
+                    self._active = version
+                    self.state = "ready"
+                    self.last_used = time.time()
+                print("✅ FAISS index loaded successfully")
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                print(f"⚠️  Could not load FAISS index: {e}")
+            finally:
+                self.load_seconds = round(time.perf_counter() - started, 3)
+
+            active = self._active
+            return active.vectorstore if active else None
+
+    def get(self):
+        """Return the active vectorstore, loading it on first use"""
+        if self.state == "ready":
+            return self._active.vectorstore
+        self._load_on_demand()
+        active = self._active
+        return active.vectorstore if active else None
+
+    def _load_on_demand(self) -> None:
+        """Load through the installed loader (the registry), or directly for a standalone store"""
+        if self.loader is not None:
+            self.loader()
+        else:
+            self.load()
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """Pin the active version for the duration of a request
+
+        Yields the vectorstore (or None when no index is available). A reload
+        that happens meanwhile does not affect the pinned version.
+        """
+        with self.acquire_version() as version:
+            yield version.vectorstore if version is not None else None
+
+    @contextmanager
+    def acquire_version(self) -> Iterator[Optional[IndexVersion]]:
+        """Like acquire(), but yields the pinned IndexVersion (vectorstore and summary search)"""
+        version = self.pin()
+        try:
+            yield version
+        finally:
+            self.unpin(version)
+
+    def pin(self) -> Optional[IndexVersion]:
+        """Pin the active version, loading it on first use (may block: call it off the event loop)"""
+        while True:
+            if self.state == "pending":
+                self._load_on_demand()
+            with self._lock:
+                # Unloaded again (budget eviction) between the load and here: load it once more
+                if self.state == "pending":
+                    continue
+                version = self._active
+                if version is not None:
+                    version.readers += 1
+                self.last_used = time.time()
+            return version
+
+    def unpin(self, version: Optional[IndexVersion]) -> None:
+        """Let go of a pinned version; a retired one is released by its last reader"""
+        if version is None:
+            return
+        with self._lock:
+            version.readers -= 1
+            if version.retired and version.readers == 0:
+                self._release(version)
+
+    def _release(self, version: IndexVersion) -> None:
+        """Free a retired version once nobody reads it (caller holds the lock)"""
+        version.release()
+        if version in self._retired:
+            self._retired.remove(version)
+        print(f"♻️  Released FAISS index version {version.version}")
+
+    def unload(self) -> int:
+        """Drop the active version so the next acquire() loads it again; returns the bytes released
+
+        Requests that pinned the version keep using it until they finish.
+        """
+        with self._lock:
+            version = self._active
+            if self.state != "ready" or version is None:
+                return 0
+            self._active = None
+            self.state = "pending"
+            self.unloads += 1
+            version.retired = True
+            if version.readers == 0:
+                version.release()
+            else:
+                self._retired.append(version)
+            return version.memory_bytes
+
+    def delete(self, ids: Optional[List[str]] = None, sources: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Tombstone chunks by docstore id and/or source path; searches skip them immediately
+
+        Starts a background compaction once the dead share reaches the threshold.
+        Raises RuntimeError when no index is loaded.
+        """
+        with self.acquire_version() as version:
+            if version is None:
+                raise RuntimeError(self.error or f"no index loaded from {self.index_dir}")
+            doc_ids = list(ids or [])
+            if sources:
+                doc_ids += version.tombstones.ids_for_sources(set(sources))
+            deleted = version.tombstones.delete(doc_ids)
+            dead, ratio = len(version.tombstones.dead), version.tombstones.ratio()
+        compacting = ratio >= self.compaction_threshold and self.compact_in_background()
+        return {"deleted": deleted, "dead": dead, "ratio": round(ratio, 4), "compacting": compacting}
+
+    def missing_sources(self, data_dir: Optional[str] = None) -> List[str]:
+        """Sources of live chunks whose files no longer exist (as stored, or under data_dir)"""
+        with self.acquire_version() as version:
+            if version is None:
+                return []
+            dead = set(version.tombstones.dead.tolist())
+            ids = version.vectorstore.index_to_docstore_id
+            sources = {version.vectorstore.docstore.search(ids[position]).metadata.get("source")
+                       for position in ids if position not in dead}
+        root = Path(data_dir) if data_dir else None
+        return sorted(source for source in sources if source and not Path(source).exists()
+                      and not (root is not None and (root / source).exists()))
+
+    def compact(self) -> bool:
+        """Write a version of the index without tombstoned chunks, switch to it and hot-reload it
+
+        The compacted chunk index, its manifest and the summary index (minus
+        files without chunks left) are written to versions/<stamp>, then the
+        CURRENT pointer is replaced in one atomic rename: readers of the
+        directory see the old or the new version, never a mix of their files.
+        Deletes made meanwhile stay tombstoned; ids compacted away are dropped
+        from the tombstones. Queries keep using the pinned version. Returns
+        False when there is nothing to compact or another compaction is running.
+        """
+        if not self._compact_lock.acquire(blocking=False):
+            return False
+        try:
+            from .summaries import SUMMARY_DIR
+            from .tombstones import compact_vectorstore, prune_summaries
+
+            self.compaction.update(state="running", error=None)
+            started = time.perf_counter()
+            with self.acquire_version() as version:
+                if version is not None:
+                    version.tombstones.sync()
+                if version is None or not len(version.tombstones.dead):
+                    self.compaction["state"] = "idle"
+                    return False
+                index_dir, previous, store = version.path, version.files_dir, version.tombstones.store
+                compacted = compact_vectorstore(version.vectorstore, store.snapshot())
+                summaries = prune_summaries(version.hierarchy.summary_store, compacted) \
+                    if version.hierarchy is not None else None
+                removed = version.vectorstore.index.ntotal - compacted.index.ntotal
+
+            name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+            versions = index_dir / VERSIONS_DIR
+            tmp_dir = versions / f".{name}"
+            compacted.save_local(str(tmp_dir))
+            if summaries is not None:
+                summaries.save_local(str(tmp_dir / SUMMARY_DIR))
+            if (previous / MANIFEST_FILE).exists():
+                shutil.copy2(previous / MANIFEST_FILE, tmp_dir / MANIFEST_FILE)
+                manifest = read_manifest(str(tmp_dir)) or {}
+                fields: Dict[str, Any] = {"chunk_count": compacted.index.ntotal,
+                                          "compacted_at": datetime.now(timezone.utc).isoformat()}
+                if summaries is not None and isinstance(manifest.get("summaries"), dict):
+                    fields["summaries"] = {**manifest["summaries"], "files": summaries.index.ntotal}
+                update_manifest(str(tmp_dir), **fields)
+            os.replace(tmp_dir, versions / name)
+            switch_index_version(str(index_dir), name)
+
+            reloaded = self.reload(str(index_dir))
+            # Deletes made during the compaction are in the new version and stay tombstoned
+            store.retain(set(compacted.index_to_docstore_id.values()))
+            self.compaction.update(state="idle", last_at=datetime.now(timezone.utc).isoformat(), removed=removed,
+                                   seconds=round(time.perf_counter() - started, 3))
+            if reloaded:
+                self._prune_versions(versions, keep={name, previous.name})
+            else:
+                # The active version keeps filtering the dead chunks until the next reload
+                self.compaction["error"] = self.reload_error or "reload already in progress"
+            print(f"🧹 Compacted FAISS index {index_dir}: removed {removed} deleted chunks, now version {name}")
+            return True
+        except Exception as e:
+            self.compaction.update(state="failed", error=str(e))
+            print(f"⚠️  FAISS index compaction failed: {e}")
+            return False
+        finally:
+            self._compact_lock.release()
+
+    @staticmethod
+    def _prune_versions(versions: Path, keep: set) -> None:
+        """Remove compacted versions other than the current and the previous one (loaded versions live in memory)"""
+        for path in versions.iterdir():
+            if path.is_dir() and path.name not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def compact_in_background(self) -> bool:
+        """Start a compaction thread; returns False if one is already running"""
+        if self._compact_lock.locked():
+            return False
+        threading.Thread(target=self.compact, name="verigpt-index-compact", daemon=True).start()
+        return True
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the active version (0 when nothing is loaded)"""
+        active = self._active
+        return active.memory_bytes if active is not None and active.vectorstore is not None else 0
+
+    def reload(self, index_dir: Optional[str] = None) -> bool:
+        """Load, validate and atomically swap in a new index version
+
+        Returns False when the new version could not be loaded or failed
+        validation; the active version keeps serving in that case.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            path = Path(index_dir) if index_dir else self.index_dir
+            self.reload_state = "loading"
+            self.reload_error = None
+            started = time.perf_counter()
+            try:
+                candidate = self._load_version(path)
+                self._validate(candidate)
+            except Exception as e:
+                self.reload_state = "failed"
+                self.reload_error = str(e)
+                print(f"⚠️  FAISS index reload from {path} rejected: {e}")
+                return False
+
+            with self._lock:
+                previous = self._active
+                self._active = candidate
+                self.index_dir = path
+                self.state = "ready"
+                self.error = None
+                if previous is not None:
+                    previous.retired = True
+                    if previous.readers == 0:
+                        previous.release()
+                    else:
+                        self._retired.append(previous)
+
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.reload_state = "idle"
+            print(f"✅ FAISS index version {candidate.version} is now active")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def reload_in_background(self, index_dir: Optional[str] = None) -> bool:
+        """Start a reload thread; returns False if a reload is already running"""
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, args=(index_dir,), name="verigpt-index-reload", daemon=True).start()
+        return True
+
+    def start_watcher(self, interval: float = 30.0) -> None:
+        """Poll the index directory and reload whenever its files change"""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            seen = index_fingerprint(resolve_index_dir(str(self.index_dir))) if self.index_dir.exists() else None
+            while True:
+                time.sleep(interval)
+                current = index_fingerprint(resolve_index_dir(str(self.index_dir))) if self.index_dir.exists() else None
+                if current is None or current == seen:
+                    continue
+                seen = current
+                if self.state == "pending":
+                    # Not loaded (or unloaded): the next load reads the new files anyway
+                    continue
+                active = self._active
+                if active is None or active.version != current:
+                    print(f"🔄 FAISS index files changed, reloading {self.index_dir}")
+                    self.reload()
+
+        self._watcher = threading.Thread(target=watch, name="verigpt-index-watcher", daemon=True)
+        self._watcher.start()
+
+    @property
+    def loaded(self) -> bool:
+        """True once the vectorstore is in memory"""
+        return self.state == "ready"
+
+    def status(self) -> Dict[str, Any]:
+        """Report load progress and the active version for status endpoints
+
+        Reads a snapshot without taking the lock, so it answers while a load is running.
+        """
+        active_version, retired_versions = self._active, list(self._retired)
+        active = active_version.info() if active_version else None
+        retired = [version.info() for version in retired_versions]
+        return {
+            "state": self.state,
+            "index_path": str(self.index_dir),
+            "load_seconds": self.load_seconds,
+            "last_used": self.last_used,
+            "unloads": self.unloads,
+            "error": self.error,
+            "embedder": self._embedder.identity() if self._embedder is not None else None,
+            "active": active,
+            "retired_in_use": retired,
+            "reload": {"state": self.reload_state, "error": self.reload_error},
+            "compaction": {**self.compaction, "threshold": self.compaction_threshold},
+            "query_cache": self.query_cache.stats() if self.query_cache is not None else None
+        }
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Job Queue - Runs long index builds and corpus analyses off the request path
+
+Jobs are persisted in a local SQLite file so their state survives restarts;
+jobs that were queued or running when the service stopped are queued again on
+the next start. Each job runs in its own child process, supervised by one of
+a fixed number of worker threads, so that it can be cancelled or stopped at
+its timeout without affecting the service.
+"""
+
+import json
+import multiprocessing
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_DB_PATH = "output/jobs.sqlite3"
+DEFAULT_TIMEOUT_SECONDS = 3600.0
+POLL_SECONDS = 0.5
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled", "timed_out")
+
+
+def run_build_index(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: build the FAISS index from the corpus"""
+    from build_index import build_index
+
+    data_dir = params.get("data_dir", "data/raw_full")
+    out_dir = params.get("out_dir", "data/faiss_index")
+    stats = build_index(data_dir=data_dir, out_dir=out_dir, embedding_backend=params.get("embedding_backend"))
+    return {"data_dir": data_dir, "out_dir": out_dir, **stats}
+
+
+def run_corpus_analysis(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: run the full VeriGPTAgent analysis over the corpus"""
+    from .verigpt_agent import VeriGPTAgent
+
+    data_dir = params.get("data_dir", "data/raw_full")
+    agent = VeriGPTAgent(model=params.get("model"), embedding_backend=params.get("embedding_backend"))
+    analysis = agent.run_analysis(data_dir, mode=params.get("mode", "planned"))
+    return {"data_dir": data_dir, "analysis": analysis, "stats": agent.last_run_stats}
+
+
+def run_batch_analysis(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: analyze every changed corpus file, resuming from the checkpoint"""
+    from .batch import DEFAULT_CONCURRENCY, DEFAULT_OUTPUT_DIR, create_runner
+
+    runner = create_runner(
+        data_dir=params.get("data_dir", "data/raw_full"),
+        output_dir=params.get("output_dir", DEFAULT_OUTPUT_DIR),
+        concurrency=int(params.get("concurrency", DEFAULT_CONCURRENCY)),
+        model=params.get("model")
+    )
+    return runner.run(force=bool(params.get("force", False)), limit=params.get("limit"))
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "build_index": run_build_index,
+    "corpus_analysis": run_corpus_analysis,
+    "batch_analysis": run_batch_analysis,
+}
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already waiting"""
+
+
+def _now() -> str:
+    """Current UTC time in ISO format"""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _job_entry(kind: str, params: Dict[str, Any], conn) -> None:
+    """Child process entry point: run one handler and send back its outcome"""
+    try:
+        conn.send(("ok", JOB_HANDLERS[kind](params)))
+    except BaseException as e:
+        # SystemExit from CLI-style helpers is reported as a failure too
+        conn.send(("error", f"{type(e).__name__}: {e}\n{traceback.format_exc()}"))
+    finally:
+        conn.close()
+
+
+class JobStore:
+    """SQLite persistence for job state"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """Open (and create if needed) the job database"""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    timeout_seconds REAL NOT NULL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    result TEXT,
+                    error TEXT
+                )
+                """
+            )
+
+    def insert(self, kind: str, params: Dict[str, Any], timeout_seconds: float) -> str:
+        """Create a queued job and return its id"""
+        job_id = uuid.uuid4().hex[:16]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, timeout_seconds, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(params), timeout_seconds, _now())
+            )
+        return job_id
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Update columns of one job"""
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return one job as a dict, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent jobs first, without their results"""
+        query = "SELECT * FROM jobs"
+        args: list = []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [self._to_dict(row, include_result=False) for row in rows]
+
+    def count(self, status: str) -> int:
+        """Number of jobs with a given status"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def unfinished(self) -> List[str]:
+        """Ids of queued or running jobs, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, include_result: bool = True) -> Dict[str, Any]:
+        """Convert a row, decoding JSON columns"""
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        if include_result and job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        elif not include_result:
+            job.pop("result", None)
+        return job
+
+
+class JobQueue:
+    """Bounded pool of worker threads, each supervising one job process at a time"""
+
+    def __init__(self, store: JobStore, workers: int = 2, max_queued: int = 100,
+                 default_timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 on_success: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Initialize; call start() to launch the workers"""
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.default_timeout = default_timeout
+        self.on_success = on_success
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._mp = multiprocessing.get_context("spawn")
+
+    def start(self) -> None:
+        """Re-queue jobs interrupted by a restart and start the workers"""
+        if self._threads:
+            return
+        for job_id in self.store.unfinished():
+            self.store.update(job_id, status="queued", started_at=None)
+            self._queue.put(job_id)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"verigpt-job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None,
+               timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Persist and enqueue a new job"""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind '{kind}'. Available: {', '.join(sorted(JOB_HANDLERS))}")
+        if timeout_seconds is not None and timeout_seconds <= 0:
+            raise ValueError(f"timeout_seconds must be positive, got {timeout_seconds}")
+        if self.store.count("queued") >= self.max_queued:
+            raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+        timeout = timeout_seconds if timeout_seconds is not None else self.default_timeout
+        job_id = self.store.insert(kind, params or {}, timeout)
+        self._queue.put(job_id)
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job immediately, or ask its worker to stop a running one"""
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        if job["status"] == "queued":
+            self.store.update(job_id, status="cancelled", cancel_requested=1, finished_at=_now())
+        else:
+            self.store.update(job_id, cancel_requested=1)
+        return self.store.get(job_id)
+
+    def _work(self) -> None:
+        """Worker loop"""
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                self.store.update(job_id, status="failed", error=f"Worker error: {e}", finished_at=_now())
+
+    def _run(self, job_id: str) -> None:
+        """Run one job in a child process and record its outcome"""
+        job = self.store.get(job_id)
+        if job is None or job["status"] != "queued":
+            return
+
+        self.store.update(job_id, status="running", started_at=_now(), attempts=job["attempts"] + 1)
+        parent_conn, child_conn = self._mp.Pipe(duplex=False)
+        process = self._mp.Process(target=_job_entry, args=(job["kind"], job["params"], child_conn), daemon=True)
+        process.start()
+        child_conn.close()
+
+        deadline = time.monotonic() + job["timeout_seconds"]
+        outcome = None
+        while outcome is None:
+            if parent_conn.poll(POLL_SECONDS):
+                try:
+                    outcome = parent_conn.recv()
+                except EOFError:
+                    process.join(5)
+                    outcome = ("error", f"Job process exited with code {process.exitcode}")
+            elif not process.is_alive():
+                process.join(5)
+                outcome = ("error", f"Job process exited with code {process.exitcode}")
+            elif self.store.get(job_id)["cancel_requested"]:
+                outcome = ("cancelled", "Cancelled by request")
+            elif time.monotonic() > deadline:
+                outcome = ("timed_out", f"Timed out after {job['timeout_seconds']} seconds")
+
+        if process.is_alive():
+            process.terminate()
+        process.join(5)
+        parent_conn.close()
+
+        status, payload = outcome
+        if status == "ok":
+            self.store.update(job_id, status="succeeded", result=payload, finished_at=_now())
+            if self.on_success is not None:
+                try:
+                    self.on_success(self.store.get(job_id))
+                except Exception as e:
+                    print(f"⚠️  Job {job_id} success hook failed: {e}")
+        else:
+            self.store.update(job_id, status="failed" if status == "error" else status,
+                              error=payload, finished_at=_now())
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and worker count"""
+        return {
+            "workers": self.workers,
+            "queued": self.store.count("queued"),
+            "running": self.store.count("running"),
+            "max_queued": self.max_queued
+        }
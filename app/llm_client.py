@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+LLM Client - Shared, resilient HTTP layer for all OpenAI traffic
+
+Every OpenAI caller (the SDK client used by the API, LangChain's ChatOpenAI and
+OpenAIEmbeddings) goes through one keep-alive connection pool. Its transport
+applies per-operation timeouts, retries 429/5xx responses and connection
+errors with jittered exponential backoff, and trips a circuit breaker after
+repeated failures so that callers fail fast instead of piling up.
+
+A timeout given by the caller (e.g. the SDK's timeout=) only ever shortens the
+per-operation one. Calls made through call_with_deadline() also cap every
+attempt at the time left and stop retrying once the deadline has passed.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from .metrics import OPENAI_IN_FLIGHT, OPENAI_RETRIES
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Deadline (time.perf_counter() value) of the OpenAI calls made by the current thread
+_deadline = threading.local()
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    return float(os.getenv(name, default))
+
+
+def call_with_deadline(at: Optional[float], func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run func in this thread with its OpenAI requests bounded by the perf_counter deadline `at`"""
+    previous = getattr(_deadline, "at", None)
+    _deadline.at = at
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _deadline.at = previous
+
+
+def _shortest(*values: Optional[float]) -> Optional[float]:
+    present = [value for value in values if value is not None]
+    return min(present) if present else None
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling the upstream while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open probe"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """closed, open or half_open"""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may go upstream now"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(f"OpenAI upstream circuit is open; retry in {retry_in:.0f}s")
+
+    def record_success(self) -> None:
+        """Close the circuit"""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failure and open the circuit at the threshold (or when a probe fails)"""
+        with self._lock:
+            self.failures += 1
+            if self._probe_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Let another probe through after one ended without an upstream verdict"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def retry_after(self) -> int:
+        """Seconds until the next probe is allowed"""
+        if self.opened_at is None:
+            return 0
+        return max(1, int(self.reset_seconds - (time.monotonic() - self.opened_at)) + 1)
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """httpx transport adding timeouts, retries with backoff and a circuit breaker"""
+
+    def __init__(self, inner: httpx.BaseTransport, breaker: CircuitBreaker, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 timeouts: Optional[Dict[str, float]] = None, connect_timeout: float = 5.0):
+        self.inner = inner
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeouts = timeouts or {}
+        self.connect_timeout = connect_timeout
+        self.retries = 0
+
+    def _operation(self, request: httpx.Request) -> str:
+        """Operation name derived from the API path, e.g. chat or embeddings"""
+        path = request.url.path
+        if path.endswith("/embeddings"):
+            return "embeddings"
+        if path.endswith("/chat/completions") or path.endswith("/completions"):
+            return "chat"
+        return "default"
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Full-jitter exponential backoff, honoring Retry-After when the server sends it"""
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request, retrying transient failures"""
+        with OPENAI_IN_FLIGHT.labels(operation=self._operation(request)).track_inprogress():
+            return self._send_with_retries(request)
+
+    def _timeouts(self, operation: str, requested: Dict[str, Optional[float]],
+                  deadline: Optional[float]) -> Dict[str, float]:
+        """Per-operation timeouts, shortened by the caller's timeout and the time left before the deadline"""
+        read_timeout = self.timeouts.get(operation, self.timeouts.get("default", 30.0))
+        configured = {"connect": self.connect_timeout, "read": read_timeout, "write": read_timeout,
+                      "pool": self.connect_timeout}
+        remaining = max(0.001, deadline - time.perf_counter()) if deadline is not None else None
+        return {name: _shortest(value, requested.get(name), remaining) for name, value in configured.items()}
+
+    def _send_with_retries(self, request: httpx.Request) -> httpx.Response:
+        operation = self._operation(request)
+        requested = dict(request.extensions.get("timeout") or {})
+        deadline = getattr(_deadline, "at", None)
+
+        attempt = 0
+        while True:
+            self.breaker.before_request()
+            request.extensions["timeout"] = self._timeouts(operation, requested, deadline)
+            response = None
+            try:
+                response = self.inner.handle_request(request)
+            except httpx.TransportError as e:
+                # Timeouts, network and protocol errors (e.g. a connection dropped mid-response)
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                error: Optional[Exception] = e
+            except BaseException:
+                # Never leave a half-open probe marked in flight, or the circuit could not close again
+                self.breaker.release_probe()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    # 4xx other than throttling means the upstream is healthy
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    return response
+                response.read()
+                response.close()
+                error = None
+
+            delay = self._backoff(attempt, response)
+            if deadline is not None and time.perf_counter() + delay >= deadline:
+                # No time left for another attempt: report the last failure to the caller
+                if error is not None:
+                    raise error
+                return response
+            attempt += 1
+            self.retries += 1
+            OPENAI_RETRIES.labels(operation=operation).inc()
+            print(f"🔁 OpenAI {operation} retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                  f" ({error or response.status_code})")
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+_lock = threading.Lock()
+_breaker: Optional[CircuitBreaker] = None
+_transport: Optional[ResilientTransport] = None
+_http_client: Optional[httpx.Client] = None
+_openai_client = None
+
+
+def get_breaker() -> CircuitBreaker:
+    """The process-wide circuit breaker for OpenAI calls"""
+    global _breaker
+    with _lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv("VERIGPT_BREAKER_FAILURES", "5")),
+                reset_seconds=_env_float("VERIGPT_BREAKER_RESET_SECONDS", 30.0)
+            )
+        return _breaker
+
+
+def get_http_client() -> httpx.Client:
+    """The shared keep-alive connection pool used by every OpenAI client"""
+    global _transport, _http_client
+    breaker = get_breaker()
+    with _lock:
+        if _http_client is None:
+            max_connections = int(os.getenv("VERIGPT_HTTP_MAX_CONNECTIONS", "50"))
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0
+            )
+            _transport = ResilientTransport(
+                httpx.HTTPTransport(limits=limits),
+                breaker,
+                max_retries=int(os.getenv("VERIGPT_HTTP_MAX_RETRIES", "3")),
+                backoff_base=_env_float("VERIGPT_HTTP_BACKOFF_BASE", 0.5),
+                backoff_max=_env_float("VERIGPT_HTTP_BACKOFF_MAX", 8.0),
+                timeouts={
+                    "chat": _env_float("VERIGPT_TIMEOUT_CHAT", 60.0),
+                    "embeddings": _env_float("VERIGPT_TIMEOUT_EMBEDDINGS", 15.0),
+                    "default": _env_float("VERIGPT_TIMEOUT_DEFAULT", 30.0),
+                },
+                connect_timeout=_env_float("VERIGPT_TIMEOUT_CONNECT", 5.0)
+            )
+            _http_client = httpx.Client(transport=_transport)
+        return _http_client
+
+
+def openai_kwargs(resource: str) -> Dict[str, Any]:
+    """Constructor arguments that route a LangChain OpenAI class ("chat" or "embeddings") through the shared client
+
+    The prebuilt SDK resource is passed rather than http_client, because the
+    LangChain classes would also hand a sync http_client to their async client.
+    """
+    client = get_openai_client()
+    resources = {"chat": client.chat.completions, "embeddings": client.embeddings}
+    return {"client": resources[resource], "max_retries": 0}
+
+
+def get_openai_client():
+    """The shared OpenAI SDK client (retries are handled by the transport, not the SDK)"""
+    global _openai_client
+    http_client = get_http_client()
+    with _lock:
+        if _openai_client is None:
+            from openai import OpenAI
+            _openai_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+                max_retries=0
+            )
+        return _openai_client
+
+
+def upstream_unavailable(error: BaseException) -> bool:
+    """True when an exception means the OpenAI upstream is down, throttling or too slow"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (CircuitOpenError, httpx.TransportError)):
+            return True
+        status = getattr(error, "status_code", None)
+        if status in RETRYABLE_STATUS:
+            return True
+        if type(error).__name__ in ("APIConnectionError", "APITimeoutError", "RateLimitError"):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def status() -> Dict[str, Any]:
+    """Breaker and retry counters for status endpoints"""
+    breaker = get_breaker()
+    return {
+        "circuit": breaker.state,
+        "consecutive_failures": breaker.failures,
+        "retries": _transport.retries if _transport is not None else 0
+    }
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Load test - Drives /agent against a local fake OpenAI server and reports latency
+
+Everything runs offline: a fake chat/embeddings server is started in-process,
+a FAISS index of the corpus is built with the same deterministic embeddings
+the fake server returns, and the API is started with uvicorn in a subprocess
+pointed at both. Requests are sent either closed-loop (fixed concurrency) or
+open-loop (fixed arrival rate). Exits with status 1 when a gate
+(--max-p95-ms, --min-throughput, --max-error-rate) is missed.
+
+    python -m app.load_test --requests 500 --concurrency 16 --latency-ms 300
+    python -m app.load_test --rate 20 --duration 30 --error-rate 0.02
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from .fake_openai import FakeOpenAIServer, fake_embedding
+from .query_log import percentile
+
+QUERIES = [
+    "Where is the FIFO full flag computed?",
+    "Which modules implement an AXI interface?",
+    "What does the UART transmitter do?",
+    "List the parameters of the arbiter",
+    "How is reset handled in the register file?",
+    "Write SVA assertions for the FIFO",
+    "Which testbench drives the ALU?",
+    "What are possible clock domain crossing issues in the design?",
+    "Explain the state machine of the SPI controller",
+    "Which signals does the memory controller export?",
+]
+
+
+def free_port() -> int:
+    """An unused local TCP port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_fake_index(data_dir: str, out_dir: str, dim: int, max_chunks: Optional[int] = None) -> int:
+    """Index the corpus with fake_embedding vectors (matching the fake server); returns chunk count"""
+    from langchain.schema import Document
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.embeddings import FakeEmbeddings
+    from langchain_community.vectorstores import FAISS
+
+    from .manifest import corpus_files
+
+    documents = [
+        Document(page_content=path.read_text(encoding="utf-8", errors="replace"), metadata={"source": path.as_posix()})
+        for path in corpus_files(data_dir)
+    ]
+    chunks = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200).split_documents(documents)
+    if max_chunks:
+        chunks = chunks[:max_chunks]
+    text_embeddings = [(chunk.page_content, fake_embedding(chunk.page_content, dim)) for chunk in chunks]
+    vectorstore = FAISS.from_embeddings(
+        text_embeddings, FakeEmbeddings(size=dim), metadatas=[chunk.metadata for chunk in chunks]
+    )
+    vectorstore.save_local(out_dir)
+    return len(chunks)
+
+
+def start_service(port: int, env: Dict[str, str], ready_timeout: float) -> subprocess.Popen:
+    """Start app.main with uvicorn and wait until /health/ready answers 200"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--timeout-keep-alive", "75"],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Service exited with code {process.returncode}:\n{process.stderr.read()}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Service was not ready after {ready_timeout}s")
+
+
+class LoadResult:
+    """Latencies and status codes collected by the load generator"""
+
+    def __init__(self):
+        self.samples: List[Tuple[float, int]] = []
+        self.errors: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.finished = self.started
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, status: int, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.samples.append((seconds, status))
+            if error or status >= 400:
+                key = error or str(status)
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Throughput, error rate and latency percentiles (ms, successful requests only)"""
+        elapsed = self.finished - self.started
+        ok = [seconds * 1000 for seconds, status in self.samples if 200 <= status < 300]
+        total = len(self.samples)
+        return {
+            "requests": total,
+            "succeeded": len(ok),
+            "errors": self.errors,
+            "error_rate": round((total - len(ok)) / total, 4) if total else 0.0,
+            "duration_seconds": round(elapsed, 3),
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": {
+                "mean": round(sum(ok) / len(ok), 1) if ok else None,
+                **{f"p{p}": round(percentile(ok, p), 1) if ok else None for p in (50, 95, 99)},
+                "max": round(max(ok), 1) if ok else None,
+            }
+        }
+
+
+def send(client: httpx.Client, result: LoadResult, top_k: int) -> None:
+    """Send one /agent request and record its outcome"""
+    started = time.perf_counter()
+    try:
+        response = client.post("/agent", json={"query": random.choice(QUERIES), "top_k": top_k})
+        result.record(time.perf_counter() - started, response.status_code)
+    except httpx.HTTPError as e:
+        result.record(time.perf_counter() - started, 0, type(e).__name__)
+
+
+def run_closed_loop(client: httpx.Client, requests: int, concurrency: int, top_k: int) -> LoadResult:
+    """`concurrency` workers each send their next request as soon as the previous one returns"""
+    result = LoadResult()
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            send(client, result, top_k)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.finished = time.perf_counter()
+    return result
+
+
+def run_open_loop(client: httpx.Client, rate: float, duration: float, top_k: int, max_in_flight: int) -> LoadResult:
+    """Start requests at a fixed arrival rate (Poisson arrivals), regardless of response times"""
+    result = LoadResult()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        next_at = time.perf_counter()
+        end = next_at + duration
+        while next_at < end:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, client, result, top_k)
+            next_at += random.expovariate(rate)
+    result.finished = time.perf_counter()
+    return result
+
+
+def stage_means(metrics_text: str) -> Dict[str, float]:
+    """Mean /agent stage latency (ms) from the service's /metrics output"""
+    sums: Dict[str, float] = {}
+    counts: Dict[str, float] = {}
+    for line in metrics_text.splitlines():
+        for suffix, target in (("_sum", sums), ("_count", counts)):
+            prefix = f"verigpt_agent_stage_seconds{suffix}{{stage=\""
+            if line.startswith(prefix):
+                stage, value = line[len(prefix):].split("\"} ")
+                target[stage] = float(value)
+    return {stage: round(sums[stage] / counts[stage] * 1000, 1) for stage in sums if counts.get(stage)}
+
+
+def main() -> int:
+    """Run the load test"""
+    parser = argparse.ArgumentParser(description="Offline load test of /agent against a fake OpenAI server")
+    parser.add_argument("--requests", type=int, default=200, help="Requests to send in closed-loop mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients in closed-loop mode")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop arrival rate (requests/second)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Open-loop duration in seconds")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake API latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake completion speed (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake API calls that fail")
+    parser.add_argument("--data-dir", default="data/raw_full")
+    parser.add_argument("--max-chunks", type=int, default=None, help="Index only the first N chunks")
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="Fail if p95 latency is higher")
+    parser.add_argument("--min-throughput", type=float, default=None, help="Fail if throughput (rps) is lower")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="Fail if the error rate is higher")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    dim = 1536
+    fake = FakeOpenAIServer(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens, error_rate=args.error_rate, embedding_dim=dim
+    ).start()
+    service = None
+    try:
+        with tempfile.TemporaryDirectory(prefix="verigpt-load-") as tmp:
+            index_dir = str(Path(tmp) / "faiss_index")
+            print(f"🧪 Fake OpenAI server on {fake.base_url}")
+            started = time.perf_counter()
+            chunks = build_fake_index(args.data_dir, index_dir, dim, args.max_chunks)
+            print(f"📦 Indexed {chunks} chunks in {time.perf_counter() - started:.1f}s")
+
+            port = free_port()
+            service = start_service(port, {
+                "OPENAI_API_KEY": "sk-fake",
+                "OPENAI_BASE_URL": fake.base_url,
+                "VERIGPT_INDEX_DIR": index_dir,
+                "VERIGPT_JOBS_DB": str(Path(tmp) / "jobs.sqlite3"),
+                "VERIGPT_CATALOG_REFRESH_SECONDS": "0",
+            }, args.ready_timeout)
+            print(f"🚀 Service ready on port {port}")
+
+            limits = httpx.Limits(max_connections=max(args.concurrency, 64), max_keepalive_connections=max(args.concurrency, 64))
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120.0, limits=limits) as client:
+                if args.rate:
+                    print(f"⏱️  Open loop: {args.rate} req/s for {args.duration}s")
+                    result = run_open_loop(client, args.rate, args.duration, args.top_k, max_in_flight=256)
+                    load = {"mode": "open", "rate": args.rate, "duration": args.duration}
+                else:
+                    print(f"⏱️  Closed loop: {args.requests} requests at concurrency {args.concurrency}")
+                    result = run_closed_loop(client, args.requests, args.concurrency, args.top_k)
+                    load = {"mode": "closed", "requests": args.requests, "concurrency": args.concurrency}
+                stages = stage_means(client.get("/metrics").text)
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait(10)
+        fake.stop()
+
+    report = {
+        "load": load,
+        "fake_openai": {key: fake.state.config[key] for key in ("latency_ms", "jitter_ms", "tokens_per_second", "error_rate")},
+        **result.summary(),
+        "stage_mean_ms": stages,
+        "upstream_calls": fake.state.counts
+    }
+    latency = report["latency_ms"]
+    print(f"\n📊 {report['succeeded']}/{report['requests']} succeeded, {report['throughput_rps']} req/s, "
+          f"error rate {report['error_rate']:.2%}")
+    print(f"   Latency ms: p50 {latency['p50']}, p95 {latency['p95']}, p99 {latency['p99']}, max {latency['max']}")
+    print(f"   Stage means ms: {stages}")
+    if report["errors"]:
+        print(f"   Errors: {report['errors']}")
+    if args.json_path:
+        Path(args.json_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if args.max_p95_ms is not None and (latency["p95"] is None or latency["p95"] > args.max_p95_ms):
+        failures.append(f"p95 {latency['p95']} ms > {args.max_p95_ms} ms")
+    if args.min_throughput is not None and report["throughput_rps"] < args.min_throughput:
+        failures.append(f"throughput {report['throughput_rps']} < {args.min_throughput} req/s")
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {report['error_rate']} > {args.max_error_rate}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Load test passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -3,56 +3,244 @@
 VeriGPT FastAPI Service - AI-based SystemVerilog code analysis
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+from starlette.concurrency import run_in_threadpool as starlette_run_in_threadpool
+from starlette.routing import Match
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import os
+import sys
+import asyncio
+import hmac
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import OpenAIEmbeddings
-from openai import OpenAI
+from .index_registry import IndexEntry, IndexRegistry, UnknownIndexError
 from .prompt import get_prompt
+from .routing import ModelRouter
+from .admission import AdmissionController, AdmissionRejected, client_key
+from .deadlines import Deadline, DeadlineExceeded, MIN_LLM_SECONDS
+from .sessions import Session, SessionStore, Turn, chunk_id
+from .cache import ResultCache, make_key
+from .query_log import QueryLog, top_requests
+from . import metrics
+from .profiling import RequestProfiler, call_profiled
 
 # Load environment variables
 #load_dotenv()
 
-# OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Heavy dependencies (LangChain, OpenAI, FAISS) are imported lazily so that
+# importing this module stays fast; the index and the agent are loaded by a
+# background warmup task started with the application.
+# Named corpora and indexes (VERIGPT_INDEXES), loaded lazily within a memory budget
+index_registry = IndexRegistry.from_env()
 
-# Load embeddings (only to load FAISS, not for live embeddings)
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    openai_api_key=os.getenv("OPENAI_API_KEY")
-)
-vectorstore = FAISS.load_local("data/faiss_index", embeddings, allow_dangerous_deserialization=True)
-
-# Try to load FAISS index if it exists
-try:
-    faiss_path = Path("data/faiss_index")
-    if faiss_path.exists():
-        vectorstore = FAISS.load_local("data/faiss_index", embeddings, allow_dangerous_deserialization=True)
-        print("✅ FAISS index loaded successfully")
-
-        vec = embeddings.embed_query("fifo buffer")
-        print("DEBUG: first 5 dims:", vec[:5])
-        print("DEBUG: vector length:", len(vec))
-    else:
-        print("⚠️  FAISS index not found at data/faiss_index")
-        print("   Run the agent first to create the index")
-except Exception as e:
-    print(f"⚠️  Could not load FAISS index: {e}")
-
-# Import our VeriGPT agent
-try:
-    from .verigpt_agent import VeriGPTAgent
-    agent = VeriGPTAgent()
-    AGENT_READY = True
-except Exception as e:
-    print(f"⚠️  Warning: Could not initialize VeriGPT agent: {e}")
-    agent = None
-    AGENT_READY = False
+# The default entry also backs /analyze, /faiss/status and the admin reload
+index_store = index_registry.default.store
+
+# In-memory catalog of the default corpus (each entry has its own for /files and /stats)
+file_catalog = index_registry.default.catalog
+
+# Chooses the fast or the strong model per request unless the request names one
+model_router = ModelRouter.from_env()
+
+# Bounded concurrency and a per-client fair queue in front of /agent
+admission = AdmissionController.from_env()
+
+# Multi-turn /agent conversations (in memory, bounded, with TTL)
+session_store = SessionStore.from_env()
+
+# /agent retrieval: "hierarchical" (summary index picks files, then their chunks) or "flat"
+RETRIEVAL_MODE = os.getenv("VERIGPT_RETRIEVAL", "hierarchical")
+SUMMARY_FILES = int(os.getenv("VERIGPT_SUMMARY_FILES", "10"))
+
+# Structured /agent records, written in batches by a background thread (VERIGPT_QUERY_LOG)
+query_log = QueryLog.from_env()
+
+# Stateless /agent answers by model, temperature and prompt; persisted so restarts and prewarm reuse them
+ANSWER_CACHE_SIZE = int(os.getenv("VERIGPT_ANSWER_CACHE_SIZE", "256"))
+answer_cache = ResultCache(
+    max_entries=ANSWER_CACHE_SIZE, directory="output/cache/answers",
+    max_disk_bytes=int(float(os.getenv("VERIGPT_ANSWER_CACHE_DISK_MB", "100")) * 1024 * 1024),
+    max_age_seconds=float(os.getenv("VERIGPT_ANSWER_CACHE_MAX_AGE_HOURS", "168")) * 3600
+) if ANSWER_CACHE_SIZE > 0 else None
+if answer_cache is not None:
+    metrics.CACHE_HIT_RATIO.labels(cache="answer").set_function(lambda: answer_cache.stats()["hit_ratio"] or 0.0)
+
+# Admin-armed cProfile capture of selected requests (idle unless armed)
+request_profiler = RequestProfiler("output/profiles")
+
+async def run_in_threadpool(func, *args, **kwargs):
+    """Starlette's run_in_threadpool; the worker call is profiled too when its request is"""
+    return await starlette_run_in_threadpool(call_profiled, func, *args, **kwargs)
+
+# OpenAI client, created on first use
+_client = None
+
+def get_client():
+    """Return the shared OpenAI client (pooled, with timeouts, retries and a circuit breaker)"""
+    global _client
+    if _client is None:
+        from .llm_client import get_openai_client
+        _client = get_openai_client()
+    return _client
+
+def upstream_http_error(e: Exception, action: str) -> HTTPException:
+    """Map a failure to 503 with Retry-After when the OpenAI upstream is unavailable, else 500"""
+    from .llm_client import get_breaker, upstream_unavailable
+
+    if upstream_unavailable(e):
+        return HTTPException(
+            status_code=503,
+            detail=f"OpenAI upstream unavailable, please retry later: {str(e)}",
+            headers={"Retry-After": str(get_breaker().retry_after() or 5)}
+        )
+    return HTTPException(status_code=500, detail=f"{action} failed: {str(e)}")
+
+# VeriGPT agent, created on first use
+_agent = None
+_agent_error: Optional[str] = None
+_agent_lock = threading.Lock()
+
+def get_agent():
+    """Return the VeriGPT agent, initializing it on first use"""
+    global _agent, _agent_error
+    with _agent_lock:
+        if _agent is None and _agent_error is None:
+            try:
+                from .verigpt_agent import VeriGPTAgent
+                _agent = VeriGPTAgent()
+            except Exception as e:
+                print(f"⚠️  Warning: Could not initialize VeriGPT agent: {e}")
+                _agent_error = str(e)
+        return _agent
+
+# Code analyzer behind /analyze/*, created on first use
+_analyzer = None
+
+def get_analyzer():
+    """Return the shared code analyzer (results cached in memory and under output/cache)"""
+    global _analyzer
+    if _analyzer is None:
+        from .analysis import CodeAnalyzer
+        from .cache import ResultCache
+        cache = ResultCache(max_entries=2048, directory="output/cache/analysis")
+        _analyzer = CodeAnalyzer(
+            get_client,
+            index_store,
+            cache=cache,
+            max_part_chars=int(os.getenv("VERIGPT_ANALYSIS_MAX_CHARS", "12000")),
+            parallelism=int(os.getenv("VERIGPT_ANALYSIS_PARALLELISM", "4")),
+            max_llm_calls=int(os.getenv("VERIGPT_ANALYSIS_MAX_LLM_CALLS", "8"))
+        )
+        metrics.CACHE_HIT_RATIO.labels(cache="analysis").set_function(lambda: cache.stats()["hit_ratio"] or 0.0)
+    return _analyzer
+
+# Multi-file analysis runs, most recent last (bounded)
+analysis_runs: Dict[str, Any] = {}
+MAX_ANALYSIS_RUNS = 100
+DEFAULT_FILE_CONCURRENCY = int(os.getenv("VERIGPT_ANALYSIS_FILE_CONCURRENCY", "8"))
+MAX_FILE_CONCURRENCY = 32
+
+# Background job queue for index builds and corpus analyses, created on first use
+_job_queue = None
+
+def _on_job_success(job: Dict[str, Any]) -> None:
+    """Record build timings and hot-reload the served index after a build job wrote to it"""
+    if job["kind"] == "build_index" and job["result"].get("stage_seconds"):
+        metrics.observe_index_build(job["result"]["stage_seconds"])
+    if job["kind"] == "build_index":
+        for entry in index_registry.entries.values():
+            if entry.store.loaded and Path(job["result"]["out_dir"]).resolve() == entry.store.index_dir.resolve():
+                entry.store.reload_in_background(job["result"]["out_dir"])
+
+def get_job_queue():
+    """Return the job queue backed by output/jobs.sqlite3 (VERIGPT_JOBS_DB)"""
+    global _job_queue
+    if _job_queue is None:
+        from .jobs import JobQueue, JobStore
+        _job_queue = JobQueue(
+            JobStore(os.getenv("VERIGPT_JOBS_DB", "output/jobs.sqlite3")),
+            workers=int(os.getenv("VERIGPT_JOB_WORKERS", "2")),
+            max_queued=int(os.getenv("VERIGPT_JOB_MAX_QUEUED", "100")),
+            default_timeout=float(os.getenv("VERIGPT_JOB_TIMEOUT_SECONDS", "3600")),
+            on_success=_on_job_success
+        )
+    return _job_queue
+
+def agent_ready() -> bool:
+    """True once the agent has been initialized (never triggers initialization)"""
+    return _agent is not None
+
+# Warmup progress, reported by the readiness probe
+WARMUP_STAGES = ["catalog", "index", "agent", "prewarm"]
+warmup_progress: Dict[str, Dict[str, Any]] = {
+    stage: {"status": "pending", "seconds": None} for stage in WARMUP_STAGES
+}
+
+def _run_warmup_stage(name: str, func) -> None:
+    """Run one warmup stage and record its outcome and duration"""
+    progress = warmup_progress[name]
+    progress["status"] = "running"
+    started = time.perf_counter()
+    try:
+        progress["status"] = "done" if func() else "failed"
+    except Exception as e:
+        progress["status"] = "failed"
+        progress["error"] = str(e)
+    progress["seconds"] = round(time.perf_counter() - started, 3)
+
+def warmup() -> None:
+    """Build the file catalogs, load the default FAISS index and the agent, then prewarm the caches
+
+    Other named indexes are loaded by the first request that selects them.
+    """
+    catalogs = [entry.catalog for entry in index_registry.entries.values()]
+    _run_warmup_stage("catalog", lambda: all([catalog.ensure_built() is not None for catalog in catalogs]))
+    for catalog in catalogs:
+        catalog.start_refresher(float(os.getenv("VERIGPT_CATALOG_REFRESH_SECONDS", "30")))
+    _run_warmup_stage("index", lambda: index_registry.load().store.loaded)
+    _run_warmup_stage("agent", lambda: get_agent() is not None)
+    _run_warmup_stage("prewarm", prewarm)
+
+def prewarm() -> bool:
+    """Replay the most frequent logged /agent requests to fill the embedding and answer caches
+
+    VERIGPT_PREWARM_QUERIES sets how many (0 skips it). Replays run the /agent
+    retrieval path without admission, and stay out of the query log, the stage
+    histogram, the route counters and the cache hit ratios. They only read the
+    answer cache (answers on disk are loaded into memory) and never call the LLM.
+    With VERIGPT_PREWARM_ANSWERS=0 only the query embeddings are computed.
+    """
+    limit = int(os.getenv("VERIGPT_PREWARM_QUERIES", "20"))
+    if limit <= 0 or not query_log.enabled:
+        return True
+    answers = answer_cache is not None and os.getenv("VERIGPT_PREWARM_ANSWERS", "1") != "0"
+    warmed = 0
+    for item in top_requests(query_log.path.as_posix(), limit):
+        try:
+            entry = index_registry.get(item.get("index"))
+        except UnknownIndexError:
+            continue
+        if not entry.store.loaded:
+            continue
+        try:
+            if answers:
+                req = AgentRequest(**{name: value for name, value in item.items() if name != "count"})
+                asyncio.run(_run_agent(req, Deadline.from_ms(None), entry, replay=True))
+            else:
+                entry.store.embed_query_cached(item["query"], count=False)
+            warmed += 1
+        except Exception as e:
+            print(f"⚠️  Prewarm of '{item['query'][:60]}' failed: {str(e)}")
+    warmup_progress["prewarm"]["requests"] = warmed
+    print(f"🔥 Prewarmed caches with {warmed} frequent queries")
+    return True
 
 app = FastAPI(
     title="VeriGPT API Service",
@@ -72,18 +260,66 @@ app.add_middleware(
     allow_headers=["*"],        # Allow all headers
 )
 
+def _route_template(request: Request) -> str:
+    """Path template of the matching route (bounded label values for metrics)"""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Count requests and track in-flight requests per route"""
+    route = _route_template(request)
+    status = 500
+    with metrics.HTTP_IN_FLIGHT.labels(route=route).track_inprogress():
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.HTTP_REQUESTS.labels(method=request.method, route=route, status=status).inc()
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """Tag every request with X-Request-ID and profile it when an admin asked for it"""
+    request_id = (request.headers.get("x-request-id") or uuid.uuid4().hex)[:128]
+    request.state.request_id = request_id
+
+    capture = None
+    if (request_profiler.armed and request_profiler.claim(request.method, request.url.path)) or (
+            request.headers.get("x-profile") == "1" and admin_token_valid(request.headers.get("x-admin-token"))):
+        capture = request_profiler.start()
+        if capture is None:
+            print(f"⚠️  Skipped profiling {request.method} {request.url.path} [{request_id}]: another profile is running")
+
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        if capture is not None:
+            request_profiler.finish(capture, request_id, request.method, request.url.path,
+                                    status, time.perf_counter() - started)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Request models
 class AnalysisRequest(BaseModel):
     """Request model for SystemVerilog analysis"""
     code: str
-    model: Optional[str] = "gpt-4"
+    model: Optional[str] = None
     temperature: Optional[float] = 0.1
 
 class FileAnalysisRequest(BaseModel):
     """Request model for analyzing specific files"""
     file_paths: List[str]
-    model: Optional[str] = "gpt-4"
+    model: Optional[str] = None
     temperature: Optional[float] = 0.1
+    concurrency: Optional[int] = None
+    wait: bool = True
 
 class HealthResponse(BaseModel):
     """Health check response"""
@@ -95,20 +331,91 @@ class AgentRequest(BaseModel):
     """Request model for agent queries"""
     query: str
     top_k: int = 3
+    model: Optional[str] = None
+    temperature: Optional[float] = 0.2
+    timeout_ms: Optional[int] = None
+    session_id: Optional[str] = None
+    retrieval: Optional[str] = None
+    index: Optional[str] = None
+
+class JobRequest(BaseModel):
+    """Request model for background jobs"""
+    kind: str
+    params: Dict[str, Any] = {}
+    timeout_seconds: Optional[float] = Field(None, gt=0)
+
+class IndexReloadRequest(BaseModel):
+    """Request model for hot index reloads"""
+    path: Optional[str] = None
+    index: Optional[str] = None
+
+class IndexDeleteRequest(BaseModel):
+    """Request model for chunk deletes (by source file, docstore id, or files missing from the corpus)"""
+    index: Optional[str] = None
+    sources: List[str] = []
+    ids: List[str] = []
+    missing: bool = False
+
+class IndexCompactRequest(BaseModel):
+    """Request model for a forced index compaction"""
+    index: Optional[str] = None
+
+class ProfileRequest(BaseModel):
+    """Request model for arming the request profiler"""
+    path_prefix: str
+    count: int = 1
+    method: Optional[str] = None
+
+def get_index_entry(name: Optional[str]) -> IndexEntry:
+    """Named index entry (the default one for None); 404 for unknown names"""
+    try:
+        return index_registry.get(name)
+    except UnknownIndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def admin_token_valid(token: Optional[str]) -> bool:
+    """True when admin endpoints are enabled and the token matches"""
+    expected = os.getenv("VERIGPT_ADMIN_TOKEN")
+    return bool(expected) and hmac.compare_digest(token or "", expected)
 
-# Initialize VeriGPT agent
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Allow admin endpoints only with the token from VERIGPT_ADMIN_TOKEN"""
+    expected = os.getenv("VERIGPT_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled. Set VERIGPT_ADMIN_TOKEN to enable them.")
+    if not hmac.compare_digest(x_admin_token or "", expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
 
+@app.on_event("startup")
+async def start_warmup():
+    """Start the background warmup unless VERIGPT_WARMUP=0 (fully lazy mode)"""
+    if os.getenv("VERIGPT_WARMUP", "1") != "0":
+        threading.Thread(target=warmup, name="verigpt-warmup", daemon=True).start()
+
+    get_job_queue().start()
+    query_log.start()
+
+    # Optional polling watcher that hot-reloads the index when its files change
+    watch_seconds = float(os.getenv("VERIGPT_INDEX_WATCH_SECONDS", "0"))
+    if watch_seconds > 0:
+        index_store.start_watcher(watch_seconds)
+
+@app.on_event("shutdown")
+async def flush_query_log():
+    """Write the query log records still queued"""
+    query_log.stop()
 
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Root endpoint with health information"""
     return HealthResponse(
-        status="healthy" if AGENT_READY else "degraded",
+        status="healthy" if agent_ready() else "degraded",
         message="VeriGPT API Service is running",
         environment={
-            "agent_ready": AGENT_READY,
+            "agent_ready": agent_ready(),
             "openai_key_set": bool(os.getenv("OPENAI_API_KEY")),
-            "data_directory": "data/raw_full"
+            "data_directory": file_catalog.root.as_posix(),
+            "indexes": index_registry.names()
         }
     )
 
@@ -116,149 +423,207 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return HealthResponse(
-        status="healthy" if AGENT_READY else "degraded",
+        status="healthy" if agent_ready() else "degraded",
         message="Service health check",
         environment={
-            "agent_ready": AGENT_READY,
+            "agent_ready": agent_ready(),
             "openai_key_set": bool(os.getenv("OPENAI_API_KEY")),
-            "data_directory": "data/raw_full"
+            "data_directory": file_catalog.root.as_posix(),
+            "indexes": index_registry.names()
         }
     )
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+def _upstream_status() -> Optional[Dict[str, Any]]:
+    """Circuit breaker state, once the OpenAI client layer has been used"""
+    llm_client = sys.modules.get(f"{__package__}.llm_client")
+    return llm_client.status() if llm_client is not None else None
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 200 once the FAISS index is loaded, 503 with load progress otherwise"""
+    ready = index_store.loaded
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "index": index_store.status(),
+        "agent_ready": agent_ready(),
+        "warmup": warmup_progress,
+        "query_log": query_log.status(),
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "openai_upstream": _upstream_status()
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
 @app.post("/analyze/code")
 async def analyze_code(request: AnalysisRequest):
     """Analyze SystemVerilog code directly"""
-    if not AGENT_READY:
-        raise HTTPException(status_code=503, detail="VeriGPT agent not ready")
+    if not os.getenv("OPENAI_API_KEY"):
+        raise HTTPException(status_code=503, detail="OpenAI API key not configured")
     
     try:
-        # Create a temporary document for analysis
-        from langchain.schema import Document
-        temp_doc = Document(
-            page_content=request.code,
-            metadata={"source": "user_input", "filename": "user_code.sv"}
+        route = model_router.route(request.code, task="analyze", context_chars=len(request.code),
+                                   override=request.model)
+        # Blocking LLM calls run in a worker thread; unchanged code is served from the cache
+        result = await asyncio.to_thread(
+            get_analyzer().analyze, request.code, route.model, request.temperature
         )
         
-        # Use the agent's analysis capabilities
-        # For now, we'll use a simplified approach
-        result = f"Analysis of SystemVerilog code:\n\n{request.code}\n\nThis is a placeholder response. Full analysis requires the complete RAG pipeline."
-        
         return {
             "input": request.code,
-            "analysis": result,
-            "model": request.model,
-            "temperature": request.temperature
+            "model": route.model,
+            "route": route.to_dict(),
+            "temperature": request.temperature,
+            **result
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        raise upstream_http_error(e, "Analysis")
 
 @app.post("/analyze/files")
 async def analyze_files(request: FileAnalysisRequest):
-    """Analyze specific SystemVerilog files"""
-    if not AGENT_READY:
-        raise HTTPException(status_code=503, detail="VeriGPT agent not ready")
+    """Analyze specific SystemVerilog files (map over files, then reduce into a summary)"""
+    if not os.getenv("OPENAI_API_KEY"):
+        raise HTTPException(status_code=503, detail="OpenAI API key not configured")
+    if not request.file_paths:
+        raise HTTPException(status_code=400, detail="file_paths must not be empty")
     
     try:
-        # This would require more complex file handling
-        # For now, return a placeholder
-        result = f"Analysis of {len(request.file_paths)} files:\n{request.file_paths}"
-        
+        from .analysis import FileAnalysisRun
+
+        route = model_router.route(" ".join(request.file_paths), task="files", override=request.model)
+        run = FileAnalysisRun(request.file_paths, route.model, request.temperature, route=route.to_dict())
+        analysis_runs[run.run_id] = run
+        while len(analysis_runs) > MAX_ANALYSIS_RUNS:
+            analysis_runs.pop(next(iter(analysis_runs)))
+
+        concurrency = min(request.concurrency or DEFAULT_FILE_CONCURRENCY, MAX_FILE_CONCURRENCY)
+        worker = threading.Thread(
+            target=get_analyzer().analyze_files,
+            args=(run, file_catalog.root.as_posix(), concurrency),
+            name=f"verigpt-analysis-{run.run_id}",
+            daemon=True
+        )
+        worker.start()
+
+        if not request.wait:
+            return JSONResponse(status_code=202, content=run.to_dict(include_results=False))
+
+        await asyncio.to_thread(run.done.wait)
         return {
             "files": request.file_paths,
-            "analysis": result,
-            "model": request.model,
-            "temperature": request.temperature
+            "analysis": run.summary,
+            "model": run.model,
+            "temperature": request.temperature,
+            **run.to_dict()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File analysis failed: {str(e)}")
 
+@app.get("/analyze/files/{run_id}")
+async def get_file_analysis(run_id: str, include_results: bool = False):
+    """Per-file progress of a multi-file analysis (results once completed)"""
+    run = analysis_runs.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Analysis run '{run_id}' not found")
+    return run.to_dict(include_results=include_results)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics (text exposition format)"""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/routing")
+async def routing_status():
+    """Model routing rules and how many requests took each route"""
+    return model_router.stats()
+
+@app.get("/admission")
+async def admission_status():
+    """/agent concurrency limit, queue depth per client and rejection counts"""
+    return admission.status()
+
+@app.post("/sessions")
+async def create_session():
+    """Start a conversation; pass the returned session_id to /agent for follow-up questions"""
+    session = session_store.create()
+    return {"session_id": session.id, "ttl_seconds": session_store.ttl_seconds}
+
+@app.get("/sessions")
+async def sessions_status():
+    """Session store size, limits and eviction counts"""
+    return session_store.stats()
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """Recent turns of a conversation"""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+    return session.to_dict()
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """End a conversation and free its state"""
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found or expired")
+    return {"session_id": session_id, "deleted": True}
+
+@app.get("/indexes")
+async def list_indexes():
+    """Configured indexes, which are loaded, and the memory budget"""
+    return index_registry.status()
+
 @app.get("/files")
-async def list_files():
-    """List available SystemVerilog files"""
+async def list_files(prefix: str = "", offset: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=10000),
+                     index: Optional[str] = None):
+    """List available SystemVerilog files (paginated, optionally filtered by path prefix)"""
+    catalog = get_index_entry(index).catalog
     try:
-        import glob
-        
-        data_dir = "data/raw_full"
-        data_path = Path(data_dir)
-        
-        if not data_path.exists():
-            return {"error": f"Data directory '{data_dir}' not found"}
-        
-        # Find all .sv and .svh files
-        all_files = []
-        for ext in ["sv", "svh"]:
-            pattern = str(data_path / "**" / f"*.{ext}")
-            files = glob.glob(pattern, recursive=True)
-            all_files.extend(files)
-        
-        # Convert to relative paths
-        relative_files = []
-        for file_path in all_files:
-            file_path_obj = Path(file_path)
-            relative_path = file_path_obj.relative_to(data_path)
-            relative_files.append(str(relative_path))
-        
-        return {
-            "total_files": len(relative_files),
-            "files": sorted(relative_files)
-        }
+        if not catalog.exists:
+            return {"error": f"Data directory '{catalog.root}' not found"}
+        await run_in_threadpool(catalog.ensure_built)
+        return catalog.list_files(prefix=prefix, offset=offset, limit=limit)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list files: {str(e)}")
 
 @app.get("/stats")
-async def get_stats():
+async def get_stats(index: Optional[str] = None):
     """Get statistics about the codebase"""
+    catalog = get_index_entry(index).catalog
     try:
-        import glob
-        
-        data_dir = "data/raw_full"
-        data_path = Path(data_dir)
-        
-        if not data_path.exists():
-            return {"error": f"Data directory '{data_dir}' not found"}
-        
-        # Count files by extension
-        ext_stats = {}
-        total_size = 0
-        
-        for ext in ["sv", "svh"]:
-            pattern = str(data_path / "**" / f"*.{ext}")
-            files = glob.glob(pattern, recursive=True)
-            ext_stats[ext] = len(files)
-            
-            # Calculate total size
-            for file_path in files:
-                try:
-                    total_size += Path(file_path).stat().st_size
-                except:
-                    pass
-        
-        return {
-            "total_files": sum(ext_stats.values()),
-            "file_types": ext_stats,
-            "total_size_bytes": total_size,
-            "total_size_mb": round(total_size / (1024 * 1024), 2)
-        }
+        if not catalog.exists:
+            return {"error": f"Data directory '{catalog.root}' not found"}
+        await run_in_threadpool(catalog.ensure_built)
+        return catalog.stats()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
 @app.get("/faiss/status")
-async def get_faiss_status():
+async def get_faiss_status(index: Optional[str] = None):
     """Get FAISS index status"""
+    store = get_index_entry(index).store
     try:
-        faiss_path = Path("data/faiss_index")
+        faiss_path = store.index_dir
         if faiss_path.exists():
             # Count files in the index directory
             index_files = list(faiss_path.glob("*"))
+            index_status = store.status()
+            active = index_status["active"] or {}
             return {
                 "status": "available",
                 "index_path": str(faiss_path),
                 "index_files": len(index_files),
-                "vectorstore_loaded": vectorstore is not None
+                "vectorstore_loaded": store.loaded,
+                "version": active.get("version"),
+                "built_at": active.get("built_at"),
+                "load": index_status
             }
         else:
             return {
@@ -272,48 +637,414 @@ async def get_faiss_status():
             "error": str(e)
         }
 
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def arm_profiler(request: ProfileRequest):
+    """Profile the next `count` requests whose path starts with path_prefix"""
+    try:
+        session = request_profiler.arm(request.path_prefix, request.count, request.method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"armed": True, "session": session}
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profiler_status(limit: int = Query(50, ge=1, le=500)):
+    """Profiler state and the most recent saved profiles"""
+    return {**request_profiler.status(), "profiles": request_profiler.profiles(limit)}
+
+@app.delete("/admin/profile", dependencies=[Depends(require_admin)])
+async def disarm_profiler():
+    """Cancel the armed profiling session"""
+    request_profiler.disarm()
+    return request_profiler.status()
+
+@app.get("/admin/profile/{name}", dependencies=[Depends(require_admin)])
+async def get_profile(name: str, format: str = Query("pstats", pattern="^(pstats|text)$"),
+                      sort: str = "cumulative", limit: int = Query(30, ge=1, le=500)):
+    """Download a saved profile (pstats) or view its top functions (text)"""
+    path = request_profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{name}' not found")
+    if format == "text":
+        try:
+            return PlainTextResponse(request_profiler.summary(name, limit=limit, sort=sort))
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Unknown sort key '{sort}'")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
+@app.post("/admin/index/reload", status_code=202, dependencies=[Depends(require_admin)])
+async def reload_index(req: IndexReloadRequest):
+    """Load a new index version in the background and swap it in once validated"""
+    store = get_index_entry(req.index).store
+    path = req.path or str(store.index_dir)
+    if not Path(path).exists():
+        raise HTTPException(status_code=404, detail=f"Index directory '{path}' not found")
+    if not store.reload_in_background(path):
+        raise HTTPException(status_code=409, detail="An index reload is already in progress")
+    return {"status": "reloading", "index_path": path}
+
+@app.post("/admin/index/delete", dependencies=[Depends(require_admin)])
+async def delete_from_index(req: IndexDeleteRequest):
+    """Tombstone chunks so searches skip them; compacts in the background past the threshold
+
+    With missing=true, every source whose file no longer exists in the corpus is deleted.
+    """
+    entry = get_index_entry(req.index)
+    if entry.store.state == "pending":
+        await run_in_threadpool(index_registry.load, entry.name)
+    sources = list(req.sources)
+    if req.missing:
+        sources += await run_in_threadpool(entry.store.missing_sources, entry.catalog.root.as_posix())
+    if not sources and not req.ids:
+        return {"index": entry.name, "deleted": 0, "sources": []}
+    try:
+        result = await run_in_threadpool(entry.store.delete, req.ids, sources)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=f"Index delete failed: {str(e)}")
+    return {"index": entry.name, "sources": sources, **result}
+
+@app.post("/admin/index/compact", status_code=202, dependencies=[Depends(require_admin)])
+async def compact_index(req: IndexCompactRequest):
+    """Rewrite the index without its tombstoned chunks, in the background"""
+    store = get_index_entry(req.index).store
+    if not store.loaded:
+        raise HTTPException(status_code=409, detail="Index is not loaded")
+    if not store.compact_in_background():
+        raise HTTPException(status_code=409, detail="An index compaction is already in progress")
+    return {"status": "compacting", "index_path": str(store.index_dir)}
+
+# Job parameters naming directories, and the roots they must stay in
+JOB_CORPUS_PARAMS = ("data_dir",)
+JOB_OUTPUT_PARAMS = ("out_dir", "output_dir")
+
+def check_job_paths(params: Dict[str, Any]) -> None:
+    """Refuse job directories outside the configured corpora, the index parents and output/"""
+    from .analysis import resolve_corpus_path
+
+    entries = index_registry.entries.values()
+    corpus_roots = [entry.catalog.root for entry in entries]
+    output_roots = [entry.store.index_dir.parent for entry in entries] + [Path("output")]
+    for names, roots in ((JOB_CORPUS_PARAMS, corpus_roots), (JOB_OUTPUT_PARAMS, output_roots)):
+        for name in names:
+            if name not in params:
+                continue
+            for root in roots:
+                try:
+                    resolve_corpus_path(str(params[name]), str(root))
+                    break
+                except ValueError:
+                    continue
+            else:
+                allowed = ", ".join(sorted({root.as_posix() for root in roots}))
+                raise HTTPException(status_code=400, detail=f"Job parameter {name} must be inside {allowed}")
+
+@app.post("/jobs", status_code=202, dependencies=[Depends(require_admin)])
+async def submit_job(req: JobRequest):
+    """Queue a long-running job (kinds: build_index, corpus_analysis, batch_analysis; admin only)"""
+    from .jobs import QueueFullError
+
+    check_job_paths(req.params)
+    try:
+        return get_job_queue().submit(req.kind, req.params, req.timeout_seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    """List recent jobs (without results) and queue statistics"""
+    job_queue = get_job_queue()
+    return {"queue": job_queue.stats(), "jobs": job_queue.store.list(limit=limit, status=status)}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of one job"""
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    job.pop("result", None)
+    return job
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Result of a finished job"""
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is {job['status']}, no result available")
+    return {"id": job_id, "kind": job["kind"], "result": job["result"]}
+
+@app.post("/jobs/{job_id}/cancel", dependencies=[Depends(require_admin)])
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (admin only)"""
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    job.pop("result", None)
+    return job
+
 @app.post("/agent")
-async def agent_endpoint(req: AgentRequest):
-    """Agent endpoint for RAG-based SystemVerilog analysis"""
-    if not vectorstore:
-        raise HTTPException(
-            status_code=503, 
-            detail="FAISS index not available. Please run the agent first to create the index."
-        )
-    
+async def agent_endpoint(req: AgentRequest, request: Request, x_timeout_ms: Optional[int] = Header(None)):
+    """Agent endpoint for RAG-based SystemVerilog analysis (429 with Retry-After when overloaded)
+
+    With timeout_ms (or an X-Timeout-Ms header) the response arrives within
+    that budget: if the LLM cannot answer in time, only the retrieved sources
+    are returned, flagged as degraded.
+    """
+    deadline = Deadline.from_ms(req.timeout_ms or x_timeout_ms)
     try:
-        # Retrieve from FAISS
-        docs = vectorstore.similarity_search(req.query, k=req.top_k)
-        context = "\n\n".join([d.page_content for d in docs])
-
-        print(f"Context: {context}")
-
-        # Get system and user prompts
-        system_prompt = get_prompt("agent_main_system", {})
-        user_prompt = get_prompt("agent_main_user", {
-            "context": context,
-            "query": req.query
-        })
-
-        # Get response from the model
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.2
-        )
+        entry = get_index_entry(req.index)
+        if req.retrieval not in (None, "hierarchical", "flat"):
+            raise HTTPException(status_code=400, detail=f"Unknown retrieval '{req.retrieval}'. Use hierarchical or flat")
+        session = None
+        if req.session_id:
+            session = session_store.get(req.session_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail=f"Session '{req.session_id}' not found or expired")
+        key = client_key(request.headers.get("x-api-key"), request.headers.get("authorization"),
+                         request.client.host if request.client else None)
+        trace: Dict[str, Any] = {"timings_ms": {}, "cache": {}}
+        status = 500
+        try:
+            try:
+                await admission.acquire(key, deadline.remaining())
+            except AdmissionRejected as e:
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+            served = time.perf_counter()
+            trace["timings_ms"]["queue"] = round((served - deadline.started) * 1000, 2)
+            try:
+                result = await _run_agent(req, deadline, entry, session, trace)
+                status = 200
+                return result
+            finally:
+                admission.release(time.perf_counter() - served)
+        except HTTPException as e:
+            status = e.status_code
+            raise
+        finally:
+            trace["timings_ms"]["total"] = deadline.elapsed_ms()
+            query_log.log(_query_record(req, request.state.request_id, entry, session, trace, status))
+    finally:
+        # Every outcome counts: cached, degraded, invalid, rejected (429), timed out and failed requests
+        metrics.AGENT_STAGE_SECONDS.labels(stage="total").observe(time.perf_counter() - deadline.started)
+
+def _query_record(req: AgentRequest, request_id: str, entry: IndexEntry, session: Optional[Session],
+                  trace: Dict[str, Any], status: int) -> Dict[str, Any]:
+    """Query log record of one /agent request ("request" holds what a replay needs)"""
+    return {
+        "request_id": request_id,
+        "status": status,
+        "query": req.query,
+        "top_k": req.top_k,
+        "request": {"index": entry.name, "retrieval": req.retrieval, "model": req.model,
+                    "temperature": req.temperature},
+        "session": session.id if session else None,
+        "retrieval": trace.get("retrieval"),
+        "model": trace.get("model"),
+        "sources": trace.get("sources", []),
+        "chunk_ids": trace.get("chunk_ids", []),
+        "timings_ms": trace["timings_ms"],
+        "tokens": trace.get("tokens"),
+        "cache": trace["cache"],
+        "degraded": trace.get("degraded")
+    }
+
+@contextmanager
+def _stage(trace: Dict[str, Any], name: str):
+    """Time an /agent stage into the request's trace and, unless it is a replay, the stage histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        trace["timings_ms"][name] = round(seconds * 1000, 2)
+        if not trace.get("replay"):
+            metrics.AGENT_STAGE_SECONDS.labels(stage=name).observe(seconds)
+
+def _retrieval_only(req: AgentRequest, docs: List[Any], route, deadline: Deadline, reason: str,
+                    session_info: Optional[Dict[str, Any]], retrieval: Dict[str, Any]) -> Dict[str, Any]:
+    """Degraded /agent answer: the retrieved sources and snippets without an LLM answer"""
+    metrics.AGENT_DEGRADED.labels(reason=reason).inc()
+    return {
+        "answer": None,
+        "degraded": True,
+        "degraded_reason": reason,
+        "sources": [d.metadata for d in docs],
+        "snippets": [{"source": d.metadata.get("source"), "text": d.page_content[:500]} for d in docs],
+        "query": req.query,
+        "top_k": req.top_k,
+        "model": route.model,
+        "route": route.to_dict(),
+        "session": session_info,
+        "retrieval": retrieval,
+        "elapsed_ms": deadline.elapsed_ms()
+    }
+
+async def _run_agent(req: AgentRequest, deadline: Deadline, entry: IndexEntry,
+                     session: Optional[Session] = None, trace: Optional[Dict[str, Any]] = None,
+                     replay: bool = False) -> Dict[str, Any]:
+    """Retrieve, prompt and complete within the deadline; blocking calls run in worker threads
+
+    In a session, the follow-up is retrieved together with the previous
+    question and only chunks the conversation has not seen yet are sent.
+    With a summary index, chunks are searched only within the best matching files.
+    An index that is not in memory is loaded first (possibly unloading others).
+    Stateless answers are served from the answer cache when the prompt is unchanged.
+    Stage timings, sources, tokens and cache status are recorded into trace.
+    A replay (prewarm) only fills the caches: it is kept out of the metrics and
+    returns without an answer instead of calling the LLM on an answer cache miss.
+    """
+    from .llm_client import call_with_deadline
+
+    trace = trace if trace is not None else {"timings_ms": {}, "cache": {}}
+    trace["replay"] = replay
+    if entry.store.state == "pending":
+        await run_in_threadpool(index_registry.load, entry.name)
+    # Pinning takes the store lock (and may wait for a load), so it runs off the event loop
+    version = await run_in_threadpool(entry.store.pin)
+    try:
+        vectorstore = version.vectorstore if version is not None else None
+        if not vectorstore:
+            raise HTTPException(
+                status_code=503, 
+                detail="FAISS index not available. Please run the agent first to create the index."
+            )
+
+        # Retrieve from FAISS (the pinned version survives a concurrent reload)
+        try:
+            with _stage(trace, "embed"):
+                search_text = f"{session.last_query()}\n{req.query}" if session and session.last_query() else req.query
+                embedding, embedding_cached = await deadline.run(
+                    "embed", run_in_threadpool(call_with_deadline, deadline.at, entry.store.embed_query_cached, search_text,
+                                              count=not replay)
+                )
+                trace["cache"]["embedding"] = "hit" if embedding_cached else "miss"
+            hierarchical = version.hierarchy is not None and (req.retrieval or RETRIEVAL_MODE) == "hierarchical"
+            retrieval = {"index": entry.name, "mode": "hierarchical" if hierarchical else "flat", "candidate_files": None}
+            # Both paths skip chunks that were deleted (tombstoned) since the index was built
+            with _stage(trace, "search"):
+                if hierarchical:
+                    docs, retrieval["candidate_files"] = await deadline.run(
+                        "search", run_in_threadpool(version.search_files, embedding, req.top_k, SUMMARY_FILES)
+                    )
+                else:
+                    scored = await deadline.run("search", run_in_threadpool(version.search, embedding, req.top_k))
+                    docs = [doc for doc, _ in scored]
+            trace["retrieval"] = retrieval["mode"]
+            trace["sources"] = [d.metadata.get("source") for d in docs]
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=f"Agent query deadline exceeded: {str(e)}")
+        except Exception as e:
+            raise upstream_http_error(e, "Agent query")
+    finally:
+        entry.store.unpin(version)
+
+    try:
+        with _stage(trace, "prompt"):
+            doc_ids = [chunk_id(d.metadata.get("source"), d.page_content) for d in docs]
+            trace["chunk_ids"] = doc_ids
+            seen = session.seen_chunks() if session else set()
+            new_ids = [cid for cid in doc_ids if cid not in seen]
+            history = session.history_messages() if session else []
+            context = "\n\n".join([d.page_content for d, cid in zip(docs, doc_ids) if cid not in seen])
+            if session and not context:
+                context = "(No new code context: the relevant code is in the earlier messages.)"
+            history_chars = sum(len(m["content"]) for m in history)
+            route = model_router.route(req.query, task="agent", context_chars=len(context) + history_chars,
+                                       override=req.model, count=not replay)
+            session_info = {
+                "session_id": session.id, "turn": len(session.turns) + 1,
+                "new_chunks": len(new_ids), "reused_chunks": len(doc_ids) - len(new_ids)
+            } if session else None
+
+            # Get system and user prompts
+            system_prompt = get_prompt("agent_main_system", {})
+            user_prompt = get_prompt("agent_main_user", {
+                "context": context,
+                "query": req.query
+            })
+        trace["model"] = route.model
+
+        # Sessions depend on their history, so only stateless answers are cached
+        answer_key = None
+        if answer_cache is None or session:
+            trace["cache"]["answer"] = "bypass"
+        else:
+            answer_key = make_key("agent", route.model, req.temperature, system_prompt, user_prompt)
+            cached = await run_in_threadpool(answer_cache.get, answer_key, count=not replay)
+            trace["cache"]["answer"] = "hit" if cached is not None else "miss"
+            if cached is not None:
+                trace["tokens"] = {"prompt": 0, "completion": 0}
+                return {
+                    "answer": cached["answer"],
+                    "degraded": False,
+                    "cached": True,
+                    "sources": [d.metadata for d in docs],
+                    "query": req.query,
+                    "top_k": req.top_k,
+                    "model": route.model,
+                    "route": route.to_dict(),
+                    "session": session_info,
+                    "retrieval": retrieval,
+                    "elapsed_ms": deadline.elapsed_ms()
+                }
+
+        if replay:
+            return {"answer": None, "degraded": False, "cached": False, "query": req.query,
+                    "top_k": req.top_k, "model": route.model, "retrieval": retrieval}
+
+        # Get response from the model, unless too little of the budget is left for it
+        llm_budget = deadline.stage_budget("llm")
+        if llm_budget is not None and llm_budget < MIN_LLM_SECONDS:
+            trace["degraded"] = "no_budget_for_llm"
+            return _retrieval_only(req, docs, route, deadline, "no_budget_for_llm", session_info, retrieval)
+        # The transport caps each attempt at the time left and stops retrying at the deadline,
+        # so the worker thread is freed soon after deadline.run() gives up on the call
+        llm_deadline = time.perf_counter() + llm_budget if llm_budget is not None else None
+        try:
+            with _stage(trace, "llm"):
+                response = await deadline.run("llm", run_in_threadpool(
+                    call_with_deadline,
+                    llm_deadline,
+                    get_client().chat.completions.create,
+                    model=route.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        *history,
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=req.temperature
+                ))
+        except DeadlineExceeded:
+            trace["degraded"] = "llm_timeout"
+            return _retrieval_only(req, docs, route, deadline, "llm_timeout", session_info, retrieval)
+        metrics.record_usage(route.model, response.usage)
+        usage = response.usage
+        trace["tokens"] = {"prompt": getattr(usage, "prompt_tokens", 0) or 0,
+                           "completion": getattr(usage, "completion_tokens", 0) or 0}
+        answer = response.choices[0].message.content
+        if session:
+            session_store.add_turn(session, Turn(req.query, user_prompt, answer or "", new_ids))
+        if answer_key is not None and answer:
+            await run_in_threadpool(answer_cache.set, answer_key, {"answer": answer, "model": route.model})
 
         return {
-            "answer": response.choices[0].message.content,
+            "answer": answer,
+            "degraded": False,
+            "cached": False,
             "sources": [d.metadata for d in docs],
             "query": req.query,
-            "top_k": req.top_k
+            "top_k": req.top_k,
+            "model": route.model,
+            "route": route.to_dict(),
+            "session": session_info,
+            "retrieval": retrieval,
+            "elapsed_ms": deadline.elapsed_ms()
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Agent query failed: {str(e)}")
+        raise upstream_http_error(e, "Agent query")
 
 if __name__ == "__main__":
     import uvicorn
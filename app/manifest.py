@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Index Manifest - Records what a persisted FAISS index was built from
+
+The manifest (manifest.json next to index.faiss/index.pkl) lets loaders
+decide whether an index on disk still matches the corpus and the embedding
+model, so it can be reused instead of re-embedding everything.
+
+Compaction does not touch the files a build wrote: it writes a complete
+version under versions/ and points CURRENT at it with one atomic rename.
+resolve_index_dir() gives the directory loaders should read; a build that
+writes index files after the switch takes precedence again.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+MANIFEST_VERSION = 1
+DEFAULT_EXTENSIONS = ["sv", "svh"]
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_OVERLAP = 200
+
+
+def corpus_files(data_dir: str, extensions: Optional[List[str]] = None) -> List[Path]:
+    """Sorted list of corpus files with the given extensions"""
+    root = Path(data_dir)
+    files = []
+    for ext in extensions or DEFAULT_EXTENSIONS:
+        files.extend(root.rglob(f"*.{ext}"))
+    return sorted(files)
+
+
+def corpus_fingerprint(data_dir: str, extensions: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Content hash over all corpus files (relative path + content of each file)"""
+    root = Path(data_dir)
+    digest = hashlib.sha256()
+    files = corpus_files(data_dir, extensions)
+    total_bytes = 0
+    for path in files:
+        content = path.read_bytes()
+        total_bytes += len(content)
+        digest.update(path.relative_to(root).as_posix().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(hashlib.sha256(content).digest())
+    return {"corpus_hash": digest.hexdigest(), "file_count": len(files), "total_bytes": total_bytes}
+
+
+def write_manifest(index_dir: str, data_dir: str, embedding_model: str, chunk_count: int,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+                   extensions: Optional[List[str]] = None, **extra: Any) -> Dict[str, Any]:
+    """Write manifest.json for a freshly saved index and return it"""
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "data_dir": str(data_dir),
+        "extensions": list(extensions or DEFAULT_EXTENSIONS),
+        "embedding_model": embedding_model,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunk_count": chunk_count,
+        **corpus_fingerprint(data_dir, extensions),
+        **extra
+    }
+    path = Path(index_dir) / MANIFEST_FILE
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    tmp_path.replace(path)
+    return manifest
+
+
+def resolve_index_dir(index_dir: str) -> Path:
+    """Directory holding the live index files: the version CURRENT points to, else index_dir"""
+    root = Path(index_dir)
+    pointer = root / CURRENT_FILE
+    try:
+        name = pointer.read_text(encoding="utf-8").strip()
+        switched_at = pointer.stat().st_mtime_ns
+    except OSError:
+        return root
+    target = root / VERSIONS_DIR / name
+    built = [(root / file).stat().st_mtime_ns for file in ("index.faiss", "index.pkl") if (root / file).exists()]
+    if not name or not (target / "index.faiss").exists() or (built and max(built) > switched_at):
+        return root
+    return target
+
+
+def switch_index_version(index_dir: str, name: str) -> None:
+    """Atomically point index_dir at versions/<name>"""
+    pointer = Path(index_dir) / CURRENT_FILE
+    tmp_path = pointer.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(pointer)
+
+
+def read_manifest(index_dir: str) -> Optional[Dict[str, Any]]:
+    """Return the manifest of an index directory, or None if it has none"""
+    path = Path(index_dir) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def update_manifest(index_dir: str, **fields: Any) -> Optional[Dict[str, Any]]:
+    """Change fields of an existing manifest in place (e.g. after a compaction); None without one"""
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        return None
+    manifest.update(fields)
+    path = Path(index_dir) / MANIFEST_FILE
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    tmp_path.replace(path)
+    return manifest
+
+
+def manifest_mismatch(manifest: Optional[Dict[str, Any]], data_dir: str, embedding_model: str,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+                      extensions: Optional[List[str]] = None) -> Optional[str]:
+    """Explain why an index cannot be reused, or return None when it matches"""
+    if manifest is None:
+        return "index has no manifest"
+    if manifest.get("embedding_model") != embedding_model:
+        return f"embedding model is {manifest.get('embedding_model')}, expected {embedding_model}"
+    if (manifest.get("chunk_size"), manifest.get("chunk_overlap")) != (chunk_size, chunk_overlap):
+        return "chunking parameters changed"
+    if manifest.get("corpus_hash") != corpus_fingerprint(data_dir, extensions)["corpus_hash"]:
+        return f"corpus in {data_dir} changed since the index was built"
+    return None
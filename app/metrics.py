@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Metrics - Minimal in-process Prometheus registry (counters, gauges, histograms)
+
+Rendered in the Prometheus text exposition format by GET /metrics. Only the
+standard library is used so that importing it keeps service startup fast.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Latency buckets in seconds, from sub-millisecond FAISS searches to long completions
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+BUILD_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class: a named metric family with optional labels"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, **labels: Any) -> Any:
+        """Child metric for one combination of label values"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _unlabelled(self) -> Any:
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels()")
+        return self.labels()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        return "\n".join(lines + self._samples())
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._children.items())
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_format_value(child.value)}" for key, child in items]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the value at scrape time (e.g. a cache hit ratio)"""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return float("nan")
+        return self.value
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        """Increment while the block runs"""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+    def track_inprogress(self):
+        return self._unlabelled().track_inprogress()
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._children.items())
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_format_value(child.get())}" for key, child in items]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values (latencies in seconds)"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._children.items())
+        lines = []
+        for key, child in items:
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metric families rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "verigpt_http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "verigpt_http_requests_in_flight", "HTTP requests currently being served", ("route",))
+AGENT_STAGE_SECONDS = REGISTRY.histogram(
+    "verigpt_agent_stage_seconds", "Latency of each /agent stage (embed, search, prompt, llm, total)", ("stage",))
+INDEX_BUILD_STAGE_SECONDS = REGISTRY.histogram(
+    "verigpt_index_build_stage_seconds", "Duration of each index build stage (discover, read, split, embed, add, save, total)",
+    ("stage",), buckets=BUILD_BUCKETS)
+LLM_TOKENS = REGISTRY.counter(
+    "verigpt_llm_tokens_total", "Tokens used by chat completions", ("model", "type"))
+OPENAI_IN_FLIGHT = REGISTRY.gauge(
+    "verigpt_openai_requests_in_flight", "OpenAI HTTP requests currently in flight", ("operation",))
+OPENAI_RETRIES = REGISTRY.counter(
+    "verigpt_openai_retries_total", "OpenAI HTTP requests retried after a transient failure", ("operation",))
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "verigpt_cache_hit_ratio", "Hit ratio of result caches since startup", ("cache",))
+AGENT_DEGRADED = REGISTRY.counter(
+    "verigpt_agent_degraded_total", "/agent answers degraded to retrieval only (llm_timeout, no_budget_for_llm)",
+    ("reason",))
+ADMISSION_ACTIVE = REGISTRY.gauge(
+    "verigpt_admission_active", "/agent requests holding an admission slot")
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge(
+    "verigpt_admission_queue_depth", "/agent requests waiting for an admission slot")
+ADMISSION_REJECTED = REGISTRY.counter(
+    "verigpt_admission_rejected_total", "/agent requests rejected with 429 (queue_full, key_queue_full, deadline, wait_timeout)",
+    ("reason",))
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "verigpt_admission_wait_seconds", "Time admitted /agent requests spent in the queue")
+INDEXES_LOADED = REGISTRY.gauge(
+    "verigpt_indexes_loaded", "Named indexes currently loaded in memory")
+INDEX_RESIDENT_BYTES = REGISTRY.gauge(
+    "verigpt_index_resident_bytes", "Approximate memory held by the loaded indexes")
+INDEX_EVICTIONS = REGISTRY.counter(
+    "verigpt_index_evictions_total", "Indexes unloaded to stay within the memory budget")
+
+
+def record_usage(model: str, usage: Any) -> None:
+    """Count prompt and completion tokens from an OpenAI usage object"""
+    if usage is None:
+        return
+    LLM_TOKENS.labels(model=model, type="prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(model=model, type="completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def observe_index_build(stage_seconds: Dict[str, float]) -> None:
+    """Record the stage timings reported by an index build"""
+    for stage, seconds in stage_seconds.items():
+        INDEX_BUILD_STAGE_SECONDS.labels(stage=stage).observe(seconds)
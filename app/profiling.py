@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Request Profiling - Opt-in cProfile capture for selected API requests
+
+Profiling is armed by an admin, either for the next N requests whose path
+starts with a prefix, or for a single request sent with "X-Profile: 1" and
+a valid admin token. Each captured request is written to
+output/profiles/<timestamp>-<request id>.prof in pstats format (readable
+with pstats, snakeviz or speedscope). When nothing is armed the middleware
+only checks one attribute and one header per request.
+
+A profiled request gets a cProfile profiler on the event loop thread, and
+every call it hands to a worker thread through call_profiled() (the API's
+run_in_threadpool does so) runs under a profiler of its own; the worker
+profiles are merged into the request's file. Other requests running on the
+event loop meanwhile still show up in its part. Only one request is
+profiled at a time.
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PROFILE_DIR = "output/profiles"
+MAX_PROFILES_PER_SESSION = 100
+SAFE_ID_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class RequestCapture:
+    """Profiles of one request: its event loop part and every worker thread call it made"""
+
+    def __init__(self):
+        self.loop = cProfile.Profile()
+        self.workers: List[cProfile.Profile] = []
+        self.token = None
+        self._lock = threading.Lock()
+
+    def run(self, func, *args: Any, **kwargs: Any) -> Any:
+        """Run func in the current (worker) thread under a profiler of its own"""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with self._lock:
+                self.workers.append(profiler)
+
+    def stats(self) -> pstats.Stats:
+        """Event loop and worker profiles merged into one"""
+        stats = pstats.Stats(self.loop)
+        with self._lock:
+            for profiler in self.workers:
+                stats.add(profiler)
+        return stats
+
+
+# Capture of the request being served, visible to the worker threads it uses (contexts are copied)
+_capture: ContextVar[Optional[RequestCapture]] = ContextVar("verigpt_profile_capture", default=None)
+
+
+def call_profiled(func, *args: Any, **kwargs: Any) -> Any:
+    """Run func; profiled when the calling request is being profiled (use it in worker threads)"""
+    capture = _capture.get()
+    if capture is None:
+        return func(*args, **kwargs)
+    return capture.run(func, *args, **kwargs)
+
+
+class ProfileSession:
+    """Capture the next `count` requests matching a path prefix (and method)"""
+
+    def __init__(self, path_prefix: str, count: int = 1, method: Optional[str] = None):
+        self.path_prefix = path_prefix
+        self.method = method.upper() if method else None
+        self.remaining = count
+        self.requested = count
+        self.created_at = datetime.now(timezone.utc).isoformat()
+
+    def matches(self, method: str, path: str) -> bool:
+        return path.startswith(self.path_prefix) and (self.method is None or self.method == method)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path_prefix": self.path_prefix,
+            "method": self.method,
+            "requested": self.requested,
+            "remaining": self.remaining,
+            "created_at": self.created_at
+        }
+
+
+class RequestProfiler:
+    """Decides which requests to profile and writes their profiles to disk"""
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR):
+        self.output_dir = Path(output_dir)
+        self.session: Optional[ProfileSession] = None
+        self.armed = False
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+
+    def arm(self, path_prefix: str, count: int = 1, method: Optional[str] = None) -> Dict[str, Any]:
+        """Profile the next `count` requests matching the prefix"""
+        if not 1 <= count <= MAX_PROFILES_PER_SESSION:
+            raise ValueError(f"count must be between 1 and {MAX_PROFILES_PER_SESSION}")
+        with self._lock:
+            self.session = ProfileSession(path_prefix, count, method)
+            self.armed = True
+            return self.session.to_dict()
+
+    def disarm(self) -> None:
+        with self._lock:
+            self.session = None
+            self.armed = False
+
+    def claim(self, method: str, path: str) -> bool:
+        """True if this request should be profiled by the armed session (uses one slot)"""
+        with self._lock:
+            session = self.session
+            if session is None or not session.matches(method, path):
+                return False
+            session.remaining -= 1
+            if session.remaining <= 0:
+                self.session = None
+                self.armed = False
+            return True
+
+    def start(self) -> Optional[RequestCapture]:
+        """Start profiling the current request, or None when another request is being profiled"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        capture = RequestCapture()
+        capture.token = _capture.set(capture)
+        capture.loop.enable()
+        return capture
+
+    def finish(self, capture: RequestCapture, request_id: str, method: str, path: str,
+               status: int, seconds: float) -> Path:
+        """Stop profiling and dump the merged stats"""
+        try:
+            capture.loop.disable()
+            _capture.reset(capture.token)
+        finally:
+            self._busy.release()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path_out = self.output_dir / f"{stamp}-{SAFE_ID_RE.sub('_', request_id)[:64]}.prof"
+        capture.stats().dump_stats(str(path_out))
+        print(f"🔬 Profiled {method} {path} [{request_id}] -> {status} in {seconds * 1000:.1f} ms "
+              f"({len(capture.workers)} worker calls), saved to {path_out}")
+        return path_out
+
+    def profiles(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent profile files first"""
+        if not self.output_dir.exists():
+            return []
+        files = sorted(self.output_dir.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [
+            {"name": p.name, "bytes": p.stat().st_size,
+             "created_at": datetime.fromtimestamp(p.stat().st_mtime, timezone.utc).isoformat()}
+            for p in files[:limit]
+        ]
+
+    def profile_path(self, name: str) -> Optional[Path]:
+        """Path of a saved profile by file name (no directory traversal)"""
+        if SAFE_ID_RE.sub("_", name) != name or not name.endswith(".prof"):
+            return None
+        path = self.output_dir / name
+        return path if path.exists() else None
+
+    def summary(self, name: str, limit: int = 30, sort: str = "cumulative") -> Optional[str]:
+        """Top functions of a saved profile as pstats text"""
+        path = self.profile_path(name)
+        if path is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(str(path), stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            session = self.session.to_dict() if self.session else None
+        return {"armed": self.armed, "session": session, "output_dir": self.output_dir.as_posix()}
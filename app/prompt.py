@@ -1,5 +1,4 @@
 from pathlib import Path
-from langchain.prompts import PromptTemplate
 
 def get_prompt(prompt_fn: str, params: dict, base_dir: str = "prompts") -> str:
     """
@@ -18,6 +17,9 @@ def get_prompt(prompt_fn: str, params: dict, base_dir: str = "prompts") -> str:
     with open(file_path, "r", encoding="utf-8") as f:
         prompt_template = f.read()
 
+    # Imported here so that importing this module does not pull in LangChain
+    from langchain.prompts import PromptTemplate
+
     template = PromptTemplate(
         input_variables=list(params.keys()),
         template=prompt_template,
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Query Log - Structured /agent records written off the request path
+
+Every /agent request enqueues one JSON record (query, top_k, index,
+retrieved sources and chunk ids, per-stage timings, token counts, cache
+status, outcome). A background thread appends them to
+output/logs/queries.jsonl in batches, every VERIGPT_QUERY_LOG_FLUSH_RECORDS
+records or VERIGPT_QUERY_LOG_FLUSH_SECONDS, and rotates the file by size
+(queries.jsonl.1, .2, ...). Requests never wait for the disk: when the queue
+is full, records are dropped and counted.
+
+The same records feed offline analytics and the startup prewarm:
+
+    python -m app.query_log                     top queries, latency percentiles, cache hit ratios
+    python -m app.query_log --top 20 --json
+    verigpt analytics
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_PATH = "output/logs/queries.jsonl"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+STAGES = ["queue", "embed", "search", "prompt", "llm", "total"]
+
+
+def normalize_query(query: str) -> str:
+    """Grouping key for analytics: case and whitespace differences are the same query"""
+    return " ".join((query or "").lower().split())
+
+
+class QueryLog:
+    """Bounded in-memory queue drained to a rotating JSONL file by a daemon thread"""
+
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = DEFAULT_MAX_BYTES, backups: int = DEFAULT_BACKUPS,
+                 flush_records: int = 100, flush_seconds: float = 1.0, max_queue: int = 10000):
+        """path None disables logging; max_bytes 0 disables rotation"""
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_records = max(1, flush_records)
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.batches = 0
+
+    @classmethod
+    def from_env(cls) -> "QueryLog":
+        """Settings from VERIGPT_QUERY_LOG* (VERIGPT_QUERY_LOG=off disables the log)"""
+        path = os.getenv("VERIGPT_QUERY_LOG", DEFAULT_PATH)
+        return cls(
+            path=None if path.lower() in ("", "0", "off") else path,
+            max_bytes=int(float(os.getenv("VERIGPT_QUERY_LOG_MAX_MB", "10")) * 1024 * 1024),
+            backups=int(os.getenv("VERIGPT_QUERY_LOG_BACKUPS", str(DEFAULT_BACKUPS))),
+            flush_records=int(os.getenv("VERIGPT_QUERY_LOG_FLUSH_RECORDS", "100")),
+            flush_seconds=float(os.getenv("VERIGPT_QUERY_LOG_FLUSH_SECONDS", "1.0"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start(self) -> None:
+        """Start the writer thread (idempotent)"""
+        with self._lock:
+            if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="verigpt-query-log", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write everything queued so far and stop the writer thread"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self._thread = None
+
+    def log(self, record: Dict[str, Any]) -> bool:
+        """Enqueue one record without blocking; False when it was dropped"""
+        if not self.enabled:
+            return False
+        record.setdefault("ts", datetime.now(timezone.utc).isoformat())
+        self.start()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            flush_at = time.monotonic() + self.flush_seconds
+            while len(batch) < self.flush_records:
+                try:
+                    record = self._queue.get(timeout=max(0.0, flush_at - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    self.dropped += len(batch)
+                    print(f"⚠️  Query log write failed, dropped {len(batch)} records: {e}")
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(record, default=str) + "\n" for record in batch)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if self.max_bytes and size and size + len(data.encode("utf-8")) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+        self.written += len(batch)
+        self.batches += 1
+
+    def _rotate(self) -> None:
+        """queries.jsonl -> .1 -> .2 ...; the oldest backup beyond the limit is removed"""
+        if self.backups <= 0:
+            self.path.unlink()
+        else:
+            for i in range(self.backups - 1, 0, -1):
+                older = self.path.with_name(f"{self.path.name}.{i}")
+                if older.exists():
+                    os.replace(older, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self.rotations += 1
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "path": self.path.as_posix() if self.path else None,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "rotations": self.rotations
+        }
+
+
+def log_files(path: str = DEFAULT_PATH) -> List[Path]:
+    """The log and its rotated backups, oldest first"""
+    base = Path(path)
+    backups = [p for p in base.parent.glob(base.name + ".*") if p.suffix[1:].isdigit()]
+    backups.sort(key=lambda p: int(p.suffix[1:]), reverse=True)
+    return backups + ([base] if base.exists() else [])
+
+
+def read_records(path: str = DEFAULT_PATH) -> Iterator[Dict[str, Any]]:
+    """Records of the log and its backups, oldest first (torn lines are skipped)"""
+    for file_path in log_files(path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile (p in 0..100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), int(round(p / 100.0 * len(ordered) + 0.5))))
+    return ordered[rank - 1]
+
+
+def _ratio(counter: Counter) -> Optional[float]:
+    looked_up = counter["hit"] + counter["miss"]
+    return round(counter["hit"] / looked_up, 3) if looked_up else None
+
+
+def analyze(records: List[Dict[str, Any]], top: int = 10) -> Dict[str, Any]:
+    """Top queries, per-stage latency percentiles and cache hit ratios of logged requests"""
+    queries: Counter = Counter()
+    examples: Dict[str, str] = {}
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    caches: Dict[str, Counter] = {}
+    statuses: Counter = Counter()
+    degraded: Counter = Counter()
+    tokens: Counter = Counter()
+    for record in records:
+        key = normalize_query(record.get("query", ""))
+        queries[key] += 1
+        examples.setdefault(key, record.get("query", ""))
+        statuses[str(record.get("status"))] += 1
+        if record.get("degraded"):
+            degraded[record["degraded"]] += 1
+        for stage, ms in (record.get("timings_ms") or {}).items():
+            if ms is not None:
+                timings.setdefault(stage, []).append(ms)
+        for cache, state in (record.get("cache") or {}).items():
+            caches.setdefault(cache, Counter())[state] += 1
+        for kind, count in (record.get("tokens") or {}).items():
+            tokens[kind] += count or 0
+    return {
+        "requests": len(records),
+        "first": records[0].get("ts") if records else None,
+        "last": records[-1].get("ts") if records else None,
+        "status": dict(statuses),
+        "degraded": dict(degraded),
+        "top_queries": [{"query": examples[key], "count": count} for key, count in queries.most_common(top)],
+        "distinct_queries": len(queries),
+        "latency_ms": {
+            stage: {"count": len(values), "p50": percentile(values, 50), "p90": percentile(values, 90),
+                    "p99": percentile(values, 99), "max": max(values)}
+            for stage, values in timings.items() if values
+        },
+        "cache": {cache: {**dict(counter), "hit_ratio": _ratio(counter)} for cache, counter in caches.items()},
+        "tokens": dict(tokens)
+    }
+
+
+def top_requests(path: str = DEFAULT_PATH, limit: int = 20) -> List[Dict[str, Any]]:
+    """The most frequent successful stateless requests, replayable to prewarm caches
+
+    Records are grouped by everything that determines the answer (index,
+    query, top_k, retrieval, model, temperature); session turns are skipped.
+    """
+    counts: Counter = Counter()
+    for record in read_records(path):
+        if record.get("status") != 200 or record.get("session"):
+            continue
+        request = record.get("request") or {}
+        counts[json.dumps({"query": record.get("query"), "top_k": record.get("top_k"), **request},
+                          sort_keys=True)] += 1
+    return [{**json.loads(key), "count": count} for key, count in counts.most_common(limit)]
+
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    lines = [f"📒 {report['requests']} logged /agent requests ({report['first']} .. {report['last']}), "
+             f"{report['distinct_queries']} distinct queries"]
+    if report["status"]:
+        lines.append("   Status: " + ", ".join(f"{status} x{count}" for status, count in report["status"].items()))
+    if report["degraded"]:
+        lines.append("   Degraded: " + ", ".join(f"{reason} x{count}" for reason, count in report["degraded"].items()))
+    lines.append("\n🔝 Top queries")
+    for rank, item in enumerate(report["top_queries"], start=1):
+        lines.append(f"   {rank:>2}. {item['count']:>5}  {item['query'][:100]}")
+    lines.append("\n⏱️  Latency (ms)   count      p50      p90      p99      max")
+    for stage, values in report["latency_ms"].items():
+        lines.append(f"   {stage:<12} {values['count']:>6} {values['p50']:>8.1f} {values['p90']:>8.1f} "
+                     f"{values['p99']:>8.1f} {values['max']:>8.1f}")
+    lines.append("\n💾 Cache hit ratios")
+    for cache, counts in report["cache"].items():
+        states = ", ".join(f"{state} {count}" for state, count in counts.items() if state != "hit_ratio")
+        lines.append(f"   {cache:<12} {counts['hit_ratio'] if counts['hit_ratio'] is not None else '-'}  ({states})")
+    if report["tokens"]:
+        lines.append("\n🔢 Tokens: " + ", ".join(f"{kind} {count}" for kind, count in report["tokens"].items()))
+    return lines
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Analytics of the /agent query log")
+    parser.add_argument("--path", default=os.getenv("VERIGPT_QUERY_LOG", DEFAULT_PATH),
+                        help="Query log (rotated backups are read too)")
+    parser.add_argument("--top", type=int, default=10, help="Number of top queries to list")
+    parser.add_argument("--json", action="store_true")
+    return parser
+
+
+def run(args: argparse.Namespace) -> int:
+    """Print the analytics report of the log named by args.path"""
+    if not log_files(args.path):
+        print(f"❌ No query log at {args.path}")
+        return 1
+    report = analyze(list(read_records(args.path)), top=args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("\n".join(format_report(report)))
+    return 0
+
+
+def main() -> int:
+    return run(build_parser().parse_args())
+
+
+if __name__ == "__main__":
+    exit(main())
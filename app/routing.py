@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Model Routing - Chooses between the fast and the strong LLM per request
+
+Rules are checked in order and the first match wins; a request matching no
+rule takes the default route. A rule can match on the task (agent, analyze,
+files, corpus), intent keywords in the query, query length and retrieved-context
+size, and sends the request either to a tier ("fast" or "strong") or to an
+explicit model. An explicit model in the request always wins.
+
+The tier models come from VERIGPT_MODEL_FAST / VERIGPT_MODEL_STRONG, and the
+rules can be replaced with a JSON list in the file named by
+VERIGPT_ROUTING_RULES (same fields as DEFAULT_RULES).
+"""
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+DEFAULT_FAST_MODEL = "gpt-4o-mini"
+DEFAULT_STRONG_MODEL = "gpt-4"
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"name": "multi-file", "tasks": ["files", "corpus"], "tier": "strong"},
+    {
+        "name": "deep-verification",
+        "keywords": [
+            "assert", "assertion", "sva", "property", "sequence", "cover", "coverage", "formal",
+            "verify", "verification", "testbench", "edge case", "corner case", "protocol",
+            "race", "deadlock", "cdc", "clock domain", "timing", "bug", "debug", "why"
+        ],
+        "tier": "strong"
+    },
+    {"name": "large-context", "min_context_chars": 12000, "tier": "strong"},
+    {"name": "long-query", "min_query_chars": 600, "tier": "strong"},
+]
+DEFAULT_ROUTE = {"name": "lookup", "tier": "fast"}
+
+
+class Route(NamedTuple):
+    """Outcome of routing one request"""
+    name: str
+    model: str
+    reason: str
+    overridden: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+class RoutingRule:
+    """One routing rule; every condition that is set must hold"""
+
+    def __init__(self, name: str, tier: Optional[str] = None, model: Optional[str] = None,
+                 tasks: Optional[List[str]] = None, keywords: Optional[List[str]] = None,
+                 min_query_chars: Optional[int] = None, max_query_chars: Optional[int] = None,
+                 min_context_chars: Optional[int] = None, max_context_chars: Optional[int] = None):
+        if not tier and not model:
+            raise ValueError(f"Routing rule '{name}' needs a tier or a model")
+        self.name = name
+        self.tier = tier
+        self.model = model
+        self.tasks = tasks
+        self.keywords = keywords
+        self.min_query_chars = min_query_chars
+        self.max_query_chars = max_query_chars
+        self.min_context_chars = min_context_chars
+        self.max_context_chars = max_context_chars
+        # Keywords match at word starts, so "assert" also matches "assertions"
+        self._keyword_re = (
+            re.compile(r"\b(?:" + "|".join(re.escape(k.lower()) for k in keywords) + ")", re.IGNORECASE)
+            if keywords else None
+        )
+
+    def match(self, task: str, query: str, context_chars: int) -> Optional[str]:
+        """Return why the rule matches, or None"""
+        if self.tasks is not None and task not in self.tasks:
+            return None
+        reasons = []
+        if self.tasks is not None:
+            reasons.append(f"task {task}")
+        if self._keyword_re is not None:
+            found = self._keyword_re.search(query)
+            if not found:
+                return None
+            reasons.append(f"keyword '{found.group(0).lower()}'")
+        if self.min_query_chars is not None:
+            if len(query) < self.min_query_chars:
+                return None
+            reasons.append(f"query {len(query)} >= {self.min_query_chars} chars")
+        if self.max_query_chars is not None:
+            if len(query) > self.max_query_chars:
+                return None
+            reasons.append(f"query {len(query)} <= {self.max_query_chars} chars")
+        if self.min_context_chars is not None:
+            if context_chars < self.min_context_chars:
+                return None
+            reasons.append(f"context {context_chars} >= {self.min_context_chars} chars")
+        if self.max_context_chars is not None:
+            if context_chars > self.max_context_chars:
+                return None
+            reasons.append(f"context {context_chars} <= {self.max_context_chars} chars")
+        return ", ".join(reasons) or "always"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in vars(self).items() if not key.startswith("_") and value is not None}
+
+
+class ModelRouter:
+    """Ordered rule list plus per-route counters"""
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None,
+                 default: Optional[Dict[str, Any]] = None,
+                 tiers: Optional[Dict[str, str]] = None):
+        self.tiers = tiers or {"fast": DEFAULT_FAST_MODEL, "strong": DEFAULT_STRONG_MODEL}
+        self.rules = [RoutingRule(**rule) for rule in (DEFAULT_RULES if rules is None else rules)]
+        self.default = RoutingRule(**(default or DEFAULT_ROUTE))
+        for rule in self.rules + [self.default]:
+            if rule.tier and rule.tier not in self.tiers:
+                raise ValueError(f"Routing rule '{rule.name}' uses unknown tier '{rule.tier}'")
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        """Router configured from VERIGPT_MODEL_* and VERIGPT_ROUTING_RULES"""
+        tiers = {
+            "fast": os.getenv("VERIGPT_MODEL_FAST", DEFAULT_FAST_MODEL),
+            "strong": os.getenv("VERIGPT_MODEL_STRONG", DEFAULT_STRONG_MODEL),
+        }
+        rules = None
+        rules_path = os.getenv("VERIGPT_ROUTING_RULES")
+        if rules_path:
+            with open(rules_path, "r", encoding="utf-8") as f:
+                rules = json.load(f)
+        return cls(rules=rules, tiers=tiers)
+
+    def model_for(self, rule: RoutingRule) -> str:
+        """Model a rule sends requests to"""
+        return rule.model or self.tiers[rule.tier]
+
+    def route(self, query: str, task: str = "agent", context_chars: int = 0,
+              override: Optional[str] = None, count: bool = True) -> Route:
+        """Pick the model for one request (count=False keeps it out of the route counters)"""
+        if override:
+            route = Route("override", override, "model set in request", overridden=True)
+        else:
+            route = None
+            for rule in self.rules:
+                reason = rule.match(task, query, context_chars)
+                if reason is not None:
+                    route = Route(rule.name, self.model_for(rule), reason)
+                    break
+            if route is None:
+                route = Route(self.default.name, self.model_for(self.default), "no rule matched")
+        if count:
+            with self._lock:
+                self._counts[(route.name, route.model)] += 1
+        return route
+
+    def stats(self) -> Dict[str, Any]:
+        """Configured tiers and rules plus how often each route was taken"""
+        with self._lock:
+            counts = [
+                {"route": name, "model": model, "requests": count}
+                for (name, model), count in self._counts.most_common()
+            ]
+        return {
+            "tiers": self.tiers,
+            "rules": [rule.to_dict() for rule in self.rules],
+            "default": self.default.to_dict(),
+            "routes": counts
+        }
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Sessions - Server-side conversation state for multi-turn /agent queries
+
+A session keeps the last few turns (question, answer, and the code context
+sent with it) plus the ids of the chunks the model has already seen. A
+follow-up is retrieved with the previous question as extra context, and
+only chunks that are not already part of the conversation are sent; the
+earlier turns are replayed unchanged, so the prompt prefix stays stable
+and benefits from upstream prompt caching.
+
+Sessions are kept in memory, bounded in number (least recently used are
+evicted first) and expire after a period of inactivity.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_TTL_SECONDS = 1800.0
+DEFAULT_MAX_TURNS = 6
+# Replayed history (questions, context deltas and answers) is trimmed to this size
+DEFAULT_MAX_HISTORY_CHARS = 24000
+
+
+def chunk_id(source: Optional[str], text: str) -> str:
+    """Stable id of a retrieved chunk (the FAISS docstore ids are not returned by searches)"""
+    digest = hashlib.sha1()
+    digest.update((source or "").encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class Turn:
+    """One answered question and the context sent with it"""
+
+    def __init__(self, query: str, user_prompt: str, answer: str, chunk_ids: List[str]):
+        self.query = query
+        self.user_prompt = user_prompt
+        self.answer = answer
+        self.chunk_ids = chunk_ids
+        self.created_at = time.time()
+
+    def chars(self) -> int:
+        return len(self.user_prompt) + len(self.answer)
+
+
+class Session:
+    """Recent turns of one conversation"""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.turns: List[Turn] = []
+
+    def seen_chunks(self) -> set:
+        """Chunks already part of the replayed history"""
+        return {cid for turn in self.turns for cid in turn.chunk_ids}
+
+    def history_messages(self) -> List[Dict[str, str]]:
+        """Earlier turns as chat messages, oldest first"""
+        messages = []
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn.user_prompt})
+            messages.append({"role": "assistant", "content": turn.answer})
+        return messages
+
+    def last_query(self) -> Optional[str]:
+        return self.turns[-1].query if self.turns else None
+
+    def add_turn(self, turn: Turn, max_turns: int, max_history_chars: int) -> None:
+        """Append a turn, dropping the oldest ones beyond the limits (their chunks may be sent again)"""
+        self.turns.append(turn)
+        while len(self.turns) > 1 and (len(self.turns) > max_turns
+                                       or sum(t.chars() for t in self.turns) > max_history_chars):
+            self.turns.pop(0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "created_at": self.created_at,
+            "last_used": self.last_used,
+            "turns": [
+                {"query": t.query, "answer": t.answer, "chunks": len(t.chunk_ids), "created_at": t.created_at}
+                for t in self.turns
+            ]
+        }
+
+
+class SessionStore:
+    """Bounded in-memory session store with TTL expiry and LRU eviction"""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_turns: int = DEFAULT_MAX_TURNS, max_history_chars: int = DEFAULT_MAX_HISTORY_CHARS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.max_history_chars = max_history_chars
+        self.evicted = 0
+        self.expired = 0
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Limits from VERIGPT_SESSION_MAX, VERIGPT_SESSION_TTL_SECONDS and VERIGPT_SESSION_MAX_TURNS"""
+        return cls(
+            max_sessions=int(os.getenv("VERIGPT_SESSION_MAX", DEFAULT_MAX_SESSIONS)),
+            ttl_seconds=float(os.getenv("VERIGPT_SESSION_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            max_turns=int(os.getenv("VERIGPT_SESSION_MAX_TURNS", DEFAULT_MAX_TURNS))
+        )
+
+    def _purge_expired(self, now: float) -> None:
+        """Drop expired sessions from the LRU end (caller holds the lock)"""
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used <= self.ttl_seconds:
+                break
+            del self._sessions[session.id]
+            self.expired += 1
+
+    def create(self) -> Session:
+        """Start a new session, evicting the least recently used one when full"""
+        now = time.time()
+        session = Session(uuid.uuid4().hex)
+        with self._lock:
+            self._purge_expired(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """The session if it exists and has not expired; marks it as recently used"""
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_used = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def add_turn(self, session: Session, turn: Turn) -> None:
+        with self._lock:
+            session.add_turn(turn, self.max_turns, self.max_history_chars)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge_expired(time.time())
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_turns": self.max_turns,
+                "evicted": self.evicted,
+                "expired": self.expired
+            }
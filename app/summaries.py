@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+File Summaries - Per-file summary index for coarse-to-fine retrieval
+
+At index build time every corpus file gets a compact summary (design units,
+purpose, parameters, ports, instantiated modules and behavior hints). The
+summaries are embedded into a small second FAISS index stored in
+<index_dir>/summaries. A query first picks candidate files from that index
+and then ranks only the chunks of those files, whose vectors are read back
+from the chunk index, so the fine search no longer scans every chunk.
+
+Summarizers:
+    structural  parses the SystemVerilog source; offline and deterministic (default)
+    llm         asks the fast chat model with prompts/summarize_file.txt
+
+Summaries are cached by file content hash under output/cache/summaries, so
+each file is summarized once per summarizer, however often the index is
+rebuilt.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SUMMARY_DIR = "summaries"
+DEFAULT_CACHE_DIR = "output/cache/summaries"
+SUMMARIZERS = ["structural", "llm"]
+STRUCTURAL_VERSION = 1
+# Files picked from the summary index before the chunk search
+DEFAULT_CANDIDATE_FILES = 10
+# Source text sent to the LLM summarizer
+MAX_LLM_SOURCE_CHARS = 12000
+
+DESIGN_UNIT_RE = re.compile(
+    r"^\s*(?:virtual\s+)?(module|interface|package|program|class)\s+(?:automatic\s+|static\s+)?([A-Za-z_]\w*)",
+    re.MULTILINE
+)
+BLOCK_COMMENT_RE = re.compile(r"/\*(.*?)\*/", re.DOTALL)
+INSTANCE_RE = re.compile(r"^\s*([A-Za-z_]\w*)(?:\s*#\s*\(|\s+[A-Za-z_]\w*\s*(?:\[[^\]]*\]\s*)?\()", re.MULTILINE)
+DOC_HEADER_RE = re.compile(r"^\s*\**\s*(Module|Interface|Package|Class|Function|Task):", re.MULTILINE)
+NOT_INSTANCES = frozenset(
+    "if else for foreach while case casez casex assert assume cover property sequence function task module "
+    "interface package class return begin end always always_ff always_comb always_latch initial final assign "
+    "generate genvar localparam parameter typedef logic wire reg bit int integer input output inout import "
+    "export virtual automatic static new super this unique priority repeat forever fork join wait disable "
+    "default void string modport clocking constraint covergroup include define".split()
+)
+DIRECTIONS = ("input", "output", "inout", "ref")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _balanced(text: str, start: int) -> Optional[Tuple[str, int]]:
+    """Contents of the parenthesis opening at text[start], and the index after it"""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:i], i + 1
+    return None
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas that are not nested in brackets"""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _strip_comments(text: str) -> str:
+    return re.sub(r"//[^\n]*", "", BLOCK_COMMENT_RE.sub(" ", text))
+
+
+def _purpose(text: str) -> str:
+    """Description from the documentation comment before the first design unit, skipping license headers"""
+    first_unit = DESIGN_UNIT_RE.search(text)
+    header = text[:first_unit.start()] if first_unit else text
+    comments = [m.group(1) for m in BLOCK_COMMENT_RE.finditer(header)
+                if not re.search(r"copyright|licen[sc]e", m.group(1), re.IGNORECASE)]
+    # Prefer the "Module: name" documentation block over other block comments
+    comments.sort(key=lambda body: DOC_HEADER_RE.search(body) is None)
+    for body in comments:
+        lines = []
+        for line in body.splitlines():
+            line = line.strip().lstrip("*").strip()
+            if re.match(r"^(Parameters|Ports|Params|Arguments):", line):
+                break
+            if DOC_HEADER_RE.match(line):
+                continue
+            if line:
+                lines.append(line)
+        description = " ".join(lines)
+        if description:
+            return description[:300]
+    return ""
+
+
+def _header(code: str, end: int) -> Tuple[List[str], List[str]]:
+    """Parameter and port names from the header of the design unit declared before `end`"""
+    position = end
+    while position < len(code) and code[position] in " \t\r\n":
+        position += 1
+    parameters: List[str] = []
+    if code.startswith("#", position):
+        paren = code.find("(", position)
+        found = _balanced(code, paren) if paren >= 0 else None
+        if found:
+            for item in _split_top_level(found[0]):
+                name = re.search(r"([A-Za-z_]\w*)\s*(?:\[[^\]]*\]\s*)*(?:=|$)", item)
+                if name:
+                    parameters.append(name.group(1))
+            position = found[1]
+    ports: List[str] = []
+    while position < len(code) and code[position] in " \t\r\n":
+        position += 1
+    if code.startswith("(", position):
+        found = _balanced(code, position)
+        if found:
+            direction = ""
+            for item in _split_top_level(found[0]):
+                first = item.split()[0] if item.split() else ""
+                if first in DIRECTIONS:
+                    direction = first
+                elif "." in first or first.startswith("`"):
+                    # Interface port (possibly via a modport macro): the modport takes the place of the direction
+                    modport = re.match(r"`\w+\(\s*(\w+)\s*,\s*(\w+)\s*\)", item)
+                    direction = f"{modport.group(1)}.{modport.group(2)}" if modport else first
+                names = re.findall(r"[A-Za-z_]\w*", re.sub(r"\[[^\]]*\]", "", item.split("=")[0]))
+                if names:
+                    ports.append(f"{direction} {names[-1]}".strip())
+    return parameters, ports
+
+
+def structural_summary(text: str) -> Dict[str, Any]:
+    """Summary fields parsed from SystemVerilog source"""
+    code = _strip_comments(text)
+    units = [(m.group(1), m.group(2), m.end()) for m in DESIGN_UNIT_RE.finditer(code)]
+    parameters, ports = _header(code, units[0][2]) if units and units[0][0] in ("module", "interface", "program") \
+        else ([], [])
+    own_names = {name for _, name, _ in units}
+    instances = []
+    for match in INSTANCE_RE.finditer(code):
+        name = match.group(1)
+        if name not in NOT_INSTANCES and name not in own_names and name not in instances and not name.isupper():
+            instances.append(name)
+    behavior = {
+        "always_ff": len(re.findall(r"\balways_ff\b", code)),
+        "always_comb": len(re.findall(r"\balways_comb\b", code)),
+        "assign": len(re.findall(r"^\s*assign\b", code, re.MULTILINE)),
+        "generate": len(re.findall(r"\bgenerate\b|\bgenvar\b", code)),
+        "assertions": len(re.findall(r"\bassert\s+property\b|\bassert\s*\(", code)),
+        "state_machine": bool(re.search(r"typedef\s+enum[^;]*\}\s*\w*state\w*_t", code, re.IGNORECASE))
+    }
+    return {
+        "units": [f"{kind} {name}" for kind, name, _ in units],
+        "purpose": _purpose(text),
+        "parameters": parameters[:24],
+        "ports": ports[:32],
+        "instances": instances[:16],
+        "behavior": {key: value for key, value in behavior.items() if value}
+    }
+
+
+def summary_text(source: str, summary: Dict[str, Any]) -> str:
+    """Compact text of a summary, used for embedding and as prompt context"""
+    if "text" in summary:
+        return f"File: {source}\n{summary['text']}"
+    lines = [f"File: {source}"]
+    if summary.get("units"):
+        lines.append("Defines: " + ", ".join(summary["units"]))
+    if summary.get("purpose"):
+        lines.append("Purpose: " + summary["purpose"])
+    if summary.get("parameters"):
+        lines.append("Parameters: " + ", ".join(summary["parameters"]))
+    if summary.get("ports"):
+        lines.append("Ports: " + ", ".join(summary["ports"]))
+    if summary.get("instances"):
+        lines.append("Instantiates: " + ", ".join(summary["instances"]))
+    if summary.get("behavior"):
+        lines.append("Behavior: " + ", ".join(
+            key.replace("_", " ") if value is True else f"{value} {key}" for key, value in summary["behavior"].items()
+        ))
+    return "\n".join(lines)
+
+
+class FileSummarizer:
+    """Summaries cached on disk by content hash, one cache directory per summarizer"""
+
+    def __init__(self, kind: str = "structural", cache_dir: str = DEFAULT_CACHE_DIR, model: Optional[str] = None):
+        if kind not in SUMMARIZERS:
+            raise ValueError(f"Unknown summarizer '{kind}'. Available: {', '.join(SUMMARIZERS)}")
+        self.kind = kind
+        self.model = model
+        if kind == "llm" and model is None:
+            from .routing import ModelRouter
+
+            self.model = ModelRouter.from_env().route("", task="file-summary").model
+        self.id = f"structural-v{STRUCTURAL_VERSION}" if kind == "structural" else f"llm-{self.model}"
+        self.cache_dir = Path(cache_dir) / self.id
+        self.hits = 0
+        self.misses = 0
+
+    def _summarize(self, source: str, text: str) -> Dict[str, Any]:
+        if self.kind == "structural":
+            return structural_summary(text)
+        from .llm_client import get_openai_client
+        from .metrics import record_usage
+        from .prompt_bank import PromptBank
+
+        prompt = PromptBank().format_prompt("summarize_file", path=source, code=text[:MAX_LLM_SOURCE_CHARS])
+        response = get_openai_client().chat.completions.create(
+            model=self.model, messages=[{"role": "user", "content": prompt}], temperature=0.0
+        )
+        record_usage(self.model, response.usage)
+        return {"text": (response.choices[0].message.content or "").strip()}
+
+    def summarize(self, source: str, text: str) -> Dict[str, Any]:
+        """Summary of one file, from the cache when its content was summarized before"""
+        path = self.cache_dir / f"{content_hash(text)}.json"
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    summary = json.load(f)
+                self.hits += 1
+                return summary
+            except (OSError, ValueError):
+                pass
+        summary = self._summarize(source, text)
+        self.misses += 1
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        tmp_path.replace(path)
+        return summary
+
+
+def build_summary_index(sources: List[str], contents: List[str], embeddings, out_dir: str,
+                        summarizer: FileSummarizer) -> int:
+    """Summarize every file and save the summary FAISS index under out_dir/summaries"""
+    from langchain_community.vectorstores import FAISS
+
+    texts = [summary_text(source, summarizer.summarize(source, text)) for source, text in zip(sources, contents)]
+    store = FAISS.from_texts(texts, embeddings, metadatas=[{"source": source} for source in sources])
+    store.save_local(str(Path(out_dir) / SUMMARY_DIR))
+    return len(texts)
+
+
+def subset_search(index, ids: np.ndarray, query: np.ndarray, k: int, inner_product: bool = False) -> List[Tuple[int, float]]:
+    """Exact top-k over a subset of a FAISS index's vectors, without scanning the rest"""
+    vectors = index.reconstruct_batch(ids)
+    if inner_product:
+        scores = vectors @ query
+        order = np.argsort(-scores)[:k]
+    else:
+        scores = ((vectors - query) ** 2).sum(axis=1)
+        order = np.argsort(scores)[:k]
+    return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+class HierarchicalSearch:
+    """Coarse-to-fine search: candidate files from the summary index, then their chunks"""
+
+    def __init__(self, vectorstore, summary_store):
+        self.vectorstore = vectorstore
+        self.summary_store = summary_store
+        self.inner_product = getattr(vectorstore.distance_strategy, "value", "") == "MAX_INNER_PRODUCT"
+        ids_by_source: Dict[str, List[int]] = {}
+        for position, doc_id in vectorstore.index_to_docstore_id.items():
+            source = vectorstore.docstore.search(doc_id).metadata.get("source")
+            ids_by_source.setdefault(source, []).append(position)
+        self.ids_by_source = {source: np.array(ids, dtype="int64") for source, ids in ids_by_source.items()}
+        self.summaries = {
+            doc.metadata.get("source"): doc.page_content
+            for doc in (summary_store.docstore.search(doc_id) for doc_id in summary_store.index_to_docstore_id.values())
+        }
+
+    def search(self, embedding: List[float], k: int, files: int = DEFAULT_CANDIDATE_FILES,
+               exclude: Optional[np.ndarray] = None) -> Tuple[Optional[List[Any]], List[str]]:
+        """Top-k chunks from the best matching files, and those files in rank order
+
+        Vector positions in exclude (deleted chunks) are skipped. Returns None
+        instead of chunks when the candidate files hold fewer than k chunks.
+        """
+        query = np.asarray(embedding, dtype="float32")
+        _, rows = self.summary_store.index.search(query.reshape(1, -1), min(files, self.summary_store.index.ntotal))
+        candidates = []
+        for row in rows[0]:
+            if row >= 0:
+                source = self.summary_store.docstore.search(self.summary_store.index_to_docstore_id[row]).metadata.get("source")
+                if source in self.ids_by_source:
+                    candidates.append(source)
+        ids = np.concatenate([self.ids_by_source[source] for source in candidates]) if candidates else np.array([], "int64")
+        if exclude is not None and len(exclude):
+            ids = np.setdiff1d(ids, exclude, assume_unique=True)
+        if len(ids) < k:
+            # Too few chunks in the candidate files: the caller falls back to the full chunk search
+            return None, candidates
+        docs = [
+            self.vectorstore.docstore.search(self.vectorstore.index_to_docstore_id[position])
+            for position, _ in subset_search(self.vectorstore.index, ids, query, k, self.inner_product)
+        ]
+        return docs, candidates
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for /agent admission control (no server, no network)
+
+    python -m app.test_admission
+"""
+
+import asyncio
+from typing import List
+
+from app.admission import AdmissionController, AdmissionRejected
+
+
+async def hold(controller: AdmissionController, key: str, order: List[str], seconds: float = 0.02) -> None:
+    async with controller.slot(key):
+        order.append(key)
+        await asyncio.sleep(seconds)
+
+
+async def test_concurrency_limit() -> bool:
+    """No more than max_concurrent requests run at once"""
+    print("🧪 Testing concurrency limit...")
+    controller = AdmissionController(max_concurrent=2, max_queue=10, max_queue_per_key=10)
+    running, peak = 0, 0
+
+    async def request():
+        nonlocal running, peak
+        async with controller.slot("client"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(request() for _ in range(8)))
+    ok = peak == 2 and controller.active == 0 and controller.queued == 0
+    print(f"{'✅' if ok else '❌'} Peak concurrency {peak}, active after {controller.active}")
+    return ok
+
+
+async def test_fairness() -> bool:
+    """A key with a deep queue does not starve a key that arrives later"""
+    print("🧪 Testing per-key fairness...")
+    controller = AdmissionController(max_concurrent=1, max_queue=20, max_queue_per_key=10)
+    order: List[str] = []
+    tasks = [asyncio.create_task(hold(controller, "ci", order)) for _ in range(6)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(hold(controller, "ide", order)))
+    await asyncio.gather(*tasks)
+    ok = order.index("ide") <= 2
+    print(f"{'✅' if ok else '❌'} Interactive request served at position {order.index('ide') + 1} of {len(order)}")
+    return ok
+
+
+async def test_queue_limits() -> bool:
+    """Full queues are rejected with a reason and Retry-After"""
+    print("🧪 Testing queue limits...")
+    controller = AdmissionController(max_concurrent=1, max_queue=3, max_queue_per_key=2)
+    order: List[str] = []
+    tasks = [asyncio.create_task(hold(controller, "ci", order, 0.05)) for _ in range(3)]
+    await asyncio.sleep(0)
+    reasons = []
+    for key in ("ci", "a", "b"):
+        task = asyncio.create_task(hold(controller, key, order))
+        await asyncio.sleep(0)
+        if task.done():
+            reasons.append((task.exception().reason, task.exception().retry_after))
+        else:
+            reasons.append(("queued", None))
+            tasks.append(task)
+    await asyncio.gather(*tasks)
+    ok = reasons[0][0] == "key_queue_full" and reasons[1][0] == "queued" and reasons[2][0] == "queue_full" \
+        and reasons[0][1] >= 1 and controller.active == 0 and controller.queued == 0
+    print(f"{'✅' if ok else '❌'} Outcomes: {reasons}")
+    return ok
+
+
+async def test_deadline() -> bool:
+    """Requests whose estimated or actual wait exceeds their deadline are rejected"""
+    print("🧪 Testing deadlines...")
+    controller = AdmissionController(max_concurrent=1, max_queue=10, max_queue_per_key=10)
+    controller.service_seconds = 5.0
+    order: List[str] = []
+    task = asyncio.create_task(hold(controller, "a", order, 0.2))
+    await asyncio.sleep(0)
+    reasons = []
+    try:
+        await controller.acquire("b", max_wait=1.0)
+    except AdmissionRejected as e:
+        reasons.append(e.reason)
+    controller.service_seconds = 0.01
+    try:
+        await controller.acquire("b", max_wait=0.05)
+    except AdmissionRejected as e:
+        reasons.append(e.reason)
+    await task
+    ok = reasons == ["deadline", "wait_timeout"] and controller.active == 0 and controller.queued == 0
+    print(f"{'✅' if ok else '❌'} Rejections: {reasons}")
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting admission control tests...")
+    tests = [
+        ("Concurrency Limit", test_concurrency_limit),
+        ("Fairness", test_fairness),
+        ("Queue Limits", test_queue_limits),
+        ("Deadline", test_deadline)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        if asyncio.run(test_func()):
+            passed += 1
+        else:
+            print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
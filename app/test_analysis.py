@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for code analysis: splitting large inputs into parts and
+bounding the LLM calls of multi-file runs (fake client, no network)
+
+    python -m app.test_analysis
+"""
+
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.analysis import CodeAnalyzer, FileAnalysisRun, split_code
+from app.cache import ResultCache
+
+
+def unit(name: str, lines: int) -> str:
+    body = "\n".join(f"  assign w{i} = a{i} & b{i};" for i in range(lines))
+    return f"module {name} (input logic clk);\n{body}\nendmodule : {name}\n"
+
+
+CODE = (
+    "`timescale 1ns/1ps\n`include \"defs.svh\"\n\n"
+    + unit("first", 20)
+    + "\n`define WIDTH 8\ntypedef logic [`WIDTH-1:0] word_t;\n\n"
+    + unit("second", 20)
+    + "\nfunction automatic int parity(word_t w);\n  return ^w;\nendfunction\n\n"
+    + unit("third", 20)
+    + "\n// trailing notes\nbind first checker_m u_chk (.*);\n"
+)
+
+
+def non_whitespace(text: str) -> str:
+    return re.sub(r"\s+", "", text)
+
+
+def test_parts_keep_all_text() -> bool:
+    """Joining the parts gives back every character, including text between and after units"""
+    print("🧪 Testing that no text is dropped...")
+    parts = split_code(CODE, max_chars=900)
+    joined = "".join(text for _, text in parts)
+    ok = len(parts) > 1 and non_whitespace(joined) == non_whitespace(CODE)
+    print(f"{'✅' if ok else '❌'} {len(parts)} parts: {[label for label, _ in parts]}")
+    return ok
+
+
+def test_between_text_stays_with_next_unit() -> bool:
+    """Macros and typedefs travel with the unit after them; trailing code with the last unit"""
+    print("🧪 Testing where text between units goes...")
+    parts = split_code(CODE, max_chars=700)
+    owners = {
+        "`define WIDTH": "second", "typedef logic": "second",
+        "function automatic int parity": "third", "bind first": "third", "`timescale": "first"
+    }
+    found = {}
+    for snippet, expected in owners.items():
+        found[snippet] = next((label for label, text in parts if snippet in text), None)
+    ok = all(found[snippet] == expected for snippet, expected in owners.items())
+    print(f"{'✅' if ok else '❌'} Owners: {found}")
+    return ok
+
+
+def test_oversized_unit_keeps_content() -> bool:
+    """A unit larger than max_chars is split inside, without losing statements"""
+    print("🧪 Testing oversized units...")
+    code = unit("big", 200) + "\n`define AFTER 1\n"
+    parts = split_code(code, max_chars=2000)
+    statements = [f"w{i} = a{i}" for i in range(200)] + ["`define AFTER 1"]
+    missing = [s for s in statements if not any(s in text for _, text in parts)]
+    ok = len(parts) > 1 and not missing and all(len(text) <= 2400 for _, text in parts)
+    print(f"{'✅' if ok else '❌'} {len(parts)} parts, {len(missing)} statements missing")
+    return ok
+
+
+class CountingClient:
+    """Stands in for the OpenAI client and records the peak number of calls in flight"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+
+def test_llm_calls_bounded() -> bool:
+    """Files x parts never exceed the analyzer's max_llm_calls"""
+    print("🧪 Testing the LLM call limit of multi-file runs...")
+    client = CountingClient()
+    analyzer = CodeAnalyzer(lambda: client, cache=ResultCache(), max_part_chars=700, parallelism=4, max_llm_calls=3)
+    with tempfile.TemporaryDirectory() as data_dir:
+        names = []
+        for i in range(8):
+            names.append(f"f{i}.sv")
+            Path(data_dir, names[-1]).write_text(CODE.replace("first", f"first{i}"), encoding="utf-8")
+        run = FileAnalysisRun(names, "gpt-4o-mini", 0.1)
+        analyzer.analyze_files(run, data_dir, concurrency=8)
+    ok = run.status == "completed" and client.calls > 8 and client.peak <= 3
+    print(f"{'✅' if ok else '❌'} {client.calls} calls, peak {client.peak} in flight (limit 3), run {run.status}")
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting code split tests...")
+    tests = [
+        ("Parts Keep All Text", test_parts_keep_all_text),
+        ("Text Between Units", test_between_text_stays_with_next_unit),
+        ("Oversized Unit", test_oversized_unit_keeps_content),
+        ("LLM Calls Bounded", test_llm_calls_bounded)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        if test_func():
+            passed += 1
+        else:
+            print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for batch analysis checkpoints: an interrupted run resumes with
+the files it did not finish, and unchanged files are skipped (fake client,
+temporary corpus, no network)
+
+    python -m app.test_batch
+"""
+
+import contextlib
+import io
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.analysis import CodeAnalyzer
+from app.batch import BatchRunner, read_results
+from app.cache import ResultCache
+
+FILES = 6
+
+
+class FakeClient:
+    """Chat completions that answer with an assertion block, interrupting after `interrupt_after` calls"""
+
+    def __init__(self, interrupt_after=None):
+        self.interrupt_after = interrupt_after
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if self.interrupt_after is not None and calls > self.interrupt_after:
+            raise KeyboardInterrupt
+        content = "Checks:\n```systemverilog\nassert property (@(posedge clk) !(full && empty));\n```\n"
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_corpus(directory: Path) -> Path:
+    data = directory / "data"
+    data.mkdir()
+    for i in range(FILES):
+        (data / f"m{i}.sv").write_text(f"module m{i} (input logic clk);\n  logic full, empty;\nendmodule\n")
+    return data
+
+
+def runner(client: FakeClient, data: Path, output: Path) -> BatchRunner:
+    analyzer = CodeAnalyzer(lambda: client, cache=ResultCache(), max_llm_calls=1)
+    return BatchRunner(analyzer, str(data), str(output), concurrency=1, route_model=lambda code: "gpt-4o-mini")
+
+
+def test_resume_after_interruption() -> bool:
+    """Files finished before the interruption are not analyzed again"""
+    print("🧪 Testing resume after an interrupted run...")
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        data, output = make_corpus(directory), directory / "batch"
+        interrupted = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                runner(FakeClient(interrupt_after=3), data, output).run()
+            except KeyboardInterrupt:
+                interrupted = True
+        finished = len(read_results(str(output)))
+
+        client = FakeClient()
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = runner(client, data, output).run()
+        results = read_results(str(output))
+        ok = interrupted and finished == 3 and summary["skipped"] == 3 and summary["analyzed"] == FILES - 3 \
+            and client.calls == FILES - 3 and len(results) == FILES and summary["remaining"] == 0 \
+            and all(record["assertions"] for record in results.values())
+        print(f"{'✅' if ok else '❌'} {finished} files done before the interruption, resumed with "
+              f"{client.calls} calls, {len(results)} results")
+    return ok
+
+
+def test_only_changed_files_rerun() -> bool:
+    """A completed run re-analyzes only edited files and forgets removed ones"""
+    print("🧪 Testing reruns after edits...")
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        data, output = make_corpus(directory), directory / "batch"
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner(FakeClient(), data, output).run()
+            (data / "m1.sv").write_text("module m1 (input logic clk, rst);\nendmodule\n")
+            (data / "m5.sv").unlink()
+            client = FakeClient()
+            summary = runner(client, data, output).run()
+            forced = runner(FakeClient(), data, output).run(force=True)
+        ok = client.calls == 1 and summary["analyzed"] == 1 and summary["skipped"] == FILES - 2 \
+            and summary["pruned"] == 1 and forced["analyzed"] == FILES - 1
+        print(f"{'✅' if ok else '❌'} after one edit and one removal: {summary['analyzed']} analyzed, "
+              f"{summary['skipped']} skipped, {summary['pruned']} pruned; forced run {forced['analyzed']}")
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting batch analysis tests...")
+    tests = [
+        ("Resume After Interruption", test_resume_after_interruption),
+        ("Only Changed Files Rerun", test_only_changed_files_rerun)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        if test_func():
+            passed += 1
+        else:
+            print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
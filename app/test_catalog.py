@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the file catalog: incremental refresh picks up added,
+removed and edited files (temporary corpus, no network)
+
+    python -m app.test_catalog
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.catalog import FileCatalog
+
+
+def make_corpus() -> Path:
+    root = Path(tempfile.mkdtemp())
+    for rel in ["rtl/fifo.sv", "rtl/axi/stream.sv", "rtl/axi/defs.svh", "tb/tb_fifo.sv", "README.md"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"// {rel}\nmodule m; endmodule\n")
+    return root
+
+
+def bump_mtime(path: Path) -> None:
+    """Move a file's mtime forward so the edit is visible even on coarse clocks"""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+def test_initial_build() -> bool:
+    print("🧪 Testing the initial scan...")
+    root = make_corpus()
+    stats = FileCatalog(str(root)).stats()
+    ok = stats["total_files"] == 4 and stats["file_types"] == {"sv": 3, "svh": 1}
+    print(f"{'✅' if ok else '❌'} {stats['total_files']} files, types {stats['file_types']}")
+    shutil.rmtree(root)
+    return ok
+
+
+def test_added_files() -> bool:
+    print("🧪 Testing that added files and directories are picked up...")
+    root = make_corpus()
+    catalog = FileCatalog(str(root))
+    catalog.ensure_built()
+    (root / "rtl/uart.sv").write_text("module uart; endmodule\n")
+    (root / "rtl/spi").mkdir()
+    (root / "rtl/spi/spi_master.sv").write_text("module spi_master; endmodule\n")
+    changed = catalog.refresh()
+    files = catalog.list_files(prefix="rtl/")["files"]
+    ok = changed and "rtl/uart.sv" in files and "rtl/spi/spi_master.sv" in files and catalog.stats()["total_files"] == 6
+    print(f"{'✅' if ok else '❌'} changed={changed}, rtl files {files}")
+    shutil.rmtree(root)
+    return ok
+
+
+def test_removed_files() -> bool:
+    print("🧪 Testing that removed files and directories disappear...")
+    root = make_corpus()
+    catalog = FileCatalog(str(root))
+    catalog.ensure_built()
+    (root / "rtl/fifo.sv").unlink()
+    shutil.rmtree(root / "rtl/axi")
+    changed = catalog.refresh()
+    files = catalog.list_files()["files"]
+    ok = changed and files == ["tb/tb_fifo.sv"]
+    print(f"{'✅' if ok else '❌'} changed={changed}, files {files}")
+    shutil.rmtree(root)
+    return ok
+
+
+def test_edited_files() -> bool:
+    """In-place edits do not touch the directory mtime; the file stat must still be refreshed"""
+    print("🧪 Testing that in-place edits are picked up...")
+    root = make_corpus()
+    catalog = FileCatalog(str(root))
+    before = catalog.stats()["total_size_bytes"]
+    dir_mtime = (root / "rtl/axi").stat().st_mtime_ns
+    edited = root / "rtl/axi/stream.sv"
+    with open(edited, "a") as f:
+        f.write("// " + "x" * 1000 + "\n")
+    bump_mtime(edited)
+    os.utime(root / "rtl/axi", ns=(time.time_ns(), dir_mtime))
+    changed = catalog.refresh()
+    after = catalog.stats()["total_size_bytes"]
+    entry = next(e for e in catalog.ensure_built().entries if e.path == "rtl/axi/stream.sv")
+    ok = changed and after == before + 1004 and entry.mtime == edited.stat().st_mtime and not catalog.refresh()
+    print(f"{'✅' if ok else '❌'} changed={changed}, size {before} -> {after} bytes")
+    shutil.rmtree(root)
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting file catalog tests...")
+    tests = [
+        ("Initial Build", test_initial_build),
+        ("Added Files", test_added_files),
+        ("Removed Files", test_removed_files),
+        ("Edited Files", test_edited_files)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        if test_func():
+            passed += 1
+        else:
+            print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test script for index deletes and compaction: tombstoned chunks leave search
+results at once, compaction switches to a smaller version atomically and a
+fresh load sees the same index; direct pins stay within the index registry
+memory budget (local embeddings, temporary copy of a few corpus files, no
+network)
+
+    python -m app.test_index_store
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.index_registry import IndexEntry, IndexRegistry
+from app.index_store import IndexStore
+from app.manifest import CURRENT_FILE, VERSIONS_DIR, resolve_index_dir
+from app.tombstones import TOMBSTONE_FILE
+
+FILES = [
+    "fifo.sv",
+    "logic-master/logic-master/tests/logic/pll/lock_service/logic_pll_lock_service_unit_test.sv",
+    "logic-master/logic-master/tests/logic/axi4/lite/bus/logic_axi4_lite_bus_unit_test.sv",
+    "logic-master/logic-master/tests/logic/axi4/lite/clock_crossing/logic_axi4_lite_clock_crossing_unit_test.sv",
+    "logic-master/logic-master/tests/logic/axi4/lite/buffer/logic_axi4_lite_buffer_unit_test.sv",
+]
+QUERY = "fifo full empty flags write pointer read pointer"
+
+
+def build(directory: Path) -> Path:
+    """Copy the test files into a corpus and build an index with the local embedder"""
+    from build_index import build_index
+
+    data = directory / "data"
+    for rel in FILES:
+        target = data / Path(rel).name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(Path("data/raw_full") / rel, target)
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_index(str(data), str(directory / "index"), "local")
+    return directory / "index"
+
+
+def open_store(index_dir: Path) -> IndexStore:
+    store = IndexStore(str(index_dir), embedding_backend="local", compaction_threshold=1.0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        store.load()
+    return store
+
+
+def sources(store: IndexStore, k: int = 50):
+    """File names of the chunks found by a flat and a hierarchical search"""
+    embedding = store.embed_query(QUERY)
+    with store.acquire_version() as version:
+        flat = {Path(doc.metadata["source"]).name for doc, _ in version.search(embedding, k)}
+        docs, _ = version.search_files(embedding, 5, 10) if version.hierarchy is not None else ([], [])
+        hierarchical = {Path(doc.metadata["source"]).name for doc in docs}
+    return flat, hierarchical
+
+
+def vectors(store: IndexStore) -> int:
+    with store.acquire_version() as version:
+        return version.vectorstore.index.ntotal
+
+
+def test_delete_compact_reload() -> bool:
+    """delete -> search excludes -> compact -> a fresh load from disk matches"""
+    print("🧪 Testing delete, compaction and reload...")
+    directory = Path(tempfile.mkdtemp())
+    index_dir = build(directory)
+    root_files = {name: (index_dir / name).stat().st_mtime_ns for name in ("index.faiss", "index.pkl")}
+    store = open_store(index_dir)
+    total = vectors(store)
+    before, _ = sources(store)
+
+    result = store.delete(sources=["fifo.sv"])
+    after_delete, hierarchical = sources(store)
+    excluded = "fifo.sv" in before and "fifo.sv" not in after_delete and "fifo.sv" not in hierarchical \
+        and result["deleted"] > 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        compacted = store.compact()
+    pointer = (index_dir / CURRENT_FILE).read_text().strip()
+    switched = compacted and resolve_index_dir(str(index_dir)) == index_dir / VERSIONS_DIR / pointer \
+        and {name: (index_dir / name).stat().st_mtime_ns for name in root_files} == root_files
+    tombstones = json.loads((index_dir / TOMBSTONE_FILE).read_text())["ids"]
+    smaller = vectors(store) == total - result["deleted"] and tombstones == []
+
+    fresh = open_store(index_dir)
+    flat, hierarchical = sources(fresh)
+    with fresh.acquire_version() as version:
+        summary_files = {Path(doc.metadata["source"]).name
+                         for doc in version.hierarchy.summary_store.docstore._dict.values()}
+    reloaded = vectors(fresh) == vectors(store) and "fifo.sv" not in flat | hierarchical | summary_files \
+        and len(summary_files) == len(FILES) - 1
+
+    ok = excluded and switched and smaller and reloaded
+    print(f"{'✅' if ok else '❌'} deleted {result['deleted']} of {total} chunks; excluded: {excluded}, "
+          f"switched to {pointer}: {switched}, compacted: {smaller}, fresh load matches: {reloaded}")
+    shutil.rmtree(directory)
+    return ok
+
+
+def test_delete_during_compaction() -> bool:
+    """A delete that lands after the compacted copy was made stays tombstoned in the new version"""
+    print("🧪 Testing deletes made while compacting...")
+    directory = Path(tempfile.mkdtemp())
+    index_dir = build(directory)
+    store = open_store(index_dir)
+    first = store.delete(sources=["fifo.sv"])
+    late = {}
+    reload = store.reload
+
+    def reload_after_delete(*args, **kwargs):
+        late.update(store.delete(sources=["logic_axi4_lite_bus_unit_test.sv"]))
+        return reload(*args, **kwargs)
+
+    store.reload = reload_after_delete
+    with contextlib.redirect_stdout(io.StringIO()):
+        store.compact()
+    flat, _ = sources(store)
+    ids = json.loads((index_dir / TOMBSTONE_FILE).read_text())["ids"]
+    fresh_flat, _ = sources(open_store(index_dir))
+    ok = late.get("deleted", 0) > 0 and len(ids) == late["deleted"] and first["deleted"] > 0 \
+        and not {"fifo.sv", "logic_axi4_lite_bus_unit_test.sv"} & (flat | fresh_flat)
+    print(f"{'✅' if ok else '❌'} {late.get('deleted')} chunks deleted during compaction, "
+          f"{len(ids)} tombstones left, results {sorted(fresh_flat)}")
+    shutil.rmtree(directory)
+    return ok
+
+
+def test_rebuild_wins_over_compacted_version() -> bool:
+    """Index files written by a build after a compaction take precedence over CURRENT"""
+    print("🧪 Testing a rebuild after compaction...")
+    directory = Path(tempfile.mkdtemp())
+    index_dir = build(directory)
+    store = open_store(index_dir)
+    total = vectors(store)
+    store.delete(sources=["fifo.sv"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        store.compact()
+    compacted = resolve_index_dir(str(index_dir)) != index_dir
+    time.sleep(0.01)
+    shutil.rmtree(directory / "data")
+    build(directory)
+    fresh = open_store(index_dir)
+    ok = compacted and resolve_index_dir(str(index_dir)) == index_dir and vectors(fresh) == total
+    print(f"{'✅' if ok else '❌'} compacted version used before rebuild: {compacted}, "
+          f"after rebuild {vectors(fresh)} of {total} vectors from {resolve_index_dir(str(index_dir)).name}")
+    shutil.rmtree(directory)
+    return ok
+
+
+def test_pin_enforces_registry_budget() -> bool:
+    """A store loaded by pin() alone, outside IndexRegistry.load(), still evicts to fit the budget"""
+    print("🧪 Testing the memory budget on direct pins...")
+    directory = Path(tempfile.mkdtemp())
+    index_dir = build(directory)
+    shutil.copytree(index_dir, directory / "other_index")
+    registry = IndexRegistry([IndexEntry("first", str(directory / "data"), str(index_dir), "local"),
+                              IndexEntry("second", str(directory / "data"), str(directory / "other_index"), "local")],
+                             memory_budget_bytes=1)
+    first, second = registry.get("first").store, registry.get("second").store
+    with contextlib.redirect_stdout(io.StringIO()):
+        first.unpin(first.pin())
+        second.unpin(second.pin())
+        # Evicted by the second load: pinning it again reloads it and evicts the other one
+        version = first.pin()
+    ok = version is not None and first.loaded and not second.loaded and registry.evictions == 2
+    first.unpin(version)
+    print(f"{'✅' if ok else '❌'} {registry.evictions} evictions, loaded: "
+          f"first {first.loaded}, second {second.loaded}")
+    shutil.rmtree(directory)
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting index store tests...")
+    os.environ.setdefault("VERIGPT_EMBEDDING_BACKEND", "local")
+    tests = [
+        ("Delete, Compact, Reload", test_delete_compact_reload),
+        ("Delete During Compaction", test_delete_during_compaction),
+        ("Rebuild After Compaction", test_rebuild_wins_over_compacted_version),
+        ("Pin Enforces Registry Budget", test_pin_enforces_registry_budget)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        if test_func():
+            passed += 1
+        else:
+            print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared OpenAI client layer, run against the local fake server
+
+No API key or network access is needed:
+    python -m app.test_llm_client
+"""
+
+import os
+import time
+
+import httpx
+
+from app import llm_client
+from app.fake_openai import FakeOpenAIServer
+
+
+def make_client(server: FakeOpenAIServer, **transport_options) -> httpx.Client:
+    """Fresh resilient client (own breaker) pointed at the fake server"""
+    options = {"max_retries": 3, "backoff_base": 0.01, "backoff_max": 0.05,
+               "timeouts": {"chat": 0.5, "embeddings": 0.5}}
+    options.update(transport_options)
+    breaker = options.pop("breaker", llm_client.CircuitBreaker(failure_threshold=3, reset_seconds=0.5))
+    transport = llm_client.ResilientTransport(httpx.HTTPTransport(), breaker, **options)
+    return httpx.Client(transport=transport, base_url=server.base_url)
+
+
+def chat(client: httpx.Client) -> httpx.Response:
+    return client.post("/chat/completions", json={"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}]})
+
+
+def test_retry_on_5xx(server: FakeOpenAIServer) -> bool:
+    """Transient 500s are retried until the call succeeds"""
+    print("🧪 Testing retries on 5xx...")
+    server.configure(fail_next=2, error_status=500)
+    response = chat(make_client(server))
+    ok = response.status_code == 200
+    print(f"{'✅' if ok else '❌'} Status after 2 injected 500s: {response.status_code}")
+    return ok
+
+
+def test_retry_on_429(server: FakeOpenAIServer) -> bool:
+    """429 responses are retried (Retry-After is capped by backoff_max)"""
+    print("\n🧪 Testing retries on 429...")
+    server.configure(fail_next=1, error_status=429)
+    started = time.perf_counter()
+    response = chat(make_client(server))
+    elapsed = time.perf_counter() - started
+    ok = response.status_code == 200 and elapsed < 1.0
+    print(f"{'✅' if ok else '❌'} Status {response.status_code} after {elapsed:.2f}s")
+    return ok
+
+
+def test_timeout(server: FakeOpenAIServer) -> bool:
+    """A hanging upstream is cut off by the per-operation timeout"""
+    print("\n🧪 Testing per-operation timeout...")
+    server.configure(hang_next=1)
+    started = time.perf_counter()
+    try:
+        chat(make_client(server, max_retries=0))
+        print("❌ Request did not time out")
+        return False
+    except httpx.TimeoutException:
+        elapsed = time.perf_counter() - started
+        ok = elapsed < 1.5
+        print(f"{'✅' if ok else '❌'} Timed out after {elapsed:.2f}s (timeout 0.5s)")
+        return ok
+
+
+def test_caller_timeout(server: FakeOpenAIServer) -> bool:
+    """A shorter timeout from the caller wins over the per-operation one"""
+    print("\n🧪 Testing caller timeout...")
+    server.configure(hang_next=1)
+    client = make_client(server, max_retries=0, timeouts={"chat": 5.0})
+    started = time.perf_counter()
+    try:
+        client.post("/chat/completions", json={"model": "gpt-4o-mini", "messages": []}, timeout=0.3)
+        print("❌ Request did not time out")
+        return False
+    except httpx.TimeoutException:
+        elapsed = time.perf_counter() - started
+        ok = elapsed < 1.0
+        print(f"{'✅' if ok else '❌'} Timed out after {elapsed:.2f}s (caller timeout 0.3s, operation timeout 5s)")
+        return ok
+
+
+def test_deadline_stops_retries(server: FakeOpenAIServer) -> bool:
+    """call_with_deadline bounds the whole call, retries included"""
+    print("\n🧪 Testing deadline across retries...")
+    server.configure(hang_next=4)
+    client = make_client(server, max_retries=3, timeouts={"chat": 0.5})
+    started = time.perf_counter()
+    try:
+        llm_client.call_with_deadline(started + 0.7, chat, client)
+        print("❌ Request did not time out")
+        return False
+    except httpx.TimeoutException:
+        elapsed = time.perf_counter() - started
+        ok = elapsed < 1.0
+        print(f"{'✅' if ok else '❌'} Gave up after {elapsed:.2f}s (deadline 0.7s, 4 attempts of 0.5s otherwise)")
+        return ok
+
+
+def test_circuit_breaker(server: FakeOpenAIServer) -> bool:
+    """Repeated failures open the circuit; it fails fast, then recovers after the reset period"""
+    print("\n🧪 Testing circuit breaker...")
+    breaker = llm_client.CircuitBreaker(failure_threshold=3, reset_seconds=0.5)
+    client = make_client(server, breaker=breaker, max_retries=0)
+    server.configure(fail_next=3, error_status=503)
+    for _ in range(3):
+        chat(client)
+    if breaker.state != "open":
+        print(f"❌ Breaker is {breaker.state} after 3 failures")
+        return False
+
+    calls_before = server.state.counts["chat"]
+    started = time.perf_counter()
+    try:
+        chat(client)
+        print("❌ Request went through an open circuit")
+        return False
+    except llm_client.CircuitOpenError as e:
+        fast = time.perf_counter() - started < 0.05 and server.state.counts["chat"] == calls_before
+        print(f"{'✅' if fast else '❌'} Open circuit failed fast: {e}")
+        if not fast or not llm_client.upstream_unavailable(e):
+            return False
+
+    time.sleep(0.6)
+    response = chat(client)
+    ok = response.status_code == 200 and breaker.state == "closed"
+    print(f"{'✅' if ok else '❌'} Half-open probe succeeded, breaker is {breaker.state}")
+    return ok
+
+
+class DroppingTransport(httpx.HTTPTransport):
+    """Real transport whose first `drops` requests fail as if the server closed the connection mid-response"""
+
+    def __init__(self, drops: int):
+        super().__init__()
+        self.drops = drops
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.drops > 0:
+            self.drops -= 1
+            raise httpx.RemoteProtocolError("Server disconnected without sending a response.", request=request)
+        return super().handle_request(request)
+
+
+def test_protocol_error_during_probe(server: FakeOpenAIServer) -> bool:
+    """A protocol error on the half-open probe reopens the circuit instead of wedging it"""
+    print("\n🧪 Testing protocol error during the half-open probe...")
+    breaker = llm_client.CircuitBreaker(failure_threshold=3, reset_seconds=0.3)
+    for _ in range(3):
+        breaker.record_failure()
+    transport = llm_client.ResilientTransport(DroppingTransport(drops=1), breaker, max_retries=0,
+                                              timeouts={"chat": 0.5})
+    client = httpx.Client(transport=transport, base_url=server.base_url)
+    time.sleep(0.35)
+    try:
+        chat(client)
+        print("❌ Dropped connection did not raise")
+        return False
+    except httpx.RemoteProtocolError:
+        reopened = breaker.state == "open"
+    time.sleep(0.35)
+    response = chat(client)
+    ok = reopened and response.status_code == 200 and breaker.state == "closed"
+    print(f"{'✅' if ok else '❌'} Probe failure reopened the circuit: {reopened}, "
+          f"next probe {response.status_code}, breaker is {breaker.state}")
+    return ok
+
+
+def test_protocol_error_retried(server: FakeOpenAIServer) -> bool:
+    """Dropped connections are retried and counted like network errors"""
+    print("\n🧪 Testing retries on protocol errors...")
+    breaker = llm_client.CircuitBreaker(failure_threshold=5, reset_seconds=0.5)
+    transport = llm_client.ResilientTransport(DroppingTransport(drops=2), breaker, max_retries=3,
+                                              backoff_base=0.01, backoff_max=0.05, timeouts={"chat": 0.5})
+    response = chat(httpx.Client(transport=transport, base_url=server.base_url))
+    ok = response.status_code == 200 and transport.retries == 2 and breaker.state == "closed"
+    print(f"{'✅' if ok else '❌'} Status {response.status_code} after {transport.retries} retries")
+    return ok
+
+
+def test_openai_sdk(server: FakeOpenAIServer) -> bool:
+    """The shared SDK client (keep-alive pool) talks to the fake server end to end"""
+    print("\n🧪 Testing shared OpenAI SDK client...")
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    client = llm_client.get_openai_client()
+    completion = client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "fifo?"}])
+    embedding = client.embeddings.create(model="text-embedding-3-small", input=["fifo buffer"])
+    ok = completion.choices[0].message.content.startswith("Fake answer") and len(embedding.data[0].embedding) == 1536
+    print(f"{'✅' if ok else '❌'} Chat and embeddings through the shared pool")
+    return ok
+
+
+def test_api_maps_open_circuit_to_503(server: FakeOpenAIServer) -> bool:
+    """/analyze/code answers 503 with Retry-After while the shared circuit is open"""
+    print("\n🧪 Testing 503 mapping in the API...")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    os.environ["VERIGPT_WARMUP"] = "0"
+    breaker = llm_client.get_breaker()
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    try:
+        with TestClient(app) as api:
+            response = api.post("/analyze/code", json={"code": "module m; endmodule"})
+    finally:
+        breaker.record_success()
+    ok = response.status_code == 503 and "retry-after" in response.headers
+    print(f"{'✅' if ok else '❌'} Status {response.status_code}, Retry-After: {response.headers.get('retry-after')}")
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting OpenAI client layer tests against a local fake server...")
+    tests = [
+        ("Retry on 5xx", test_retry_on_5xx),
+        ("Retry on 429", test_retry_on_429),
+        ("Timeout", test_timeout),
+        ("Caller Timeout", test_caller_timeout),
+        ("Deadline Stops Retries", test_deadline_stops_retries),
+        ("Circuit Breaker", test_circuit_breaker),
+        ("Protocol Error During Probe", test_protocol_error_during_probe),
+        ("Protocol Error Retried", test_protocol_error_retried),
+        ("OpenAI SDK", test_openai_sdk),
+        ("API 503 Mapping", test_api_maps_open_circuit_to_503)
+    ]
+
+    passed = 0
+    with FakeOpenAIServer() as server:
+        for test_name, test_func in tests:
+            server.configure(fail_next=0, hang_next=0, error_rate=0.0)
+            if test_func(server):
+                passed += 1
+            else:
+                print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for the Prometheus text rendering of the metrics registry
+
+    python -m app.test_metrics
+"""
+
+from app.metrics import Registry, _format_value
+
+
+def test_failing_gauge_function() -> bool:
+    """A gauge whose callback raises is rendered as NaN and the scrape still succeeds"""
+    print("🧪 Testing gauge with a failing callback...")
+    registry = Registry()
+    registry.gauge("test_broken_ratio", "Callback that raises").set_function(lambda: 1 / 0)
+    registry.gauge("test_ok_ratio", "Callback that works").set_function(lambda: 0.5)
+    try:
+        text = registry.render()
+    except Exception as e:
+        print(f"❌ Render failed: {type(e).__name__}: {e}")
+        return False
+    ok = "test_broken_ratio NaN" in text and "test_ok_ratio 0.5" in text
+    print(f"{'✅' if ok else '❌'} Rendered {len(text.splitlines())} lines")
+    return ok
+
+
+def test_value_formatting() -> bool:
+    """Special, integral and fractional values use the exposition format spelling"""
+    print("🧪 Testing value formatting...")
+    cases = {float("nan"): "NaN", float("inf"): "+Inf", float("-inf"): "-Inf", 3.0: "3", -2.0: "-2", 0.25: "0.25"}
+    failures = {repr(value): _format_value(value) for value, expected in cases.items()
+                if _format_value(value) != expected}
+    ok = not failures
+    print(f"{'✅' if ok else '❌'} {len(cases) - len(failures)}/{len(cases)} values formatted" +
+          (f", wrong: {failures}" if failures else ""))
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting metrics tests...")
+    tests = [
+        ("Failing Gauge Function", test_failing_gauge_function),
+        ("Value Formatting", test_value_formatting)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        if test_func():
+            passed += 1
+        else:
+            print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
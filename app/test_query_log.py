@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test script for the query log, the disk-bounded answer cache and the
+startup prewarm (temporary files and a local fake OpenAI server)
+
+    python -m app.test_query_log
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.cache import ResultCache, make_key
+from app.query_log import QueryLog, log_files, read_records, top_requests
+
+
+def record(i: int, query: str = "fifo flags", status: int = 200, session=None):
+    return {"request_id": str(i), "status": status, "query": query, "top_k": 4, "session": session,
+            "request": {"index": "default", "retrieval": None, "model": None, "temperature": 0.1},
+            "timings_ms": {"total": float(i)}, "cache": {"answer": "miss"}}
+
+
+def test_rotation() -> bool:
+    """The log rotates by size, keeps a bounded number of backups and is read back oldest first"""
+    print("🧪 Testing query log rotation...")
+    directory = Path(tempfile.mkdtemp())
+    log = QueryLog(str(directory / "queries.jsonl"), max_bytes=2000, backups=2, flush_records=5, flush_seconds=0.05)
+    for i in range(60):
+        log.log(record(i))
+        if i % 10 == 9:
+            time.sleep(0.1)
+    log.stop()
+    files = log_files(log.path.as_posix())
+    ids = [int(r["request_id"]) for r in read_records(log.path.as_posix())]
+    ok = log.rotations > 2 and len(files) == 3 and ids == sorted(ids) and ids[-1] == 59 \
+        and all(f.stat().st_size <= 2000 for f in files) and log.dropped == 0
+    print(f"{'✅' if ok else '❌'} {log.rotations} rotations, {len(files)} files, {len(ids)} records kept "
+          f"(last {ids[-1] if ids else None})")
+    shutil.rmtree(directory)
+    return ok
+
+
+def test_top_requests() -> bool:
+    """Replay candidates are successful stateless requests, most frequent first"""
+    print("🧪 Testing top requests for prewarm...")
+    directory = Path(tempfile.mkdtemp())
+    log = QueryLog(str(directory / "queries.jsonl"), flush_seconds=0.05)
+    records = [record(0, "uart baud")] + [record(i, "fifo flags") for i in range(1, 4)] \
+        + [record(10, "broken", status=500)] * 5 + [record(20, "follow up", session="s1")] * 5
+    for item in records:
+        log.log(item)
+    log.stop()
+    top = top_requests(log.path.as_posix(), limit=5)
+    ok = [(item["query"], item["count"]) for item in top] == [("fifo flags", 3), ("uart baud", 1)] \
+        and top[0]["index"] == "default" and top[0]["top_k"] == 4
+    print(f"{'✅' if ok else '❌'} {[(item['query'], item['count']) for item in top]}")
+    shutil.rmtree(directory)
+    return ok
+
+
+def test_disk_cache_bounds() -> bool:
+    """The disk layer stays under its size limit and expired entries are misses"""
+    print("🧪 Testing answer cache disk bounds...")
+    directory = Path(tempfile.mkdtemp())
+    cache = ResultCache(max_entries=2, directory=str(directory), max_disk_bytes=5000)
+    for i in range(40):
+        cache.set(make_key(i), {"answer": "x" * 400})
+    on_disk = sum(path.stat().st_size for path in directory.glob("*/*.json"))
+    newest = ResultCache(directory=str(directory)).get(make_key(39))
+    bounded = on_disk <= 5000 and cache.disk_evictions > 0 and newest is not None
+
+    aged = ResultCache(directory=str(directory), max_age_seconds=60)
+    path = aged._path(make_key(39))
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    expired = aged.get(make_key(39)) is None and not path.exists()
+    ok = bounded and expired
+    print(f"{'✅' if ok else '❌'} {on_disk} bytes on disk (limit 5000), {cache.disk_evictions} evicted, "
+          f"expired entry removed: {expired}")
+    shutil.rmtree(directory)
+    return ok
+
+
+def test_prewarm_reads_cache_only() -> bool:
+    """Prewarm loads logged answers from disk without LLM calls, metrics or log records"""
+    print("🧪 Testing prewarm...")
+    from app.fake_openai import FakeOpenAIServer
+
+    directory = Path(tempfile.mkdtemp())
+    data = directory / "data"
+    data.mkdir()
+    shutil.copy("data/raw_full/fifo.sv", data / "fifo.sv")
+    with FakeOpenAIServer() as fake:
+        os.environ.update(OPENAI_BASE_URL=fake.base_url, OPENAI_API_KEY="sk-fake", VERIGPT_WARMUP="0",
+                          VERIGPT_EMBEDDING_BACKEND="local", VERIGPT_DATA_DIR=str(data),
+                          VERIGPT_INDEX_DIR=str(directory / "index"), VERIGPT_QUERY_LOG=str(directory / "queries.jsonl"),
+                          VERIGPT_QUERY_LOG_FLUSH_SECONDS="0.05")
+        from build_index import build_index
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_index(str(data), str(directory / "index"), "local")
+        from fastapi.testclient import TestClient
+        from app import main, metrics
+
+        main.answer_cache.directory = directory / "answers"
+        queries = ["How are the fifo full and empty flags computed?", "What resets the fifo pointers?"]
+        with TestClient(main.app) as client:
+            for query in queries:
+                client.post("/agent", json={"query": query, "top_k": 2})
+        main.query_log.stop()
+        chat_calls = fake.state.counts["chat"]
+        logged = len(list(read_records(main.query_log.path.as_posix())))
+
+        main.answer_cache._entries.clear()
+        for store in [entry.store for entry in main.index_registry.entries.values()]:
+            if store.query_cache is not None:
+                store.query_cache._entries.clear()
+        search = metrics.AGENT_STAGE_SECONDS.labels(stage="search")
+        before = (sum(search.counts), main.model_router.stats()["routes"], main.answer_cache.stats()["hits"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.prewarm()
+        main.query_log.stop()
+        after = (sum(search.counts), main.model_router.stats()["routes"], main.answer_cache.stats()["hits"])
+        warmed = len(main.answer_cache._entries)
+        ok = chat_calls == 2 and fake.state.counts["chat"] == 2 and warmed == 2 and before == after \
+            and len(list(read_records(main.query_log.path.as_posix()))) == logged
+    print(f"{'✅' if ok else '❌'} {warmed} answers loaded from disk, chat calls {fake.state.counts['chat']} "
+          f"(before prewarm {chat_calls}), metrics unchanged: {before == after}")
+    shutil.rmtree(directory)
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting query log tests...")
+    tests = [
+        ("Rotation", test_rotation),
+        ("Top Requests", test_top_requests),
+        ("Disk Cache Bounds", test_disk_cache_bounds),
+        ("Prewarm Reads Cache Only", test_prewarm_reads_cache_only)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        if test_func():
+            passed += 1
+        else:
+            print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for /agent sessions: history replay and trimming, expiry and
+eviction, and follow-ups that only send new chunks (local embeddings and a
+local fake OpenAI server, no network)
+
+    python -m app.test_sessions
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.sessions import SessionStore, Turn
+
+
+def turn(i: int, chars: int = 10) -> Turn:
+    return Turn(f"question {i}", f"prompt {i} " + "x" * chars, f"answer {i}", [f"c{i}", "shared"])
+
+
+def test_history_replay() -> bool:
+    """Earlier turns are replayed oldest first and their chunks count as seen"""
+    print("🧪 Testing session history replay...")
+    store = SessionStore()
+    session = store.create()
+    for i in range(3):
+        store.add_turn(session, turn(i))
+    messages = session.history_messages()
+    ok = [m["role"] for m in messages] == ["user", "assistant"] * 3 \
+        and messages[0]["content"].startswith("prompt 0") and messages[-1]["content"] == "answer 2" \
+        and session.seen_chunks() == {"c0", "c1", "c2", "shared"} and session.last_query() == "question 2"
+    print(f"{'✅' if ok else '❌'} {len(messages)} messages, seen chunks {sorted(session.seen_chunks())}")
+    return ok
+
+
+def test_history_trimming() -> bool:
+    """Turns beyond max_turns or max_history_chars are dropped oldest first, the newest always stays"""
+    print("🧪 Testing session history limits...")
+    store = SessionStore(max_turns=3, max_history_chars=500)
+    session = store.create()
+    for i in range(5):
+        store.add_turn(session, turn(i))
+    by_turns = [t.query for t in session.turns]
+    store.add_turn(session, turn(5, chars=300))
+    store.add_turn(session, turn(6, chars=300))
+    by_chars = [t.query for t in session.turns]
+    store.add_turn(session, turn(7, chars=1000))
+    oversized = [t.query for t in session.turns]
+    ok = by_turns == ["question 2", "question 3", "question 4"] and by_chars == ["question 6"] \
+        and oversized == ["question 7"] and "c5" not in session.seen_chunks()
+    print(f"{'✅' if ok else '❌'} by turns {by_turns}, by size {by_chars}, oversized {oversized}")
+    return ok
+
+
+def test_expiry_and_eviction() -> bool:
+    """Idle sessions expire; the least recently used one is evicted when the store is full"""
+    print("🧪 Testing session expiry and eviction...")
+    store = SessionStore(max_sessions=2, ttl_seconds=0.2)
+    first, second = store.create(), store.create()
+    store.get(first.id)
+    third = store.create()
+    evicted = store.get(second.id) is None and store.get(first.id) is not None and store.evicted == 1
+    time.sleep(0.3)
+    expired = store.get(third.id) is None and store.stats()["sessions"] == 0 and store.expired == 2
+    ok = evicted and expired
+    print(f"{'✅' if ok else '❌'} evicted least recently used: {evicted}, expired idle: {expired}")
+    return ok
+
+
+def test_follow_up_sends_new_chunks_only() -> bool:
+    """Through /agent: a repeated question in a session reuses every chunk and keeps both turns"""
+    print("🧪 Testing /agent follow-ups...")
+    from app.fake_openai import FakeOpenAIServer
+
+    directory = Path(tempfile.mkdtemp())
+    data = directory / "data"
+    data.mkdir()
+    shutil.copy("data/raw_full/fifo.sv", data / "fifo.sv")
+    with FakeOpenAIServer() as fake:
+        os.environ.update(OPENAI_BASE_URL=fake.base_url, OPENAI_API_KEY="sk-fake", VERIGPT_WARMUP="0",
+                          VERIGPT_EMBEDDING_BACKEND="local", VERIGPT_DATA_DIR=str(data),
+                          VERIGPT_INDEX_DIR=str(directory / "index"), VERIGPT_QUERY_LOG="off")
+        from build_index import build_index
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_index(str(data), str(directory / "index"), "local")
+        from fastapi.testclient import TestClient
+        from app import main
+
+        with TestClient(main.app) as client:
+            session_id = client.post("/sessions").json()["session_id"]
+            body = {"query": "How are the fifo full and empty flags computed?", "top_k": 3, "session_id": session_id}
+            first = client.post("/agent", json=body).json()["session"]
+            second = client.post("/agent", json=body).json()["session"]
+            history = client.get(f"/sessions/{session_id}").json()["turns"]
+            missing = client.post("/agent", json={**body, "session_id": "nope"}).status_code
+            chat_calls = fake.state.counts["chat"]
+    ok = first["turn"] == 1 and first["reused_chunks"] == 0 and first["new_chunks"] > 0 \
+        and second["turn"] == 2 and second["new_chunks"] == 0 and second["reused_chunks"] == first["new_chunks"] \
+        and len(history) == 2 and missing == 404 and chat_calls == 2
+    print(f"{'✅' if ok else '❌'} turn 1 {first['new_chunks']} new chunks, turn 2 {second['new_chunks']} new / "
+          f"{second['reused_chunks']} reused, {len(history)} turns kept, unknown session -> {missing}")
+    shutil.rmtree(directory)
+    return ok
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Starting session tests...")
+    tests = [
+        ("History Replay", test_history_replay),
+        ("History Trimming", test_history_trimming),
+        ("Expiry And Eviction", test_expiry_and_eviction),
+        ("Follow-up Sends New Chunks Only", test_follow_up_sends_new_chunks_only)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        if test_func():
+            passed += 1
+        else:
+            print(f"   ❌ {test_name} failed")
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
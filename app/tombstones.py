@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tombstones - Deletes on a persisted FAISS index without rebuilding it
+
+Chunks are identified by their docstore ids (the index_to_docstore_id map of
+the LangChain FAISS store). Deleting marks ids as dead in tombstones.json
+next to the index; searches exclude dead vectors inside FAISS with an
+IDSelector, so stale chunks of removed or renamed files stop showing up
+immediately. Once the dead share of the index crosses a threshold,
+compact_vectorstore() rewrites the index without them; IndexStore swaps the
+result in like a hot reload, so queries never wait for it.
+
+One Tombstones set serves every loaded version of an index directory (docstore
+ids survive compaction), so deletes made while a compaction runs also apply to
+the version it produces. Each version's filter follows the set's generation.
+"""
+
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+TOMBSTONE_FILE = "tombstones.json"
+
+
+def source_matches(source: Optional[str], paths: Set[str]) -> bool:
+    """Paths may be given as stored in the index or relative to the corpus (trailing part)"""
+    if not source:
+        return False
+    return source in paths or any(source.endswith("/" + path) for path in paths)
+
+
+class Tombstones:
+    """Dead docstore ids of one index directory, persisted on every change"""
+
+    def __init__(self, index_dir: Path):
+        self.path = Path(index_dir) / TOMBSTONE_FILE
+        self.ids: Set[str] = set()
+        self.generation = 0
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.ids = set(json.load(f).get("ids", []))
+            except (OSError, ValueError):
+                self.ids = set()
+
+    def add(self, ids: Iterable[str]) -> int:
+        """Mark ids as deleted; returns how many were not deleted before"""
+        with self._lock:
+            new = set(ids) - self.ids
+            if new:
+                self.ids |= new
+                self.generation += 1
+                self._save(self.ids)
+            return len(new)
+
+    def snapshot(self) -> Set[str]:
+        with self._lock:
+            return set(self.ids)
+
+    def retain(self, live: Set[str]) -> int:
+        """Forget ids that are no longer in the index (compacted away); returns how many were dropped
+
+        Filters are not refreshed: ids missing from the new version do not
+        matter to it, and older versions keep excluding their dead vectors.
+        """
+        with self._lock:
+            gone = self.ids - live
+            if gone:
+                self.ids -= gone
+                self._save(self.ids)
+            return len(gone)
+
+    def _save(self, ids: Set[str]) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": datetime.now(timezone.utc).isoformat(), "ids": sorted(ids)}, f)
+        tmp_path.replace(self.path)
+
+
+class TombstoneFilter:
+    """Dead vector positions of one loaded index version, as a FAISS search selector"""
+
+    def __init__(self, vectorstore, tombstones: Tombstones):
+        self.vectorstore = vectorstore
+        self.store = tombstones
+        self.position_of = {doc_id: position for position, doc_id in vectorstore.index_to_docstore_id.items()}
+        self._lock = threading.Lock()
+        self.dead = np.array([], dtype="int64")
+        self._selector = None
+        self._generation = -1
+        self.sync()
+
+    def sync(self) -> None:
+        """Pick up ids tombstoned through any version since the last refresh"""
+        if self._generation != self.store.generation:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        import faiss
+
+        # Read the generation first: a delete racing with the snapshot triggers another refresh
+        generation = self.store.generation
+        # Dead positions only ever grow for a loaded version
+        positions = sorted({self.position_of[doc_id] for doc_id in self.store.snapshot()
+                            if doc_id in self.position_of} | set(self.dead.tolist()))
+        with self._lock:
+            self._generation = generation
+            self.dead = np.array(positions, dtype="int64")
+            # IDSelectorNot keeps a reference to the batch selector, so hold on to both
+            batch = faiss.IDSelectorBatch(self.dead) if len(self.dead) else None
+            self._selector = (batch, faiss.IDSelectorNot(batch)) if batch is not None else None
+
+    def ids_for_sources(self, paths: Set[str]) -> List[str]:
+        """Docstore ids of every chunk whose source is one of the paths"""
+        docstore = self.vectorstore.docstore
+        return [doc_id for doc_id in self.position_of
+                if source_matches(docstore.search(doc_id).metadata.get("source"), paths)]
+
+    def sources(self) -> Set[str]:
+        docstore = self.vectorstore.docstore
+        return {docstore.search(doc_id).metadata.get("source") for doc_id in self.position_of}
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Tombstone ids of this index (unknown ids are ignored); returns the newly deleted count"""
+        added = self.store.add(doc_id for doc_id in ids if doc_id in self.position_of)
+        self.sync()
+        return added
+
+    def ratio(self) -> float:
+        total = len(self.position_of)
+        return len(self.dead) / total if total else 0.0
+
+    def search(self, embedding: List[float], k: int) -> List[Tuple[Any, float]]:
+        """Top-k (document, distance) pairs, excluding dead vectors inside FAISS"""
+        self.sync()
+        with self._lock:
+            selector = self._selector
+        if selector is None:
+            return self.vectorstore.similarity_search_with_score_by_vector(embedding, k=k)
+        import faiss
+
+        query = np.asarray([embedding], dtype="float32")
+        if self.vectorstore._normalize_L2:
+            faiss.normalize_L2(query)
+        distances, positions = self.vectorstore.index.search(query, k, params=faiss.SearchParameters(sel=selector[1]))
+        docstore, ids = self.vectorstore.docstore, self.vectorstore.index_to_docstore_id
+        return [(docstore.search(ids[position]), float(distance))
+                for position, distance in zip(positions[0], distances[0]) if position >= 0]
+
+
+def compact_vectorstore(vectorstore, dead: Set[str]):
+    """New FAISS vectorstore holding only the live vectors and documents (the input is not modified)"""
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    index = vectorstore.index
+    live = [(position, doc_id) for position, doc_id in sorted(vectorstore.index_to_docstore_id.items())
+            if doc_id not in dead]
+    new_index = faiss.index_factory(index.d, "Flat", index.metric_type)
+    if live:
+        new_index.add(index.reconstruct_batch(np.array([position for position, _ in live], dtype="int64")))
+    docstore = InMemoryDocstore({doc_id: vectorstore.docstore.search(doc_id) for _, doc_id in live})
+    return FAISS(
+        vectorstore.embedding_function,
+        new_index,
+        docstore,
+        {new_position: doc_id for new_position, (_, doc_id) in enumerate(live)},
+        normalize_L2=vectorstore._normalize_L2,
+        distance_strategy=vectorstore.distance_strategy
+    )
+
+
+def prune_summaries(summary_store, vectorstore):
+    """Summary store without the files that have no chunks left in vectorstore (the input if none)"""
+    docstore = vectorstore.docstore
+    live = {docstore.search(doc_id).metadata.get("source") for doc_id in vectorstore.index_to_docstore_id.values()}
+    gone = {doc_id for doc_id in summary_store.index_to_docstore_id.values()
+            if summary_store.docstore.search(doc_id).metadata.get("source") not in live}
+    return compact_vectorstore(summary_store, gone) if gone else summary_store
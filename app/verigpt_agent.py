@@ -5,17 +5,22 @@ VeriGPT Agent - AI-based SystemVerilog code analysis using RAG
 
 import os
 import glob
-from typing import List
+import time
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain.agents import initialize_agent, AgentType
 from langchain.tools import Tool
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.chat_models import ChatOpenAI
-from langchain.schema import Document
+from langchain.schema import Document, HumanMessage, SystemMessage
+from langchain.callbacks.base import BaseCallbackHandler
 from .prompt_bank import PromptBank
+from .manifest import manifest_mismatch, read_manifest, resolve_index_dir, write_manifest
+from .llm_client import openai_kwargs
+from .embeddings import get_backend
+from .routing import ModelRouter
 
 # Debug: Check if environment variables are loaded
 def debug_env_vars():
@@ -29,23 +34,60 @@ def debug_env_vars():
 # Allowed file extensions
 ALLOWED_FILE_EXTENSIONS = ["sv", "svh"]
 
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Analysis modes: "planned" retrieves with a fixed query set and makes one LLM call,
+# "react" lets a ZERO_SHOT_REACT_DESCRIPTION agent decide what to search for
+ANALYSIS_MODES = ["planned", "react"]
+
+# Retrieval queries used by the planned mode in addition to per-file queries
+PLANNED_QUERIES = [
+    "module ports, parameters and interfaces",
+    "reset behavior and initial values",
+    "valid/ready handshake and backpressure",
+    "full, empty and overflow conditions",
+    "clock domain crossing and synchronizers",
+    "state machine states and transitions",
+]
+PLANNED_K = 3
+PLANNED_CONTEXT_CHARS = 12000
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts LLM round-trips made during an analysis"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        self.calls += 1
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[Any], **kwargs: Any) -> None:
+        self.calls += 1
+
 class VeriGPTAgent:
     """Main agent class for SystemVerilog code analysis"""
     
-    def __init__(self):
-        """Initialize the agent with OpenAI API key"""
+    def __init__(self, model: Optional[str] = None, embedding_backend: Optional[str] = None):
+        """Initialize the agent with OpenAI API key (the model is routed unless given)"""
         self.api_key = os.getenv("OPENAI_API_KEY")
         print(f"OPENAI_API_KEY: {self.api_key}")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
+        # Corpus-wide analysis is deep verification work: routed to the strong model by default
+        self.route = ModelRouter.from_env().route("", task="corpus", override=model)
         self.llm = ChatOpenAI(
-            model="gpt-4",
+            model=self.route.model,
             temperature=0.1,
-            openai_api_key=self.api_key
+            openai_api_key=self.api_key,
+            **openai_kwargs("chat")
         )
-        self.embeddings = OpenAIEmbeddings(openai_api_key=self.api_key)
+        # Same backend selection as build_index.py and app/main.py (VERIGPT_EMBEDDING_BACKEND)
+        self.embeddings = get_backend(embedding_backend)
+        self.embedding_model = self.embeddings.name
         self.prompt_bank = PromptBank()
+        self.last_run_stats: Dict[str, Any] = {}
         
     def load_sv_files_from_data(self, data_dir: str = "data/raw_full") -> List[Document]:
         """Load all SystemVerilog files from data/raw_full directory recursively"""
@@ -98,8 +140,8 @@ class VeriGPTAgent:
     def split_content(self, documents: List[Document]) -> List[Document]:
         """Split content into chunks for vectorization"""
         text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
             separators=["\n\n", "\n", " ", ""]
         )
         
@@ -126,6 +168,32 @@ class VeriGPTAgent:
         """Create FAISS vector store from documents"""
         return FAISS.from_documents(documents, self.embeddings)
     
+    def load_or_build_vectorstore(self, documents: List[Document], data_dir: str = "data/raw_full",
+                                  index_dir: str = "data/faiss_index") -> FAISS:
+        """Load the persisted index if its manifest matches the corpus and embedding model, else rebuild it"""
+        # A compacted version, when the index was compacted since it was built
+        files_dir = str(resolve_index_dir(index_dir))
+        reason = manifest_mismatch(
+            read_manifest(files_dir), data_dir, self.embedding_model,
+            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, extensions=ALLOWED_FILE_EXTENSIONS
+        )
+        if reason is None:
+            print(f"📦 Reusing persisted FAISS index from {index_dir}")
+            return FAISS.load_local(files_dir, self.embeddings, allow_dangerous_deserialization=True)
+
+        print(f"📚 Rebuilding FAISS index ({reason})...")
+        chunked_documents = self.split_content(documents)
+        vectorstore = self.create_vectorstore(chunked_documents)
+        Path(index_dir).mkdir(parents=True, exist_ok=True)
+        vectorstore.save_local(index_dir)
+        write_manifest(
+            index_dir, data_dir, self.embedding_model, chunk_count=len(chunked_documents),
+            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, extensions=ALLOWED_FILE_EXTENSIONS,
+            embedding=self.embeddings.identity()
+        )
+        print(f"💾 Saved FAISS index to {index_dir}")
+        return vectorstore
+
     def create_rag_tool(self, vectorstore: FAISS) -> Tool:
         """Create RAG retrieval tool"""
         def rag_search(query: str) -> str:
@@ -145,17 +213,61 @@ class VeriGPTAgent:
             func=rag_search
         )
     
-    def run_analysis(self, data_dir: str = "data/raw_full") -> str:
-        """Main method to run the complete analysis"""
-        print("🔍 Loading SystemVerilog files from data/raw_full directory...")
-        documents = self.load_sv_files_from_data(data_dir)
-        
-        print("✂️  Splitting content into chunks...")
-        chunked_documents = self.split_content(documents)
-        
-        print("📚 Creating FAISS vector store...")
-        vectorstore = self.create_vectorstore(chunked_documents)
-        
+    def build_file_summary(self, documents: List[Document]) -> str:
+        """Summary of the first loaded files, used as the code block of the analysis prompt"""
+        return "\n\n".join([
+            f"File: {doc.metadata['path']}\nSize: {doc.metadata['size']} chars\nPreview:\n{doc.page_content[:500]}..."
+            for doc in documents[:3]  # Show first 3 files as preview
+        ])
+
+    def planned_queries(self, documents: List[Document]) -> List[str]:
+        """Fixed retrieval plan: one query per previewed file plus the generic verification queries"""
+        file_queries = [
+            f"{Path(doc.metadata['path']).stem} ports, parameters and behavior"
+            for doc in documents[:3]
+        ]
+        return file_queries + PLANNED_QUERIES
+
+    def retrieve_planned(self, vectorstore: FAISS, queries: List[str], k: int = PLANNED_K) -> List[Document]:
+        """Embed all queries in one batch, search them, and return de-duplicated chunks"""
+        vectors = self.embeddings.embed_documents(queries)
+        seen = set()
+        results = []
+        for vector in vectors:
+            for doc in vectorstore.similarity_search_by_vector(vector, k=k):
+                key = (doc.metadata.get("path") or doc.metadata.get("source"), doc.page_content)
+                if key not in seen:
+                    seen.add(key)
+                    results.append(doc)
+        return results
+
+    def run_planned(self, prompt: str, vectorstore: FAISS, documents: List[Document],
+                    callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
+        """Retrieve with a fixed plan, then answer with a single completion call"""
+        docs = self.retrieve_planned(vectorstore, self.planned_queries(documents))
+
+        context_parts = []
+        size = 0
+        for doc in docs:
+            path = doc.metadata.get("path") or doc.metadata.get("source", "unknown")
+            chunk_info = f"[chunk {doc.metadata.get('chunk_index', 0)+1}/{doc.metadata.get('total_chunks', 1)}]"
+            part = f"--- From {path} {chunk_info} ---\n{doc.page_content}"
+            if size + len(part) > PLANNED_CONTEXT_CHARS:
+                break
+            context_parts.append(part)
+            size += len(part)
+        print(f"🔎 Retrieved {len(docs)} unique chunks, using {len(context_parts)} in the prompt")
+
+        messages = [
+            SystemMessage(content="Use the retrieved SystemVerilog codebase context below when answering.\n\n"
+                                  "## RETRIEVED CONTEXT:\n" + "\n\n".join(context_parts)),
+            HumanMessage(content=prompt)
+        ]
+        return self.llm.invoke(messages, config={"callbacks": callbacks or []}).content
+
+    def run_react(self, prompt: str, vectorstore: FAISS,
+                  callbacks: Optional[List[BaseCallbackHandler]] = None) -> str:
+        """Let a ReAct agent search the codebase iteratively before answering"""
         print("🛠️  Setting up RAG tool...")
         rag_tool = self.create_rag_tool(vectorstore)
         
@@ -167,18 +279,47 @@ class VeriGPTAgent:
             verbose=True,
             handle_parsing_errors=True
         )
+        return agent.run(prompt, callbacks=callbacks or [])
+
+    def run_analysis(self, data_dir: str = "data/raw_full", index_dir: str = "data/faiss_index",
+                     mode: str = "planned") -> str:
+        """Main method to run the complete analysis
+
+        Call statistics (mode, LLM calls, wall time) are kept in self.last_run_stats.
+        """
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode '{mode}'. Available: {', '.join(ANALYSIS_MODES)}")
+        started = time.perf_counter()
+
+        print("🔍 Loading SystemVerilog files from data/raw_full directory...")
+        documents = self.load_sv_files_from_data(data_dir)
+        
+        print("📚 Loading FAISS vector store...")
+        vectorstore = self.load_or_build_vectorstore(documents, data_dir, index_dir)
         
         print("📝 Loading analysis prompt...")
         # Create a summary of all loaded files for the prompt
-        file_summary = "\n\n".join([
-            f"File: {doc.metadata['path']}\nSize: {doc.metadata['size']} chars\nPreview:\n{doc.page_content[:500]}..."
-            for doc in documents[:3]  # Show first 3 files as preview
-        ])
+        file_summary = self.build_file_summary(documents)
         
         prompt = self.prompt_bank.format_prompt("analyze_sv", code_block=file_summary)
         
-        print("🚀 Running analysis...")
-        result = agent.run(prompt)
+        print(f"🚀 Running analysis ({mode} mode)...")
+        counter = LLMCallCounter()
+        analysis_started = time.perf_counter()
+        if mode == "planned":
+            result = self.run_planned(prompt, vectorstore, documents, callbacks=[counter])
+        else:
+            result = self.run_react(prompt, vectorstore, callbacks=[counter])
+
+        self.last_run_stats = {
+            "mode": mode,
+            "model": self.route.model,
+            "llm_calls": counter.calls,
+            "analysis_seconds": round(time.perf_counter() - analysis_started, 3),
+            "wall_seconds": round(time.perf_counter() - started, 3)
+        }
+        print(f"📈 {mode} mode: {counter.calls} LLM calls, "
+              f"{self.last_run_stats['analysis_seconds']}s analysis, {self.last_run_stats['wall_seconds']}s total")
         
         return result
 
@@ -215,7 +356,7 @@ class VeriGPTAgent:
         except Exception as e:
             print(f"❌ Error in test: {e}")
 
-def main():
+def main(mode: str = "planned"):
     """Main entry point"""
     try:
         print("🚀 Starting VeriGPT Agent...")
@@ -233,13 +374,14 @@ def main():
         print("🚀 Starting full analysis...")
         print("="*50)
         
-        result = agent.run_analysis()
+        result = agent.run_analysis(mode=mode)
         
         print("\n" + "="*50)
         print("📊 ANALYSIS RESULTS")
         print("="*50)
         print(result)
         print("="*50)
+        print(f"📈 Stats: {agent.last_run_stats}")
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -304,9 +446,11 @@ if __name__ == "__main__":
             exit(0 if test_structure_only() else 1)
         elif sys.argv[1] == "--test-env":
             exit(0 if test_env_only() else 1)
+        elif sys.argv[1] == "--mode" and len(sys.argv) > 2 and sys.argv[2] in ANALYSIS_MODES:
+            exit(main(mode=sys.argv[2]))
         else:
             print(f"Unknown argument: {sys.argv[1]}")
-            print("Available options: --test-structure, --test-env")
+            print(f"Available options: --test-structure, --test-env, --mode {{{','.join(ANALYSIS_MODES)}}}")
             exit(1)
     else:
         exit(main())
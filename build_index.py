@@ -1,48 +1,204 @@
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
 from dotenv import load_dotenv
 from pathlib import Path
-import glob, os, sys
+import argparse, glob, json, os, resource, sys, tempfile, time
+from app.manifest import write_manifest
+from app.embeddings import BACKENDS, get_backend
+from app.summaries import SUMMARIZERS, FileSummarizer, build_summary_index
 
-def build_index(data_dir="data/raw_full", out_dir="data/faiss_index"):
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def directory_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).iterdir() if f.is_file())
+
+
+def build_index(data_dir="data/raw_full", out_dir="data/faiss_index", embedding_backend=None, summarizer="structural"):
+    """Build and save the index; returns per-stage durations and throughput figures
+
+    embedding_backend is "openai" or "local" (default: VERIGPT_EMBEDDING_BACKEND).
+    summarizer is "structural", "llm" or None; it also builds the per-file summary index.
+    """
     print("🚀 Building FAISS index...")
+    stage_seconds = {}
+    stats = {"peak_rss_mb": {}}
+    started = stage_started = time.perf_counter()
+
+    def end_stage(name):
+        nonlocal stage_started
+        now = time.perf_counter()
+        stage_seconds[name] = round(now - stage_started, 3)
+        stats["peak_rss_mb"][name] = peak_rss_mb()
+        stage_started = now
 
     # טען .env אם קיים (נוח לפיתוח מקומי)
     load_dotenv()
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    embeddings = get_backend(embedding_backend)
+    if embeddings.backend == "openai" and not os.getenv("OPENAI_API_KEY"):
         print("❌ OPENAI_API_KEY is not set. Export it or put it in .env", file=sys.stderr)
         sys.exit(1)
+    print(f"🧮 Embedding backend: {embeddings.backend} ({embeddings.name})")
 
-    files = glob.glob(str(Path(data_dir) / "**/*.sv"), recursive=True) \
-          + glob.glob(str(Path(data_dir) / "**/*.svh"), recursive=True)
+    files = sorted(glob.glob(str(Path(data_dir) / "**/*.sv"), recursive=True)
+                   + glob.glob(str(Path(data_dir) / "**/*.svh"), recursive=True))
+    end_stage("discover")
 
-    documents = []
+    contents = []
     for f in files:
         with open(f, encoding="utf-8") as fh:
-            content = fh.read()
-            documents.append(Document(page_content=content, metadata={"source": f}))
-
-    print(f"📄 Loaded {len(documents)} documents")
+            contents.append(fh.read())
+    stats["files"] = len(files)
+    stats["bytes_read"] = sum(len(content.encode("utf-8")) for content in contents)
+    print(f"📄 Loaded {len(contents)} documents")
+    end_stage("read")
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks = splitter.split_documents(documents)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = splitter.create_documents(contents, metadatas=[{"source": f} for f in files])
+    texts = [chunk.page_content for chunk in chunks]
     print(f"✂️ Split into {len(chunks)} chunks")
+    end_stage("split")
 
-    # ✅ OpenAIEmbeddings מהחבילה langchain-openai
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        openai_api_key=api_key
-    )
+    vectors = embeddings.embed_documents(texts)
+    stats["embedding_calls"] = embeddings.stats().get("calls", 0)
+    stats["embedding_tokens"] = embeddings.stats().get("tokens", 0)
+    stats["embedding"] = embeddings.identity()
+    end_stage("embed")
 
-    vectorstore = FAISS.from_documents(chunks, embeddings)
+    vectorstore = FAISS.from_embeddings(
+        list(zip(texts, vectors)), embeddings, metadatas=[chunk.metadata for chunk in chunks]
+    )
+    end_stage("add")
 
     Path(out_dir).mkdir(parents=True, exist_ok=True)
+    summaries = None
+    if summarizer:
+        file_summarizer = FileSummarizer(summarizer)
+        summaries = {
+            "summarizer": file_summarizer.id,
+            "files": build_summary_index(files, contents, embeddings, out_dir, file_summarizer),
+            "cache_hits": file_summarizer.hits
+        }
+        stats["summaries"] = summaries
+        print(f"🗂️ Summarized {summaries['files']} files with {file_summarizer.id} "
+              f"({file_summarizer.hits} from cache)")
+        end_stage("summarize")
+
     vectorstore.save_local(out_dir)
+    # Manifest lets VeriGPTAgent reuse this index while corpus and model are unchanged,
+    # and lets loaders refuse it when a different query embedder is configured
+    write_manifest(out_dir, data_dir, embeddings.name, chunk_count=len(chunks), embedding=embeddings.identity(),
+                   summaries=summaries)
+    end_stage("save")
+    stage_seconds["total"] = round(time.perf_counter() - started, 3)
     print(f"✅ Saved FAISS index to {out_dir}")
+    print("⏱️  " + ", ".join(f"{name} {seconds}s" for name, seconds in stage_seconds.items()))
+    return {"chunks": len(chunks), "stage_seconds": stage_seconds, **stats}
+
+
+def run_benchmark(data_dir, out_dir=None, offline=False, fake_latency_ms=0.0, embedding_backend=None,
+                  summarizer="structural"):
+    """Build once and report throughput, resource use and load time of the result"""
+    fake = None
+    embeddings = get_backend(embedding_backend)
+    if offline and embeddings.backend == "openai":
+        # Must happen before the shared OpenAI client is created
+        from app.fake_openai import FakeOpenAIServer
+        fake = FakeOpenAIServer(latency_ms=fake_latency_ms).start()
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-fake"
+
+    tmp = None if out_dir else tempfile.TemporaryDirectory(prefix="verigpt-index-bench-")
+    out_dir = out_dir or tmp.name
+    try:
+        result = build_index(data_dir=data_dir, out_dir=out_dir, embedding_backend=embedding_backend,
+                             summarizer=summarizer)
+
+        load_started = time.perf_counter()
+        loaded = FAISS.load_local(out_dir, embeddings, allow_dangerous_deserialization=True)
+        load_seconds = round(time.perf_counter() - load_started, 3)
+        seconds = result["stage_seconds"]
+
+        def rate(count, stage):
+            return round(count / seconds[stage], 1) if seconds[stage] > 0 else None
+
+        report = {
+            "data_dir": data_dir,
+            "embedder": f"{embeddings.name} via fake ({fake.base_url})" if fake else embeddings.name,
+            "files": result["files"],
+            "bytes_read": result["bytes_read"],
+            "chunks": result["chunks"],
+            "vectors": loaded.index.ntotal,
+            "stage_seconds": seconds,
+            "throughput": {
+                "files_per_second_read": rate(result["files"], "read"),
+                "mb_per_second_read": rate(result["bytes_read"] / 1e6, "read"),
+                "chunks_per_second_split": rate(result["chunks"], "split"),
+                "chunks_per_second_embed": rate(result["chunks"], "embed"),
+                "chunks_per_second_total": rate(result["chunks"], "total")
+            },
+            "embedding_calls": result["embedding_calls"],
+            "embedding_tokens": result["embedding_tokens"],
+            "peak_rss_mb": result["peak_rss_mb"],
+            "index_bytes_on_disk": directory_bytes(out_dir),
+            "load_seconds": load_seconds,
+            "peak_rss_mb_after_load": peak_rss_mb()
+        }
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+        if fake is not None:
+            fake.stop()
+    return report
+
+
+def print_report(report):
+    print("\n📊 Index build benchmark")
+    print(f"   Corpus: {report['files']} files, {report['bytes_read'] / 1e6:.2f} MB, {report['chunks']} chunks")
+    print(f"   Embedder: {report['embedder']}, {report['embedding_calls']} calls, {report['embedding_tokens']} tokens")
+    print("   Stage        seconds   peak RSS MB")
+    for stage, seconds in report["stage_seconds"].items():
+        print(f"   {stage:<12} {seconds:>7.3f}   {report['peak_rss_mb'].get(stage, '')}")
+    print("   Throughput: " + ", ".join(f"{name} {value}" for name, value in report["throughput"].items()))
+    print(f"   Index on disk: {report['index_bytes_on_disk'] / 1e6:.2f} MB, load {report['load_seconds']}s, "
+          f"peak RSS after load {report['peak_rss_mb_after_load']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the FAISS index")
+    parser.add_argument("--data-dir", default="data/raw_full")
+    parser.add_argument("--out-dir", default=None, help="Defaults to data/faiss_index (a temp dir with --bench)")
+    parser.add_argument("--bench", action="store_true", help="Report per-stage throughput and resource use")
+    parser.add_argument("--embedding-backend", choices=BACKENDS, default=None,
+                        help="Defaults to VERIGPT_EMBEDDING_BACKEND (openai)")
+    parser.add_argument("--summarizer", choices=SUMMARIZERS + ["none"], default="structural",
+                        help="Per-file summaries for the summary index (none skips it)")
+    parser.add_argument("--offline", action="store_true", help="With --bench: embed with the local fake OpenAI server")
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0, help="Latency of each fake embeddings call")
+    parser.add_argument("--json", dest="json_path", default=None, help="With --bench: also write the report here")
+    args = parser.parse_args()
+    summarizer = None if args.summarizer == "none" else args.summarizer
+
+    if args.bench:
+        report = run_benchmark(args.data_dir, args.out_dir, args.offline, args.fake_latency_ms, args.embedding_backend,
+                               summarizer)
+        print_report(report)
+        if args.json_path:
+            Path(args.json_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    else:
+        build_index(data_dir=args.data_dir, out_dir=args.out_dir or "data/faiss_index",
+                    embedding_backend=args.embedding_backend, summarizer=summarizer)
+    return 0
+
 
 if __name__ == "__main__":
-    build_index()
+    sys.exit(main())